@@ -0,0 +1,110 @@
+"""
+Benchmark of the AI analysis cache during an alert storm.
+
+Replays batches of mock alerts (the same annotation templates the
+dashboard's fallback alerts use, with random pods, percentages and
+timestamps) through ``IncidentAIAgent.iter_analyses`` against an
+in-process stand-in for the completion endpoint with a fixed latency,
+first with an empty cache and then warm, and reports completions
+requested, wall time and the cache hit rate.
+
+Run from the app directory:
+
+    python benchmarks/bench_analysis_cache.py [--alerts 30] [--batches 5] [--latency 4]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the cache database out of the working directory
+os.environ.setdefault("AI_ANALYSIS_CACHE_DB", os.path.join(tempfile.mkdtemp(), "ai_analysis_cache.db"))
+
+from src.ai_agent import agent as agent_module
+from src.ai_agent.agent import ANALYSIS_CACHE, IncidentAIAgent
+from src.ai_agent.credentials import SecretProvider
+
+TEMPLATES = [
+    "Memory usage has exceeded {pct}% for {deployment} deployment. Consider restarting the service to free up memory.",
+    "CPU usage has exceeded {pct}% threshold. Immediate attention required.",
+    "Available disk space is below {pct}%. Consider cleanup or expansion.",
+    "Pod {deployment}-pod-{pod} of {deployment} restarted at {time}.",
+]
+
+
+class _Response:
+    status_code = 200
+    encoding = "utf-8"
+    text = "Restart the deployment and watch memory."
+
+    def json(self):
+        return {"choices": [{"text": self.text}]}
+
+    def iter_lines(self, decode_unicode=False):
+        """The reply as server-sent events, for streamed (cancellable) requests."""
+        yield f"data: {json.dumps(self.json())}"
+        yield ""
+        yield "data: [DONE]"
+        yield ""
+
+    def close(self):
+        pass
+
+
+class _CompletionStandIn:
+    """Sleeps ``latency`` seconds per completion and counts them."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return _Response()
+
+
+def storm(alerts, rng):
+    return [
+        rng.choice(TEMPLATES).format(
+            pct=rng.randint(80, 99), deployment=rng.choice(["test-app2", "user-service", "payment-api"]),
+            pod=rng.randint(100, 999), time=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(rng.uniform(1.7e9, 1.8e9))),
+        )
+        for _ in range(alerts)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=30, help="alerts per batch")
+    parser.add_argument("--batches", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=4.0, help="seconds per completion")
+    args = parser.parse_args()
+
+    endpoint = _CompletionStandIn(args.latency)
+    agent_module._get_session = lambda: endpoint
+    agent = IncidentAIAgent.__new__(IncidentAIAgent)
+    agent._credentials = SecretProvider(lambda: "key")
+    agent.endpoint, agent.model = "http://stand-in", "stand-in-model"
+    ANALYSIS_CACHE.clear()
+
+    rng = random.Random(0)
+    print(f"{args.alerts} alerts per batch, {args.latency:.1f} s per completion")
+    for batch in range(args.batches):
+        calls = endpoint.calls
+        start = time.perf_counter()
+        for _ in agent.iter_analyses(storm(args.alerts, rng), batch=False):
+            pass
+        stats = ANALYSIS_CACHE.stats()
+        print(f"  batch {batch + 1}: {endpoint.calls - calls:>3} completions {time.perf_counter() - start:>6.2f} s, "
+              f"hit rate so far {stats['hit_rate']:.0%}")
+    print(f"  without cache or dedup: {args.alerts * args.batches} completions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark of batch prompts against one completion per alert.
+
+Analyses a storm of distinct alerts through ``IncidentAIAgent.iter_analyses``
+with batching off and on, against an in-process stand-in for the completion
+endpoint that charges a fixed per-request overhead, generates tokens at a
+fixed rate and, like free-tier providers, queues requests beyond a
+requests-per-minute limit. ``--malformed`` makes that fraction of batch
+replies unparseable to exercise the per-alert fallback. Reports round trips,
+wall time and time to the first recommendation.
+
+Run from the app directory:
+
+    python benchmarks/bench_batch_prompts.py [--alerts 40] [--rpm 20] [--malformed 0.0]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the cache database out of the working directory
+os.environ.setdefault("AI_ANALYSIS_CACHE_DB", os.path.join(tempfile.mkdtemp(), "ai_analysis_cache.db"))
+
+from src.ai_agent import agent as agent_module
+from src.ai_agent.agent import ANALYSIS_CACHE, IncidentAIAgent
+from src.ai_agent.credentials import SecretProvider
+
+RECOMMENDATION = "Roll back the latest deployment of {service}, then raise its memory limit and watch the error rate."
+
+
+class _Response:
+    status_code = 200
+    encoding = "utf-8"
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return {"choices": [{"text": self.text}]}
+
+    def iter_lines(self, decode_unicode=False):
+        """The reply as server-sent events, for streamed (cancellable) requests."""
+        yield f"data: {json.dumps(self.json())}"
+        yield ""
+        yield "data: [DONE]"
+        yield ""
+
+    def close(self):
+        pass
+
+
+class _CompletionStandIn:
+    """Per-request overhead, a token rate and a requests-per-minute limit, counting round trips."""
+
+    def __init__(self, overhead, tokens_per_second, rpm, malformed, seed=0):
+        self.overhead = overhead
+        self.tokens_per_second = tokens_per_second
+        self.interval = 60.0 / rpm if rpm else 0.0
+        self.malformed = malformed
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        with self._lock:
+            self.calls += 1
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            malformed = self.rng.random() < self.malformed
+        incidents = re.findall(r'^Incident (\d+):\n(.*)$', kwargs["json"]["prompt"], re.M)
+        if incidents:
+            text = json.dumps({"analyses": [
+                {"id": int(number), "recommendation": RECOMMENDATION.format(service=context[:24])}
+                for number, context in incidents
+            ]})
+            if malformed:
+                text = text[:len(text) // 2]
+        else:
+            text = RECOMMENDATION.format(service=kwargs["json"]["prompt"][-24:])
+        time.sleep(slot - now + self.overhead + len(text) / 4 / self.tokens_per_second)
+        return _Response(text)
+
+
+def storm(alerts, rng):
+    services = [f"service-{n:03d}" for n in range(alerts)]
+    return [f"{rng.choice(['HighMemoryUsage', 'HighCPUUsage', 'HighErrorRate'])} on {service}: "
+            f"threshold exceeded for {service} in namespace prod-{n % 4}" for n, service in enumerate(services)]
+
+
+def run(agent, contexts, batch):
+    ANALYSIS_CACHE.clear()
+    start = time.perf_counter()
+    first = None
+    answered = 0
+    for _ in agent.iter_analyses(contexts, batch=batch):
+        first = first if first is not None else time.perf_counter() - start
+        answered += 1
+    return answered, time.perf_counter() - start, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=40, help="distinct alerts in the storm")
+    parser.add_argument("--overhead", type=float, default=1.5, help="seconds of queueing and prompt processing per request")
+    parser.add_argument("--token-rate", type=float, default=80.0, help="generated tokens per second")
+    parser.add_argument("--rpm", type=float, default=20.0, help="requests per minute before requests queue (0: no limit)")
+    parser.add_argument("--malformed", type=float, default=0.0, help="fraction of batch replies that fail to parse")
+    args = parser.parse_args()
+
+    contexts = storm(args.alerts, random.Random(0))
+    agent = IncidentAIAgent.__new__(IncidentAIAgent)
+    agent._credentials = SecretProvider(lambda: "key")
+    agent.endpoint, agent.model = "http://stand-in", "stand-in-model"
+
+    print(f"{args.alerts} alerts, {args.overhead:.1f} s overhead, {args.token_rate:.0f} tokens/s, {args.rpm:.0f} rpm")
+    for label, batch in (("one per alert", False), ("batched", True)):
+        endpoint = _CompletionStandIn(args.overhead, args.token_rate, args.rpm, args.malformed)
+        agent_module._get_session = lambda: endpoint
+        answered, elapsed, first = run(agent, contexts, batch)
+        print(f"  {label:<14} {endpoint.calls:>3} round trips {elapsed:>7.2f} s, first after {first:>6.2f} s, "
+              f"{answered} answered")
+
+
+if __name__ == "__main__":
+    main()
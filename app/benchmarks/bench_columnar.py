@@ -0,0 +1,83 @@
+"""
+Benchmark of reloading analytics tables from columnar spill files.
+
+Builds a deployment-health-shaped table and an alert-event table of the
+given sizes, then times how a page gets them: rebuilding the DataFrame
+from JSON-decoded records (what a rerun does with query results) versus
+memory-mapping the spilled Arrow file. Also reports file sizes, with and
+without dictionary encoding, and the Parquet export.
+
+Run from the app directory:
+
+    python benchmarks/bench_columnar.py [--rows 10000 100000]
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.columnar import HAS_PYARROW, ColumnarStore, export_parquet
+
+
+def synthetic_events(rows, seed=0):
+    """Return an alert-event-shaped DataFrame with ``rows`` rows and low-cardinality labels."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "time": pd.to_datetime(1.7e9 + np.sort(rng.uniform(0, 90 * 86400, rows)), unit="s", utc=True),
+        "state": rng.choice(["firing", "pending", "resolved"], rows),
+        "alertname": rng.choice([f"Alert{i}" for i in range(40)], rows),
+        "severity": rng.choice(["critical", "warning", "info"], rows),
+        "namespace": rng.choice([f"team-{i}" for i in range(20)], rows),
+        "deployment": rng.choice([f"service-{i}" for i in range(2000)], rows),
+        "value": rng.uniform(0, 100, rows),
+    })
+
+
+def timed(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if not HAS_PYARROW:
+        sys.exit("pyarrow is not installed")
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    store = ColumnarStore(tempfile.mkdtemp())
+    print(f"{'rows':>8} {'json (ms)':>10} {'mmap (ms)':>10} {'arrow (KB)':>11} {'plain (KB)':>11} {'parquet (KB)':>13}")
+    for rows in args.rows:
+        frame = synthetic_events(rows)
+        payload = frame.assign(time=frame["time"].astype("int64") // 10**9).to_json(orient="records")
+        store.write("events", frame)
+        # The same table without dictionary encoding, for comparison
+        plain = pa.BufferOutputStream()
+        feather.write_feather(pa.Table.from_pandas(frame, preserve_index=False), plain, compression="uncompressed")
+        parquet = io.BytesIO()
+        export_parquet(frame, parquet)
+
+        json_ms = timed(lambda: pd.DataFrame(json.loads(payload)), args.repeat) * 1000
+        mmap_ms = timed(lambda: store.read("events"), args.repeat) * 1000
+        print(f"{rows:>8} {json_ms:>10.1f} {mmap_ms:>10.1f} {os.path.getsize(store.path('events')) / 1024:>11.0f} "
+              f"{plain.getvalue().size / 1024:>11.0f} {len(parquet.getvalue()) / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
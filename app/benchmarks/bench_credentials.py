@@ -0,0 +1,73 @@
+"""
+Benchmark of resolving the OpenRouter key per agent versus once per process.
+
+Starts the Secrets Manager stand-in, then constructs ``--agents`` agents
+twice: the way the agent used to (a new boto3 session, client and
+``GetSecretValue`` call each time) and through the shared credential
+provider, reporting wall time and reads served. Finally rotates the secret
+and checks the provider's background refresh picks the new value up.
+
+Run from the app directory:
+
+    python benchmarks/bench_credentials.py [--agents 50] [--rotation 2]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# boto3 signs requests even to the stand-in
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+import boto3
+
+from src.ai_agent.agent import IncidentAIAgent
+from src.ai_agent.credentials import SecretProvider, secretsmanager_fetcher
+from tests.stubs.secrets_manager import SecretsManagerStub
+
+SECRET = "openrouter-api-key"
+
+
+def per_agent_key(url):
+    """The agent's former lookup: a fresh session and client for every agent."""
+    client = boto3.session.Session(region_name="us-west-2").client(service_name='secretsmanager', endpoint_url=url)
+    secret = client.get_secret_value(SecretId=SECRET)['SecretString']
+    return json.loads(secret) if secret.startswith('{') else secret
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--rotation", type=float, default=2.0, help="rotation interval for the refresh check, seconds")
+    args = parser.parse_args()
+
+    stub = SecretsManagerStub({SECRET: "sk-or-first"})
+    with stub as url:
+        start = time.perf_counter()
+        for _ in range(args.agents):
+            per_agent_key(url)
+        before = time.perf_counter() - start
+        print(f"per agent:   {args.agents} agents {before * 1000:>8.1f} ms, {stub.reads(SECRET)} reads")
+
+        reads = stub.reads(SECRET)
+        provider = SecretProvider(secretsmanager_fetcher(SECRET, endpoint_url=url),
+                                  rotation_interval=args.rotation, refresh_margin=args.rotation / 4)
+        start = time.perf_counter()
+        agents = [IncidentAIAgent(credentials=provider) for _ in range(args.agents)]
+        after = time.perf_counter() - start
+        print(f"shared:      {args.agents} agents {after * 1000:>8.1f} ms, {stub.reads(SECRET) - reads} reads "
+              f"({before / after:.0f}x faster)")
+
+        stub.rotate(SECRET, "sk-or-second")
+        time.sleep(args.rotation)
+        keys = {agent.api_key for agent in agents}
+        print(f"after rotation: agents see {sorted(keys)}, provider stats {provider.stats()}")
+        provider.stop()
+
+
+if __name__ == "__main__":
+    main()
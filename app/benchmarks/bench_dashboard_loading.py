@@ -0,0 +1,125 @@
+"""
+End-to-end benchmark of the dashboard's data loading against the local Prometheus stand-in.
+
+For each fleet size a fresh stand-in is started with the given per-request
+latency, and the calls one dashboard render makes are timed: the service
+list, the System Status metrics, one 7-day history chart and the alert
+fetch plus grouping. The metrics cache is cleared before every repetition,
+so those numbers are cold-render costs; the service catalog is loaded once
+per fleet and refreshed in the background, as in the dashboard.
+
+Run from the app directory:
+
+    python benchmarks/bench_dashboard_loading.py [--sizes 10 100 1000] [--latency 0.02]
+
+or as a pytest suite, with the stand-in started by a fixture per fleet size:
+
+    python -m pytest benchmarks/bench_dashboard_loading.py -s
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the alert history and caches out of the real data directory
+os.environ.setdefault("RESPONDER_DATA_DIR", tempfile.mkdtemp())
+
+from src.event_ingest import ingest
+from src.event_ingest.grouping import group_alerts
+from src.utils import metrics
+from src.utils.service_catalog import ServiceCatalog
+from tests.stubs.prometheus import PrometheusStub
+
+
+def load_dashboard_data():
+    """The Prometheus-backed calls of one dashboard render, timed individually."""
+    timings = {}
+
+    start = time.perf_counter()
+    services = metrics.get_all_services()
+    timings["services"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics.get_all_service_metrics()
+    timings["status_metrics"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if services:
+        metrics.get_service_history(services[0], "response_time", days=7, width_px=800)
+    timings["history_chart"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    group_alerts(ingest.fetch_alerts()[0])
+    timings["alerts"] = time.perf_counter() - start
+
+    timings["total"] = sum(timings.values())
+    return timings
+
+
+COLUMNS = ["services", "status_metrics", "history_chart", "alerts", "total"]
+
+
+def use_prometheus(url):
+    """Point the metrics and alert code at ``url``, with a fresh service catalog."""
+    metrics.PROMETHEUS_URL = url
+    os.environ["PROMETHEUS_URL"] = url
+    metrics.SERVICE_CATALOG.stop()
+    metrics.SERVICE_CATALOG = ServiceCatalog(metrics._client)
+
+
+def measure(repeat):
+    """Median timings of ``repeat`` cold renders against the current Prometheus."""
+    runs = []
+    for _ in range(repeat):
+        metrics.METRICS_CACHE.invalidate()
+        runs.append(load_dashboard_data())
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def bench(size, latency, repeat):
+    with PrometheusStub(services=size, latency=latency) as url:
+        use_prometheus(url)
+        return measure(repeat)
+
+
+def format_row(size, result):
+    return f"{size:>6} " + " ".join(f"{result[name] * 1000:>15.1f}" for name in COLUMNS)
+
+
+@pytest.fixture(params=[10, 100, 1000], ids=lambda size: f"{size}-services")
+def fleet(request):
+    with PrometheusStub(services=request.param, latency=0.02) as url:
+        use_prometheus(url)
+        yield request.param
+    metrics.SERVICE_CATALOG.stop()
+
+
+def test_dashboard_loading(fleet):
+    result = measure(repeat=3)
+    print("\n" + format_row(fleet, result))
+    # Every service appears once however large the fleet
+    assert len(metrics.get_all_services()) == fleet
+    assert len(metrics.get_all_service_metrics()) == fleet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in latency per request in seconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"latency {args.latency * 1000:.0f} ms/request, median of {args.repeat} cold renders (ms)")
+    print(f"{'fleet':>6} " + " ".join(f"{name:>15}" for name in COLUMNS))
+    for size in args.sizes:
+        print(format_row(size, bench(size, args.latency, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of the vectorised capacity forecast.
+
+Generates synthetic hourly usage series (linear growth, a daily cycle,
+noise, occasional cleanup drops and spikes) and times ``time_to_threshold``
+over all of them at once, then reports how close each method's
+time-to-threshold is to the true one for the series that are actually
+growing.
+
+Run from the app directory:
+
+    python benchmarks/bench_forecast.py [--series 50000] [--points 168]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.forecast import time_to_threshold
+
+
+def synthetic_usage(series, points, step, seed=0):
+    """Return (timestamps, values, true seconds to a threshold of 1.0) for ``series`` usage fractions."""
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(points) * float(step)
+    start = rng.uniform(0.2, 0.7, series)
+    # Half the series grow, the rest are flat
+    slope = np.where(rng.random(series) < 0.5, rng.uniform(0.0005, 0.0015, series) / 3600, 0.0)
+    phase = rng.uniform(0, 2 * np.pi, series)
+    daily = 0.02 * np.sin(2 * np.pi * timestamps[None, :] / 86400 + phase[:, None])
+    values = start[:, None] + slope[:, None] * timestamps[None, :] + daily
+    values += rng.normal(0, 0.005, values.shape)
+    outliers = rng.random(values.shape) < 0.01
+    values[outliers] += rng.choice([-0.2, 0.2], outliers.sum())
+    values[rng.random(values.shape) < 0.02] = np.nan
+    current = start + slope * timestamps[-1]
+    with np.errstate(divide="ignore"):
+        truth = np.where(slope > 0, (1.0 - current) / slope, np.inf)
+    return timestamps, values, truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--series", type=int, default=50000)
+    parser.add_argument("--points", type=int, default=168, help="samples per series (168 = 7 days hourly)")
+    parser.add_argument("--step", type=int, default=3600)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    timestamps, values, truth = synthetic_usage(args.series, args.points, args.step)
+    runs = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = time_to_threshold(timestamps, values, 1.0, season_length=86400 // args.step)
+        runs.append(time.perf_counter() - start)
+
+    growing = np.isfinite(truth)
+    print(f"{args.series} series x {args.points} points: best of {args.repeat} {min(runs):.2f} s")
+    for method in ("linear", "holt_winters", "seconds"):
+        error = np.abs(result[method][growing] - truth[growing]) / truth[growing]
+        print(f"  {method:>13}: median relative error {np.median(error) * 100:.1f}% on growing series")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark of the per-render query planner against the local Prometheus stand-in.
+
+Simulates a Dashboard render: the System Status table, one history chart
+and one metrics line per alert card. The same widgets are loaded with
+their own calls (uncached, one set of queries per widget) and through a
+QueryPlanner, and the requests, series and time of each are reported.
+
+Run from the app directory:
+
+    python benchmarks/bench_query_planner.py [--services 1000] [--cards 20] [--latency 0.02]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import metrics
+from tests.stubs.prometheus import PrometheusStub
+from src.utils.query_planner import QueryPlanner
+from src.utils.service_catalog import ServiceCatalog
+
+
+def unplanned(services, cards):
+    requests = 0
+    metrics.get_all_service_metrics.uncached()
+    requests += 3
+    metrics.get_service_history(services[0], "load")
+    requests += 1
+    for service in cards:
+        metrics.get_all_service_metrics.uncached([service])
+        requests += 3
+    return requests
+
+
+def planned(services, cards):
+    planner = QueryPlanner(metrics.run_queries)
+    results = [metrics.plan_service_metrics(planner, widget="System Status"),
+               metrics.plan_service_history(planner, services[0], "load", widget="Service History")]
+    results += [metrics.plan_service_metrics(planner, [service], widget="Alert cards") for service in cards]
+    planner.execute()
+    for result in results:
+        result()
+    return planner.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", type=int, default=1000)
+    parser.add_argument("--cards", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in latency per request in seconds")
+    args = parser.parse_args()
+
+    with PrometheusStub(services=args.services, latency=args.latency) as url:
+        metrics.PROMETHEUS_URL = url
+        metrics.SERVICE_CATALOG.stop()
+        metrics.SERVICE_CATALOG = ServiceCatalog(metrics._client)
+        services = metrics.get_all_services()
+        cards = services[:args.cards]
+
+        metrics.METRICS_CACHE.invalidate()
+        start = time.perf_counter()
+        requests = unplanned(services, cards)
+        unplanned_seconds = time.perf_counter() - start
+
+        metrics.METRICS_CACHE.invalidate()
+        start = time.perf_counter()
+        stats = planned(services, cards)
+        planned_seconds = time.perf_counter() - start
+
+    print(f"{args.services} services, {args.cards} alert cards, latency {args.latency * 1000:.0f} ms/request")
+    print(f"  per-widget calls: {requests:>4} requests {unplanned_seconds * 1000:>8.1f} ms")
+    print(f"  planned:          {stats['issued']:>4} requests {planned_seconds * 1000:>8.1f} ms "
+          f"({stats['registered']} registered, {stats['series']} series, {stats['samples']} samples)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark of streaming completions against waiting for whole ones.
+
+Analyses a handful of alerts through the OpenRouter stand-in three times:
+with ``iter_analyses`` (each recommendation arrives complete), with
+``stream_analyses`` (text arrives as it is generated) and with
+``stream_analyses(batch=True)`` (one batch prompt), reporting the time to
+the first text on any card, the median time to each card's first text and
+the total time. Then starts the streams, and the batch, again and cancels
+them after ``--cancel-after`` seconds, reporting how quickly they stopped
+and how many tokens the stand-in generated for them.
+
+Run from the app directory:
+
+    python benchmarks/bench_streaming.py [--alerts 3] [--first-token 0.8] [--tokens-per-second 40]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the cache database out of the working directory
+os.environ.setdefault("AI_ANALYSIS_CACHE_DB", os.path.join(tempfile.mkdtemp(), "ai_analysis_cache.db"))
+
+from src.ai_agent.agent import ANALYSIS_CACHE, IncidentAIAgent
+from src.ai_agent.credentials import SecretProvider
+from src.ai_agent.streaming import Cancellation
+from tests.stubs.openrouter import OpenRouterStub
+
+
+def first_text_times(updates, count):
+    """Consume (index, text, ...) updates; return seconds to each index's first text and the total."""
+    start = time.perf_counter()
+    first = {}
+    for index, text, *_ in updates:
+        if text:
+            first.setdefault(index, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    return [first.get(index, elapsed) for index in range(count)], elapsed
+
+
+def report(label, times, elapsed):
+    print(f"  {label:<10} first text {min(times):>5.2f} s, median card {statistics.median(times):>5.2f} s, "
+          f"all done {elapsed:>5.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=4, help="distinct alerts")
+    parser.add_argument("--first-token", type=float, default=0.8, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--cancel-after", type=float, default=1.5, help="seconds before cancelling the streams")
+    args = parser.parse_args()
+
+    contexts = [f"Memory usage has exceeded 90% for service-{n} deployment." for n in range(args.alerts)]
+    stub = OpenRouterStub(first_token=args.first_token, tokens_per_second=args.tokens_per_second)
+    with stub as url:
+        agent = IncidentAIAgent(credentials=SecretProvider(lambda: "key"))
+        agent.endpoint = url
+        print(f"{args.alerts} alerts, first token after {args.first_token:.1f} s, {args.tokens_per_second:.0f} tokens/s")
+
+        ANALYSIS_CACHE.clear()
+        report("whole", *first_text_times(agent.iter_analyses(contexts), args.alerts))
+        ANALYSIS_CACHE.clear()
+        tokens = stub.app.state.tokens
+        report("streamed", *first_text_times(agent.stream_analyses(contexts), args.alerts))
+        full_tokens = {False: stub.app.state.tokens - tokens}
+        ANALYSIS_CACHE.clear()
+        tokens = stub.app.state.tokens
+        report("batched", *first_text_times(agent.stream_analyses(contexts, batch=True), args.alerts))
+        full_tokens[True] = stub.app.state.tokens - tokens
+
+        for label, batch in (("streams", False), ("batch", True)):
+            ANALYSIS_CACHE.clear()
+            tokens, abandoned = stub.app.state.tokens, stub.app.state.abandoned
+            cancel = Cancellation()
+            # From another thread, like the Stop button: a batch yields nothing until it completes
+            timer = threading.Timer(args.cancel_after, cancel.cancel)
+            start = time.perf_counter()
+            timer.start()
+            for _ in agent.stream_analyses(contexts, batch=batch, cancel=cancel):
+                pass
+            stopped = time.perf_counter() - start
+            timer.cancel()
+            time.sleep(0.2)  # let the stand-in notice the disconnects
+            cached = sum(ANALYSIS_CACHE.peek(agent.model, agent._prompt(context)) is not None for context in contexts)
+            print(f"  cancelled {label} after {args.cancel_after:.1f} s: closed at {stopped:.2f} s, "
+                  f"{stub.app.state.tokens - tokens}/{full_tokens[batch]} tokens generated, "
+                  f"{stub.app.state.abandoned - abandoned} streams abandoned, {cached} cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: src.utils.timestamps against the dashboard's former parse_datetime.
+
+Run from the app directory:
+
+    python benchmarks/bench_timestamps.py [count] [repeat]
+
+Each function runs ``repeat`` times (interleaved, memo cleared before each
+run) and the best time is reported.
+
+Note that on Python 3.11+ the legacy function's first ``fromisoformat``
+attempt accepts nanosecond timestamps; on the Python 3.10 image every
+Prometheus timestamp falls through to its exception-driven second attempt.
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.timestamps import clear_cache, parse_datetime, to_datetime64
+
+
+def legacy_parse_datetime(dt_string):
+    """The fromisoformat/strptime cascade previously in dashboard.py."""
+    if not dt_string:
+        return None
+    try:
+        return datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        try:
+            dt_string = dt_string.replace('Z', '')
+            if '.' in dt_string:
+                main_part, ms_part = dt_string.split('.')
+                ms_part = ms_part[:6].ljust(6, '0')
+                dt_string = f"{main_part}.{ms_part}"
+            return datetime.fromisoformat(dt_string)
+        except (ValueError, AttributeError):
+            try:
+                return datetime.strptime(dt_string.split('.')[0], '%Y-%m-%dT%H:%M:%S')
+            except (ValueError, AttributeError):
+                return None
+
+
+def make_timestamps(count, distinct=None, seed=0):
+    """
+    Prometheus-style nanosecond timestamps drawn from ``distinct`` values.
+
+    With ``distinct=None`` every value is unique, the memo's worst case.
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.integers(1_700_000_000 * 10**9, 1_800_000_000 * 10**9, distinct or count).astype("datetime64[ns]")
+    pool = [value + "Z" for value in np.datetime_as_string(base, unit="ns").tolist()]
+    if distinct is None:
+        return pool
+    return [pool[i] for i in rng.integers(0, distinct, count)]
+
+
+def bench(benchmarks, values, repeat):
+    best = dict.fromkeys(benchmarks, float("inf"))
+    for _ in range(repeat):
+        for label, fn in benchmarks.items():
+            clear_cache()
+            start = time.perf_counter()
+            fn(values)
+            best[label] = min(best[label], time.perf_counter() - start)
+    for label, elapsed in best.items():
+        print(f"{label:<40} {elapsed:8.3f}s  {elapsed / len(values) * 1e9:8.0f} ns/value")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    benchmarks = {
+        "legacy parse_datetime": lambda v: [legacy_parse_datetime(x) for x in v],
+        "timestamps.parse_datetime": lambda v: [parse_datetime(x) for x in v],
+        "timestamps.to_datetime64 (batch)": to_datetime64,
+    }
+    for distinct in (None, count, 5000):
+        values = make_timestamps(count, distinct)
+        label = "all unique" if distinct is None else f"drawn from {distinct:,}"
+        print(f"\n{count:,} timestamps, {label}")
+        bench(benchmarks, values, repeat)
+
+
+if __name__ == "__main__":
+    main()
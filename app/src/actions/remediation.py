@@ -292,6 +292,29 @@ def auto_remediate_from_prometheus_alert(alert_data):
         severity = labels.get("severity", "unknown")
         description = annotations.get("description", "")
         
+        if labels.get("source") == "anomaly-detector":
+            # Anomalies are a statistical early warning, not a diagnosis to act on unattended
+            return {
+                "action": "none",
+                "status": "skipped",
+                "message": "Anomaly detector alerts are advisory and do not trigger auto-remediation"
+            }
+        
+        if labels.get("source") == "capacity-forecast":
+            # Nothing has run out yet; a restart would disrupt the service without freeing capacity
+            return {
+                "deployment": deployment_name,
+                "namespace": namespace,
+                "alert_type": alert_name,
+                "actions_taken": [{
+                    "action": "notify",
+                    "result": annotations.get("summary", ""),
+                    "reason": description or "Capacity is forecast to run out"
+                }],
+                "status": "success",
+                "message": "Capacity forecast reported; add capacity before it runs out"
+            }
+        
         if not deployment_name:
             return {
                 "action": "none",
@@ -366,6 +389,16 @@ def get_auto_remediation_rules():
             "action": "restart",
             "description": "Restart for disk issues to trigger cleanup"
         },
+        "capacity_forecast_rules": {
+            "source": "capacity-forecast",
+            "action": "notify",
+            "description": "Report forecast capacity exhaustion (DiskPressure, MemoryLeak, InsufficientResources) without restarting"
+        },
+        "anomaly_rules": {
+            "source": "anomaly-detector",
+            "action": "none",
+            "description": "Anomaly detector alerts are advisory and never auto-remediated"
+        },
         "default_rule": {
             "action": "restart",
             "description": "Default safe restart for unknown issues"
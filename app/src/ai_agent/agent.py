@@ -1,7 +1,44 @@
-import boto3
+import asyncio
 import os
-import json
+import queue
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.ai_agent.analysis_cache import AnalysisCache, cache_key
+from src.ai_agent.batching import (
+    ANALYSIS_MAX_TOKENS, BATCH_RESPONSE_SCHEMA, OPENROUTER_BATCH_MIN_ALERTS, batch_max_tokens, batch_prompt,
+    parse_batch_response, plan_batches,
+)
+from src.ai_agent.credentials import get_openrouter_key_provider
+from src.ai_agent.streaming import Cancellation, StreamError, completion_chunks
+
+OPENROUTER_ENDPOINT = os.environ.get("OPENROUTER_ENDPOINT", "https://openrouter.ai/api/v1/completions")
+OPENROUTER_TIMEOUT = float(os.environ.get("OPENROUTER_TIMEOUT", "30"))
+OPENROUTER_MAX_CONCURRENCY = int(os.environ.get("OPENROUTER_MAX_CONCURRENCY", "8"))
+OPENROUTER_POOL_SIZE = int(os.environ.get("OPENROUTER_POOL_SIZE", "16"))
+# A batch generates up to OPENROUTER_BATCH_MAX_ALERTS recommendations, so it gets longer than one
+OPENROUTER_BATCH_TIMEOUT = float(os.environ.get("OPENROUTER_BATCH_TIMEOUT", "90"))
+
+_session = None
+_session_lock = threading.Lock()
+
+# Alerts reuse a handful of annotation templates, so most analyses repeat
+ANALYSIS_CACHE = AnalysisCache()
+
+
+def _get_session():
+    """Return the process-wide keep-alive session for OpenRouter, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OPENROUTER_POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
 
 class IncidentAIAgent:
     # Supported models
@@ -11,35 +48,385 @@ class IncidentAIAgent:
         "claude-sonnet-4": "anthropic/claude-sonnet-4"
     }
 
-    def __init__(self, model=None):
-        secret_arn = os.environ.get("OPENROUTER_API_KEY_SECRET_ARN")
-        self.api_key = self._get_openrouter_api_key(secret_arn)
-        self.endpoint = "https://openrouter.ai/api/v1/completions"
+    def __init__(self, model=None, credentials=None):
+        # Shared by every agent in the process; resolving it here fails fast on a bad secret
+        self._credentials = credentials or get_openrouter_key_provider()
+        self._credentials.get()
+        self.endpoint = OPENROUTER_ENDPOINT
         self.model = self.SUPPORTED_MODELS.get(model, "deepseek/deepseek-r1:free")  # Default to DeepSeek R1
 
-    def _get_openrouter_api_key(self, secret_arn):
-        region = os.environ.get("AWS_DEFAULT_REGION", "us-west-2")
-        session = boto3.session.Session(region_name=region)
-        client = session.client(service_name='secretsmanager')
-        get_secret_value_response = client.get_secret_value(SecretId=secret_arn)
-        secret = get_secret_value_response['SecretString']
-        return json.loads(secret) if secret.startswith('{') else secret
-
-    def analyze_incident(self, incident_context):
-        prompt = f"Analyze this incident and suggest remediation:\n{incident_context}"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
+    @property
+    def api_key(self):
+        return self._credentials.get()
+
+    def _post(self, payload, timeout, **kwargs):
+        """POST ``payload`` to OpenRouter, fetching the key again and retrying once if it was rejected (rotated)."""
+        for attempt in range(2):
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+            response = _get_session().post(self.endpoint, headers=headers, json=payload, timeout=timeout, **kwargs)
+            if response.status_code != 401 or attempt:
+                return response
+            try:
+                self._credentials.refresh()
+            except Exception:
+                return response
+            response.close()
+
+    def _complete(self, payload, timeout, cancel=None):
+        """
+        Return the text of the completion for ``payload``.
+
+        With ``cancel`` (a :class:`Cancellation`) the completion is streamed,
+        so setting it closes the connection at once and the provider stops
+        generating, rather than the reply being waited for in full.
+
+        Raises:
+            requests.RequestException: on transport errors or a non-200 reply
+            StreamError: if the stream reports an error or is cancelled
+        """
+        if cancel is None:
+            response = self._post(payload, timeout)
+            if response.status_code != 200:
+                raise requests.HTTPError(f"{response.status_code} - {response.text}", response=response)
+            return response.json()["choices"][0]["text"]
+
+        response = self._post(dict(payload, stream=True), timeout, stream=True)
+        with cancel.closing(response):
+            if response.status_code != 200:
+                raise requests.HTTPError(f"{response.status_code} - {response.text}", response=response)
+            try:
+                text = "".join(completion_chunks(response))
+            except Exception:
+                # Reads fail once a cancelled stream's connection is closed under them
+                if cancel.is_set():
+                    raise StreamError("Completion cancelled") from None
+                raise
+        if cancel.is_set():
+            raise StreamError("Completion cancelled")
+        return text
+
+    @staticmethod
+    def _prompt(incident_context):
+        return f"Analyze this incident and suggest remediation:\n{incident_context}"
+
+    def analyze_incident(self, incident_context, timeout=None, cancel=None):
+        """Analyse one incident; with ``cancel`` the request stops as soon as it is set (see :meth:`_complete`)."""
+        prompt = self._prompt(incident_context)
+        cached = ANALYSIS_CACHE.get(self.model, prompt)
+        if cached is not None:
+            return cached
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "max_tokens": ANALYSIS_MAX_TOKENS
         }
+        timeout = OPENROUTER_TIMEOUT if timeout is None else timeout
+        try:
+            analysis = self._complete(payload, timeout, cancel).strip()
+        except (requests.RequestException, StreamError) as e:
+            return f"Error from OpenRouter: {str(e)}"
+        ANALYSIS_CACHE.put(self.model, prompt, analysis)
+        return analysis
+
+    def stream_incident(self, incident_context, timeout=None, deadline=None, cancel=None):
+        """
+        Analyse one incident with a streaming completion, yielding text chunks as they arrive.
+
+        A cached analysis is yielded whole. The stream stops early, keeping
+        what has arrived, once ``deadline`` seconds have passed or ``cancel``
+        (a :class:`Cancellation`) is set; dropping the connection stops the
+        generation upstream too. Only complete analyses are cached. Errors
+        are yielded as text, like :meth:`analyze_incident` returns them.
+        """
+        prompt = self._prompt(incident_context)
+        cached = ANALYSIS_CACHE.get(self.model, prompt)
+        if cached is not None:
+            yield cached
+            return
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "max_tokens": 150
+            "max_tokens": ANALYSIS_MAX_TOKENS,
+            "stream": True
+        }
+        timeout = OPENROUTER_TIMEOUT if timeout is None else timeout
+        deadline = OPENROUTER_TIMEOUT if deadline is None else deadline
+        cancel = cancel or Cancellation()
+        stop_at = time.monotonic() + deadline
+        try:
+            response = self._post(payload, timeout, stream=True)
+        except requests.RequestException as e:
+            yield f"Error from OpenRouter: {str(e)}"
+            return
+
+        chunks = []
+        with cancel.closing(response):
+            if response.status_code != 200:
+                yield f"Error from OpenRouter: {response.status_code} - {response.text}"
+                return
+            try:
+                for chunk in completion_chunks(response):
+                    if cancel.is_set():
+                        return
+                    chunks.append(chunk)
+                    yield chunk
+                    if time.monotonic() > stop_at:
+                        yield f" … (stopped after {deadline:.0f}s)"
+                        return
+            except Exception as e:
+                # Reads fail once a cancelled stream's connection is closed under them
+                if not cancel.is_set():
+                    yield f"{' … ' if chunks else ''}Error from OpenRouter: {str(e)}"
+                return
+        analysis = "".join(chunks).strip()
+        if analysis:
+            ANALYSIS_CACHE.put(self.model, prompt, analysis)
+
+    def analyze_batch(self, incident_contexts, timeout=None, cancel=None):
+        """
+        Analyse several incidents with one completion request.
+
+        The incidents are numbered in a single prompt and the model is asked
+        for JSON matching BATCH_RESPONSE_SCHEMA, which is split back into one
+        recommendation per incident and cached as if each had been analysed
+        alone. With ``cancel`` the request stops as soon as it is set (see
+        :meth:`_complete`).
+
+        Returns:
+            One entry per context: the recommendation, an error message if the
+            request failed, or None if the reply had nothing usable for that
+            incident (analyse those with :meth:`analyze_incident`)
+        """
+        incident_contexts = list(incident_contexts)
+        count = len(incident_contexts)
+        payload = {
+            "model": self.model,
+            "prompt": batch_prompt(incident_contexts),
+            "max_tokens": batch_max_tokens(count),
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "incident_analyses", "strict": True, "schema": BATCH_RESPONSE_SCHEMA},
+            },
         }
-        response = requests.post(self.endpoint, headers=headers, json=payload)
+        timeout = OPENROUTER_TIMEOUT if timeout is None else timeout
+        try:
+            text = self._complete(payload, timeout, cancel)
+        except (ValueError, KeyError, IndexError, TypeError):
+            # Unreadable reply (requests' JSON errors are ValueErrors too): analyse each alone
+            return [None] * count
+        except (requests.RequestException, StreamError) as e:
+            return [f"Error from OpenRouter: {str(e)}"] * count
+        recommendations = parse_batch_response(text, count)
+        for context, recommendation in zip(incident_contexts, recommendations):
+            if recommendation is not None:
+                ANALYSIS_CACHE.put(self.model, self._prompt(context), recommendation)
+        return recommendations
+
+    async def analyze_incidents(self, incident_contexts, max_concurrency=None, deadline=None, batch=True,
+                                cancel=None):
+        """
+        Analyse many incidents concurrently, yielding results as they finish.
+
+        Incidents whose prompts normalise to the same cache key are analysed
+        once. With ``batch``, and at least OPENROUTER_BATCH_MIN_ALERTS
+        incidents not already cached, they are packed into token-budgeted
+        batch prompts (:meth:`analyze_batch`); any incident a batch reply
+        doesn't answer is retried on its own. At most ``max_concurrency``
+        completions are in flight over the shared keep-alive pool, and each
+        gets ``deadline`` seconds from when it starts (batches at least
+        OPENROUTER_BATCH_TIMEOUT); one that misses it yields an error message
+        instead. Setting ``cancel`` (a :class:`Cancellation`) closes every
+        open request and ends the iteration.
+
+        Yields:
+            (index, recommendation) tuples in completion order, where
+            ``index`` is the position in ``incident_contexts``
+        """
+        max_concurrency = OPENROUTER_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        deadline = OPENROUTER_TIMEOUT if deadline is None else deadline
+        semaphore = asyncio.Semaphore(max(1, min(max_concurrency, OPENROUTER_POOL_SIZE)))
+
+        # One analysis per distinct cache key, answering every incident that shares it
+        groups = {}
+        for index, context in enumerate(incident_contexts):
+            groups.setdefault(cache_key(self.model, self._prompt(context)), (context, []))[1].append(index)
+        groups = list(groups.values())
+
+        batch_deadline = max(deadline, OPENROUTER_BATCH_TIMEOUT)
+
+        async def run(function, argument, timeout):
+            async with semaphore:
+                try:
+                    # The HTTP timeout (or cancel) stops the worker thread; wait_for stops us waiting on it
+                    return await asyncio.wait_for(asyncio.to_thread(function, argument, timeout, cancel), timeout)
+                except asyncio.TimeoutError:
+                    return f"Error from OpenRouter: analysis timed out after {timeout:.0f}s"
+                except Exception as e:
+                    return f"Error analyzing incident: {str(e)}"
+
+        async def analyze(group):
+            return [(group, await run(self.analyze_incident, group[0], deadline))]
+
+        async def analyze_batch(members):
+            results = await run(self.analyze_batch, [context for context, _ in members], batch_deadline)
+            if isinstance(results, str):
+                results = [results] * len(members)
+            return list(zip(members, results))
+
+        tasks = set()
+        if batch:
+            uncached = []
+            for group in groups:
+                cached = ANALYSIS_CACHE.get(self.model, self._prompt(group[0]))
+                if cached is None:
+                    uncached.append(group)
+                else:
+                    for index in group[1]:
+                        yield index, cached
+            if len(uncached) >= OPENROUTER_BATCH_MIN_ALERTS:
+                for positions in plan_batches([context for context, _ in uncached]):
+                    members = [uncached[position] for position in positions]
+                    tasks.add(asyncio.ensure_future(
+                        analyze_batch(members) if len(members) > 1 else analyze(members[0])
+                    ))
+                groups = []
+            else:
+                groups = uncached
+        tasks.update(asyncio.ensure_future(analyze(group)) for group in groups)
+
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                if cancel is not None and cancel.is_set():
+                    return
+                for task in done:
+                    for group, result in task.result():
+                        if result is None:
+                            # The batch reply had nothing for this incident: ask again on its own
+                            tasks.add(asyncio.ensure_future(analyze(group)))
+                            continue
+                        for index in group[1]:
+                            yield index, result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def iter_analyses(self, incident_contexts, max_concurrency=None, deadline=None, batch=True, cancel=None):
+        """
+        Synchronous :meth:`analyze_incidents` for Streamlit: yields (index, recommendation) as each finishes.
+
+        The analyses run on an event loop in a background thread, so this
+        works whether or not the caller has a running loop. Their requests
+        are streamed, so closing the generator, or setting ``cancel``, closes
+        every one still open.
+        """
+        incident_contexts = list(incident_contexts)
+        cancel = cancel or Cancellation()
+        results = queue.Queue()
+        done = object()
+
+        async def produce():
+            async for item in self.analyze_incidents(incident_contexts, max_concurrency, deadline, batch, cancel):
+                results.put(item)
+
+        def run():
+            try:
+                asyncio.run(produce())
+            finally:
+                results.put(done)
+
+        threading.Thread(target=run, name="incident-analysis", daemon=True).start()
+        try:
+            while True:
+                item = results.get()
+                if item is done or cancel.is_set():
+                    return
+                yield item
+        finally:
+            cancel.cancel()
+
+    def stream_analyses(self, incident_contexts, max_concurrency=None, deadline=None, batch=False, cancel=None):
+        """
+        Stream many analyses at once so callers can render them as they are written.
+
+        Up to ``max_concurrency`` :meth:`stream_incident` streams run in the
+        background, one per distinct cache key. Updates that arrive together
+        are coalesced to the latest text per incident, so a slow consumer
+        only skips intermediate states. Callers that care more about the
+        round trips saved than about early text can ask for ``batch``: with
+        at least OPENROUTER_BATCH_MIN_ALERTS uncached incidents this hands
+        over to :meth:`iter_analyses`, and every result arrives complete.
+
+        Closing the generator, or setting ``cancel``, stops every open stream.
+
+        Yields:
+            (index, text, done) tuples, where ``text`` is the recommendation
+            so far for position ``index`` in ``incident_contexts``
+        """
+        incident_contexts = list(incident_contexts)
+        groups = {}
+        for index, context in enumerate(incident_contexts):
+            groups.setdefault(cache_key(self.model, self._prompt(context)), (context, []))[1].append(index)
+        groups = list(groups.values())
+        uncached = sum(ANALYSIS_CACHE.peek(self.model, self._prompt(context)) is None for context, _ in groups)
+        if batch and uncached >= OPENROUTER_BATCH_MIN_ALERTS:
+            results = self.iter_analyses(incident_contexts, max_concurrency, deadline, batch, cancel)
+            try:
+                for index, result in results:
+                    yield index, result, True
+            finally:
+                results.close()
+            return
+
+        max_concurrency = OPENROUTER_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        cancel = cancel or Cancellation()
+        updates = queue.Queue()
+        finished = object()
+
+        def consume(position):
+            context, _ = groups[position]
+            text = ""
+            for chunk in self.stream_incident(context, deadline=deadline, cancel=cancel):
+                text += chunk
+                updates.put((position, text.strip(), False))
+            updates.put((position, text.strip(), True))
+
+        async def produce():
+            semaphore = asyncio.Semaphore(max(1, min(max_concurrency, OPENROUTER_POOL_SIZE)))
+
+            async def stream(position):
+                async with semaphore:
+                    if not cancel.is_set():
+                        await asyncio.to_thread(consume, position)
+
+            await asyncio.gather(*(stream(position) for position in range(len(groups))))
+
+        def run():
+            try:
+                asyncio.run(produce())
+            finally:
+                updates.put(finished)
 
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["text"].strip()
-        else:
-            return f"Error from OpenRouter: {response.status_code} - {response.text}"
\ No newline at end of file
+        threading.Thread(target=run, name="incident-streams", daemon=True).start()
+        try:
+            done = False
+            while not done:
+                latest = {}
+                item = updates.get()
+                while True:
+                    if item is finished:
+                        done = True
+                        break
+                    latest[item[0]] = item
+                    try:
+                        item = updates.get_nowait()
+                    except queue.Empty:
+                        break
+                for position, text, complete in latest.values():
+                    for index in groups[position][1]:
+                        yield index, text, complete
+        finally:
+            cancel.cancel()
@@ -0,0 +1,129 @@
+"""Persistent LRU + TTL cache of AI incident analyses, backed by a local SQLite database."""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from src.utils.paths import data_path
+
+AI_ANALYSIS_CACHE_DB = os.environ.get("AI_ANALYSIS_CACHE_DB", data_path("ai_analysis_cache.db"))
+AI_ANALYSIS_CACHE_SIZE = int(os.environ.get("AI_ANALYSIS_CACHE_SIZE", "1000"))
+AI_ANALYSIS_CACHE_TTL = float(os.environ.get("AI_ANALYSIS_CACHE_TTL", str(24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_last_used ON analyses (last_used);
+"""
+
+# Volatile parts of alert text that shouldn't make two prompts different, in application order
+_VOLATILE = [
+    # ISO-8601 timestamps, e.g. 2025-05-01T12:00:00Z
+    (re.compile(r'\b\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?\b'), '<time>'),
+    # Epoch seconds or milliseconds
+    (re.compile(r'\b1\d{9}(?:\d{3})?(?:\.\d+)?\b'), '<time>'),
+    # Percentages, e.g. 85% or 92.5 %
+    (re.compile(r'\d+(?:\.\d+)?\s*%'), '<pct>'),
+    # Pod name suffixes: ReplicaSet and pod hashes from Kubernetes' vowel-free alphabet (-7d4b9c8f6d-x2x9k)
+    (re.compile(r'-[bcdfghjklmnpqrstvwxz2456789]{6,10}-[bcdfghjklmnpqrstvwxz2456789]{5}\b'), ''),
+    # ... and the mock alerts' pod ordinals (-pod-2)
+    (re.compile(r'-pod-\d+\b'), ''),
+]
+
+
+def normalize_prompt(prompt):
+    """Lowercase ``prompt``, replace timestamps and percentages with placeholders, drop pod suffixes and collapse whitespace."""
+    text = prompt.lower()
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return " ".join(text.split())
+
+
+def cache_key(model, prompt):
+    """Hash of the model and the normalised prompt."""
+    return hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}".encode()).hexdigest()
+
+
+class AnalysisCache:
+    """
+    On-disk cache of model responses keyed by :func:`cache_key`.
+
+    Entries expire ``ttl`` seconds after they were stored, and once there
+    are more than ``max_entries`` the least recently used are evicted, so
+    the database stays small and survives restarts.
+    """
+
+    def __init__(self, path=AI_ANALYSIS_CACHE_DB, max_entries=AI_ANALYSIS_CACHE_SIZE, ttl=AI_ANALYSIS_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "stores": 0}
+
+    def get(self, model, prompt):
+        """Return the cached response for ``(model, prompt)``, or None on a miss or expired entry."""
+        key = cache_key(model, prompt)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response, created_at FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                self._stats["expired"] += 1
+                row = None
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (now, key))
+            self._stats["hits"] += 1
+            return row[0]
+
+    def peek(self, model, prompt):
+        """Like :meth:`get`, but without counting the lookup or refreshing the entry's recency."""
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM analyses WHERE key = ?",
+                                     (cache_key(model, prompt),)).fetchone()
+        return row[0] if row is not None and time.time() - row[1] <= self.ttl else None
+
+    def put(self, model, prompt, response):
+        """Store ``response`` for ``(model, prompt)``, evicting the least recently used entries beyond ``max_entries``."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, model, response, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (cache_key(model, prompt), model, response, now, now),
+            )
+            evicted = self._conn.execute(
+                "DELETE FROM analyses WHERE key IN "
+                "(SELECT key FROM analyses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._stats["stores"] += 1
+            self._stats["evictions"] += max(evicted, 0)
+
+    def stats(self):
+        """Return hit/miss/eviction counters, the hit rate and the current entry count."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats, entries=entries, hit_rate=self._stats["hits"] / lookups if lookups else 0.0)
+
+    def clear(self):
+        """Drop every cached analysis."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analyses")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
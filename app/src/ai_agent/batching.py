@@ -0,0 +1,125 @@
+"""
+Batch prompts: several incidents analysed in one completion.
+
+:func:`plan_batches` packs incident contexts into batches that fit a token
+budget, :func:`batch_prompt` renders one batch as a numbered prompt that
+asks for a reply matching :data:`BATCH_RESPONSE_SCHEMA`, and
+:func:`parse_batch_response` splits the reply back into one recommendation
+per incident. Token counts are estimated from text length; the budget
+leaves headroom for that.
+"""
+import json
+import os
+import re
+
+OPENROUTER_BATCH_TOKEN_BUDGET = int(os.environ.get("OPENROUTER_BATCH_TOKEN_BUDGET", "6000"))
+OPENROUTER_BATCH_MAX_ALERTS = int(os.environ.get("OPENROUTER_BATCH_MAX_ALERTS", "20"))
+# Fewer uncached incidents than this are analysed one per request
+OPENROUTER_BATCH_MIN_ALERTS = int(os.environ.get("OPENROUTER_BATCH_MIN_ALERTS", "4"))
+
+# Completion tokens per recommendation, as for a single analysis, plus the JSON around it
+ANALYSIS_MAX_TOKENS = 150
+_ENTRY_OVERHEAD_TOKENS = 20
+
+BATCH_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analyses": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "recommendation": {"type": "string"},
+                },
+                "required": ["id", "recommendation"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["analyses"],
+    "additionalProperties": False,
+}
+
+_PREAMBLE = (
+    "Analyze each of the following incidents and suggest remediation.\n"
+    "Reply with only a JSON object matching this schema, with one entry per incident "
+    "and each entry's id set to the incident's number:\n"
+    f"{json.dumps(BATCH_RESPONSE_SCHEMA, separators=(',', ':'))}\n"
+)
+_THINKING = re.compile(r'<think>.*?(?:</think>|$)', re.S)
+_FENCE = re.compile(r'```(?:json)?\s*(.*?)```', re.S)
+
+
+def estimate_tokens(text):
+    """Rough token count for ``text``: about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def _incident(number, context):
+    return f"\nIncident {number}:\n{context}\n"
+
+
+def batch_max_tokens(count):
+    """Completion tokens to request for a batch of ``count`` incidents."""
+    return count * (ANALYSIS_MAX_TOKENS + _ENTRY_OVERHEAD_TOKENS) + _ENTRY_OVERHEAD_TOKENS
+
+
+def plan_batches(contexts, token_budget=OPENROUTER_BATCH_TOKEN_BUDGET, max_alerts=OPENROUTER_BATCH_MAX_ALERTS):
+    """
+    Split ``contexts`` into batches whose prompt plus requested completion fit ``token_budget``.
+
+    Order is kept. A context too large to share a batch still gets one of its own.
+
+    Returns:
+        List of lists of positions in ``contexts``
+    """
+    batches = []
+    current, used = [], estimate_tokens(_PREAMBLE) + _ENTRY_OVERHEAD_TOKENS
+    for position, context in enumerate(contexts):
+        cost = estimate_tokens(_incident(len(current) + 1, context)) + ANALYSIS_MAX_TOKENS + _ENTRY_OVERHEAD_TOKENS
+        if current and (used + cost > token_budget or len(current) >= max_alerts):
+            batches.append(current)
+            current, used = [], estimate_tokens(_PREAMBLE) + _ENTRY_OVERHEAD_TOKENS
+        current.append(position)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_prompt(contexts):
+    """Render ``contexts`` as one prompt, numbering the incidents from 1."""
+    return _PREAMBLE + "".join(_incident(number, context) for number, context in enumerate(contexts, 1))
+
+
+def parse_batch_response(text, count):
+    """
+    Split a batch reply into ``count`` recommendations.
+
+    Reasoning blocks and code fences around the JSON are ignored. Entries
+    that are missing, empty or numbered outside 1..count are None, as is
+    everything when the reply holds no parseable JSON.
+    """
+    text = _THINKING.sub("", text)
+    fenced = _FENCE.search(text)
+    if fenced is not None:
+        text = fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        reply = json.loads(text[start:end + 1]) if start != -1 else None
+    except ValueError:
+        reply = None
+    entries = reply.get("analyses") if isinstance(reply, dict) else None
+    recommendations = [None] * count
+    if not isinstance(entries, list):
+        return recommendations
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        number, recommendation = entry.get("id"), entry.get("recommendation")
+        if isinstance(number, str) and number.strip().isdigit():
+            number = int(number)
+        if isinstance(number, int) and 1 <= number <= count and isinstance(recommendation, str) and recommendation.strip():
+            recommendations[number - 1] = recommendation.strip()
+    return recommendations
@@ -0,0 +1,150 @@
+"""
+Process-wide provider for the OpenRouter API key held in AWS Secrets Manager.
+
+The secret is resolved once per process and shared by every agent and
+dashboard session. A daemon thread fetches it again shortly before each
+rotation interval ends, so a rotated key is picked up without any caller
+waiting on AWS; if a refresh fails the last good value is kept and the
+fetch is retried.
+
+Point ``SECRETS_MANAGER_ENDPOINT_URL`` at a local stand-in (see
+:mod:`tests.stubs.secrets_manager`) to run without AWS, or give
+:class:`SecretProvider` any fetch callable in tests.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import boto3
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_KEY_ROTATION_INTERVAL = float(os.environ.get("OPENROUTER_KEY_ROTATION_INTERVAL", "3600"))
+# How long before the end of each interval the background refresh runs
+OPENROUTER_KEY_REFRESH_MARGIN = float(os.environ.get("OPENROUTER_KEY_REFRESH_MARGIN", "300"))
+OPENROUTER_KEY_RETRY_INTERVAL = float(os.environ.get("OPENROUTER_KEY_RETRY_INTERVAL", "30"))
+SECRETS_MANAGER_ENDPOINT_URL = os.environ.get("SECRETS_MANAGER_ENDPOINT_URL")
+
+
+class SecretProvider:
+    """
+    Cache one secret and keep it fresh in the background.
+
+    Args:
+        fetch: Callable returning the current secret value
+        rotation_interval: Seconds after which the secret may have been rotated
+        refresh_margin: Seconds before the end of the interval to refresh
+        retry_interval: Seconds between attempts after a failed refresh
+    """
+
+    def __init__(self, fetch, rotation_interval=OPENROUTER_KEY_ROTATION_INTERVAL,
+                 refresh_margin=OPENROUTER_KEY_REFRESH_MARGIN, retry_interval=OPENROUTER_KEY_RETRY_INTERVAL):
+        self.fetch = fetch
+        self.rotation_interval = rotation_interval
+        self.refresh_margin = min(refresh_margin, rotation_interval / 2)
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._resolve_lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"fetches": 0, "errors": 0, "reads": 0}
+
+    def get(self):
+        """
+        Return the secret, fetching it on first use and starting the background refresh.
+
+        Raises:
+            Exception: whatever ``fetch`` raised, if the secret has never been resolved
+        """
+        with self._lock:
+            self._stats["reads"] += 1
+            if self._value is not None:
+                return self._value
+        # Callers racing on first use wait for one fetch rather than each making their own
+        with self._resolve_lock:
+            if self._value is None:
+                self.refresh()
+                self.start()
+        return self._value
+
+    def refresh(self):
+        """Fetch the secret now (e.g. after the API rejected the cached key) and return it."""
+        try:
+            value = self.fetch()
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        with self._lock:
+            self._value = value
+            self._fetched_at = time.time()
+            self._stats["fetches"] += 1
+        return value
+
+    def _run(self):
+        while True:
+            with self._lock:
+                due = self._fetched_at + self.rotation_interval - self.refresh_margin
+            if self._stop.wait(max(due - time.time(), 0)):
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Error refreshing secret, keeping the last good value: %s", e)
+                if self._stop.wait(self.retry_interval):
+                    return
+
+    def start(self):
+        """Start the background refresh on a daemon thread, once."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="secret-refresh", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        """Return fetch, error and read counters and the age of the cached value in seconds."""
+        with self._lock:
+            age = None if self._fetched_at is None else time.time() - self._fetched_at
+            return dict(self._stats, age=age)
+
+
+def secretsmanager_fetcher(secret_arn, region=None, endpoint_url=None):
+    """
+    Return a callable reading ``secret_arn`` from Secrets Manager with one long-lived client.
+
+    JSON secrets are decoded, as the agent always did.
+    """
+    region = region or os.environ.get("AWS_DEFAULT_REGION", "us-west-2")
+    endpoint_url = endpoint_url or SECRETS_MANAGER_ENDPOINT_URL
+    client = boto3.session.Session(region_name=region).client(service_name='secretsmanager', endpoint_url=endpoint_url)
+
+    def fetch():
+        secret = client.get_secret_value(SecretId=secret_arn)['SecretString']
+        return json.loads(secret) if secret.startswith('{') else secret
+    return fetch
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_openrouter_key_provider(secret_arn=None, region=None):
+    """Return the process-wide provider for the OpenRouter key secret (default: ``OPENROUTER_API_KEY_SECRET_ARN``)."""
+    secret_arn = secret_arn or os.environ.get("OPENROUTER_API_KEY_SECRET_ARN")
+    region = region or os.environ.get("AWS_DEFAULT_REGION", "us-west-2")
+    key = (secret_arn, region)
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = SecretProvider(secretsmanager_fetcher(secret_arn, region))
+        return _providers[key]
@@ -0,0 +1,99 @@
+"""
+Server-sent events from OpenRouter's streaming completions.
+
+With ``"stream": true`` the completion arrives as ``data: {json}`` events,
+one per generated chunk, ending with ``data: [DONE]``. OpenRouter also sends
+``: OPENROUTER PROCESSING`` comments while the request is queued, and
+reports failures after the stream has started as an event with an
+``error`` field.
+"""
+import contextlib
+import json
+import threading
+
+
+class StreamError(RuntimeError):
+    """Raised when the provider reports an error in the middle of a stream."""
+
+
+class Cancellation:
+    """
+    Stop signal shared by a set of streams.
+
+    :meth:`cancel` may be called from any thread; it also closes every
+    response registered with :meth:`closing`, so a stream blocked waiting
+    for the next chunk stops at once and the provider sees the connection
+    drop and stops generating.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._responses = set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            responses, self._responses = self._responses, set()
+        for response in responses:
+            response.close()
+
+    @contextlib.contextmanager
+    def closing(self, response):
+        """Close ``response`` on exit, or as soon as the streams are cancelled."""
+        with self._lock:
+            self._responses.add(response)
+        try:
+            if self.is_set():
+                response.close()
+            yield response
+        finally:
+            with self._lock:
+                self._responses.discard(response)
+            response.close()
+
+
+def iter_sse(lines):
+    """Yield the data of each event in an iterable of decoded SSE lines, skipping comments and other fields."""
+    data = []
+    for line in lines:
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+def completion_chunks(response):
+    """
+    Yield the text chunks of a streaming completion ``response`` as they arrive.
+
+    Raises:
+        StreamError: if an event carries an error
+    """
+    if response.encoding is None:
+        response.encoding = "utf-8"
+    for data in iter_sse(response.iter_lines(decode_unicode=True)):
+        if data == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        if "error" in event:
+            error = event["error"]
+            raise StreamError(error.get("message", str(error)) if isinstance(error, dict) else str(error))
+        for choice in event.get("choices", ()):
+            text = choice.get("text") or (choice.get("delta") or {}).get("content")
+            if text:
+                yield text
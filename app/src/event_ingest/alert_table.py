@@ -0,0 +1,213 @@
+"""Per-process alert table keyed by label fingerprint, with cursor-based deltas."""
+import bisect
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+
+def alert_fingerprint(labels):
+    """
+    Compute a stable fingerprint for an alert from its label set.
+
+    Label order does not matter, so the same alert fetched twice (or pushed
+    by Alertmanager and polled from Prometheus) maps to the same key.
+    """
+    digest = hashlib.sha1()
+    for key in sorted(labels):
+        digest.update(key.encode())
+        digest.update(b"\xff")
+        digest.update(str(labels[key]).encode())
+        digest.update(b"\xfe")
+    return digest.hexdigest()[:16]
+
+
+def _content_key(alert):
+    """Cheap comparison key for detecting changes to an already known alert."""
+    annotations = alert.get("annotations") or {}
+    return (
+        alert.get("state"),
+        alert.get("activeAt"),
+        alert.get("value"),
+        tuple(sorted(annotations.items())),
+    )
+
+
+class AlertTable:
+    """
+    Thread-safe table of currently firing alerts.
+
+    Every insert, change and resolution bumps a monotonically increasing
+    revision and is appended to a bounded change log, so a consumer holding a
+    cursor can ask for just what happened since it last looked instead of
+    re-processing the whole firing set.
+
+    Each alert remembers the source that last reported it, so reconciling one
+    source's complete firing set never resolves alerts another source owns
+    (e.g. a Prometheus poll leaves webhook-pushed alerts alone).
+    """
+
+    def __init__(self, max_log=50000):
+        self._lock = threading.Lock()
+        self._max_log = max_log
+        self._revision = 0
+        self._alerts = {}      # fingerprint -> alert dict
+        self._keys = {}        # fingerprint -> content key
+        self._created = {}     # fingerprint -> revision the alert appeared at
+        self._sources = {}     # fingerprint -> source that last reported the alert
+        self._resolved = {}    # fingerprint -> last known alert, marked resolved
+        self._log_revs = []    # revisions, ascending
+        self._log_fps = []     # fingerprint changed at the matching revision
+        self._log_floor = 0    # oldest revision a cursor can still resume from
+        self._listeners = []
+        self.last_sync = None
+
+    @property
+    def cursor(self):
+        """The current revision of the table."""
+        return self._revision
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def subscribe(self, listener):
+        """
+        Register a callable notified of state transitions.
+
+        The listener is called outside the table lock with a list of
+        ``(kind, alert)`` tuples, where kind is ``added``, ``state`` (the
+        alert's state changed, e.g. pending -> firing) or ``resolved``.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, transitions):
+        if not transitions:
+            return
+        for listener in self._listeners:
+            try:
+                listener(transitions)
+            except Exception as e:
+                print(f"Alert table listener failed: {e}")
+
+    def _record(self, fingerprint):
+        self._revision += 1
+        self._log_revs.append(self._revision)
+        self._log_fps.append(fingerprint)
+        overflow = len(self._log_revs) - self._max_log
+        if overflow > 0:
+            self._log_floor = self._log_revs[overflow - 1]
+            del self._log_revs[:overflow]
+            del self._log_fps[:overflow]
+
+    def _upsert(self, alert, transitions, source):
+        labels = alert.get("labels", {})
+        fingerprint = alert_fingerprint(labels)
+        self._sources[fingerprint] = source
+        key = _content_key(alert)
+        previous = self._keys.get(fingerprint)
+        if previous == key:
+            return fingerprint
+        alert = dict(alert, fingerprint=fingerprint)
+        if previous is None:
+            self._resolved.pop(fingerprint, None)
+            self._record(fingerprint)
+            self._created[fingerprint] = self._revision
+            transitions.append(("added", alert))
+        else:
+            self._record(fingerprint)
+            if previous[0] != key[0]:
+                transitions.append(("state", alert))
+        self._alerts[fingerprint] = alert
+        self._keys[fingerprint] = key
+        return fingerprint
+
+    def _resolve(self, fingerprint, transitions, resolved_at=None):
+        alert = self._alerts.pop(fingerprint, None)
+        if alert is None:
+            return
+        del self._keys[fingerprint]
+        del self._created[fingerprint]
+        del self._sources[fingerprint]
+        resolved_at = resolved_at or datetime.now(timezone.utc).isoformat()
+        self._resolved[fingerprint] = dict(alert, state="resolved", resolvedAt=resolved_at)
+        if len(self._resolved) > self._max_log:
+            # Oldest tombstones are older than anything left in the change log
+            del self._resolved[next(iter(self._resolved))]
+        self._record(fingerprint)
+        transitions.append(("resolved", self._resolved[fingerprint]))
+
+    def replace(self, alerts, source="poll"):
+        """
+        Reconcile the table against a complete firing set (e.g. a Prometheus poll).
+
+        Alerts last reported by ``source`` but missing from ``alerts`` are
+        marked resolved; alerts owned by other sources are left untouched.
+
+        Returns:
+            The new cursor
+        """
+        transitions = []
+        with self._lock:
+            seen = {self._upsert(alert, transitions, source) for alert in alerts}
+            for fingerprint in [fp for fp, owner in self._sources.items() if owner == source and fp not in seen]:
+                self._resolve(fingerprint, transitions)
+            self.last_sync = datetime.now(timezone.utc)
+            revision = self._revision
+        self._notify(transitions)
+        return revision
+
+    def update(self, alerts, source="push"):
+        """
+        Apply a partial batch (e.g. an Alertmanager notification) from ``source``.
+
+        Alerts whose ``status`` or ``state`` is ``resolved`` are resolved,
+        everything else is inserted or updated. Alerts not in the batch are
+        left untouched.
+
+        Returns:
+            The new cursor
+        """
+        transitions = []
+        with self._lock:
+            for alert in alerts:
+                if (alert.get("status") or alert.get("state")) == "resolved":
+                    fingerprint = alert_fingerprint(alert.get("labels", {}))
+                    self._resolve(fingerprint, transitions, alert.get("endsAt"))
+                else:
+                    self._upsert(alert, transitions, source)
+            revision = self._revision
+        self._notify(transitions)
+        return revision
+
+    def snapshot(self):
+        """Return a list of all currently firing alerts."""
+        with self._lock:
+            return list(self._alerts.values())
+
+    def delta(self, cursor=0):
+        """
+        Return everything that changed after ``cursor``.
+
+        Args:
+            cursor: Revision returned by a previous call (0 for a full sync)
+
+        Returns:
+            Dictionary with ``cursor`` (pass it back next time), ``reset``
+            (True when the consumer must drop its view, e.g. its cursor fell
+            off the change log), and ``added``, ``changed`` and ``resolved``
+            alert lists
+        """
+        with self._lock:
+            delta = {"cursor": self._revision, "reset": False, "added": [], "changed": [], "resolved": []}
+            if cursor <= 0 or cursor < self._log_floor or cursor > self._revision:
+                delta["reset"] = True
+                delta["added"] = list(self._alerts.values())
+                return delta
+
+            start = bisect.bisect_right(self._log_revs, cursor)
+            for fingerprint in dict.fromkeys(self._log_fps[start:]):
+                if fingerprint in self._alerts:
+                    kind = "added" if self._created[fingerprint] > cursor else "changed"
+                    delta[kind].append(self._alerts[fingerprint])
+                elif fingerprint in self._resolved:
+                    delta["resolved"].append(self._resolved[fingerprint])
+            return delta
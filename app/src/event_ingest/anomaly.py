@@ -0,0 +1,270 @@
+"""
+Streaming anomaly detection over the live per-service metrics.
+
+Each poller tick updates, for every (service, metric) at once with numpy:
+
+- an EWMA mean and variance,
+- a streaming median and MAD (frugal stochastic-approximation estimates),
+- a seasonal EWMA mean and variance per time-of-day slot.
+
+All state is a fixed number of floats per series, so a tick costs O(1) per
+sample. A sample is anomalous once the series is warm, its robust
+(median/MAD) z-score exceeds the threshold and the EWMA or the seasonal
+baseline agrees; an alert fires after ``persistence`` anomalous samples in
+a row, which filters the one-tick outliers the estimators' own noise
+produces. Only upward deviations are flagged: rising latency and load are
+what degrade a service.
+
+Anomalies are reported as alerts shaped like ``fetch_alerts`` entries, with
+``source="anomaly-detector"`` so they can be told apart from Prometheus rules.
+They are advisory: auto-remediation skips them.
+"""
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+ANOMALY_Z_THRESHOLD = float(os.environ.get("ANOMALY_Z_THRESHOLD", "4"))
+ANOMALY_MAX_SERVICES = int(os.environ.get("ANOMALY_MAX_SERVICES", "10000"))
+
+# Alert name per metric
+ANOMALY_ALERT_NAMES = {"response_time": "HighLatency", "load": "HighLoad"}
+_UNITS = {"response_time": " ms", "load": "%"}
+# 1.4826 * MAD estimates the standard deviation of normally distributed data
+_MAD_SCALE = 1.4826
+
+
+class AnomalyDetector:
+    """
+    Vectorised per-series anomaly detector.
+
+    Args:
+        metrics: Metric names to watch
+        alpha: EWMA smoothing factor
+        median_rate: Step size of the streaming median/MAD, relative to the current MAD
+        threshold: z-score above which a sample is anomalous
+        warmup: Samples a series needs before it can alert
+        persistence: Consecutive anomalous samples needed to fire
+        season_period: Length of the seasonal cycle in seconds
+        season_slots: Number of slots per cycle (24 = hourly for a daily cycle)
+        season_alpha: EWMA smoothing factor of each seasonal slot
+        namespace_of: Optional callable mapping a service to its namespace
+        max_events: Number of past anomalous samples kept for charts
+        max_services: Number of services tracked; the least recently observed
+            one is dropped, with its alerts, to make room for a new one
+    """
+
+    def __init__(self, metrics=("response_time", "load"), alpha=0.1, median_rate=0.05,
+                 threshold=ANOMALY_Z_THRESHOLD, warmup=20, persistence=2, season_period=86400.0, season_slots=24,
+                 season_alpha=0.2, namespace_of=None, max_events=1000, max_services=ANOMALY_MAX_SERVICES):
+        self.metrics = tuple(metrics)
+        self.alpha = alpha
+        self.median_rate = median_rate
+        self.threshold = threshold
+        self.warmup = warmup
+        self.persistence = persistence
+        self.season_period = season_period
+        self.season_slots = season_slots
+        self.season_alpha = season_alpha
+        self.namespace_of = namespace_of
+        self.max_services = max_services
+        self._lock = threading.Lock()
+        self._rows = {}        # service -> state row, least recently observed first
+        self._used = 0
+        self._allocate(64)
+        self._active = {}
+        self.events = deque(maxlen=max_events)
+
+    def _allocate(self, capacity):
+        shape = (capacity, len(self.metrics))
+        old = getattr(self, "_state", None)
+        state = {
+            "count": np.zeros(shape, dtype=np.int64),
+            "streak": np.zeros(shape, dtype=np.int64),
+            "mean": np.zeros(shape),
+            "var": np.zeros(shape),
+            "median": np.zeros(shape),
+            "mad": np.zeros(shape),
+            "season_count": np.zeros(shape + (self.season_slots,), dtype=np.int64),
+            "season_mean": np.zeros(shape + (self.season_slots,)),
+            "season_var": np.zeros(shape + (self.season_slots,)),
+        }
+        if old is not None:
+            for key, array in old.items():
+                state[key][:len(array)] = array
+        self._state = state
+        self._capacity = capacity
+
+    def _row_indices(self, services):
+        current = set(services)
+        rows = []
+        for service in services:
+            row = self._rows.pop(service, None)
+            if row is None:
+                row = self._new_row(current)
+            self._rows[service] = row
+            rows.append(row)
+        return np.asarray(rows, dtype=np.intp)
+
+    def _new_row(self, current):
+        oldest = next(iter(self._rows), None)
+        if len(self._rows) >= self.max_services and oldest not in current:
+            # Reuse the row of the service that has gone longest without a sample
+            row = self._rows.pop(oldest)
+            for array in self._state.values():
+                array[row] = 0
+            for key in [key for key in self._active if key[0] == oldest]:
+                del self._active[key]
+            return row
+        row = self._used
+        self._used += 1
+        if row >= self._capacity:
+            self._allocate(self._capacity * 2)
+        return row
+
+    def observe(self, timestamp, samples):
+        """
+        Score and absorb one tick.
+
+        Args:
+            timestamp: Epoch seconds of the tick
+            samples: {service: {metric: value}}, as the metrics poller delivers
+
+        Returns:
+            List of alerts that started firing on this tick
+        """
+        services = list(samples)
+        values = np.array(
+            [[float(samples[service].get(metric, np.nan)) for metric in self.metrics] for service in services],
+            dtype=float,
+        ).reshape(len(services), len(self.metrics))
+        with self._lock:
+            rows = self._row_indices(services)
+            scores, anomalous = self._update(rows, values, timestamp)
+            return self._publish(timestamp, services, values, scores, anomalous)
+
+    def _update(self, rows, x, timestamp):
+        s = self._state
+        slot = int(timestamp % self.season_period // (self.season_period / self.season_slots))
+        count, mean, var = s["count"][rows], s["mean"][rows], s["var"][rows]
+        median, mad = s["median"][rows], s["mad"][rows]
+        s_count = s["season_count"][rows, :, slot]
+        s_mean, s_var = s["season_mean"][rows, :, slot], s["season_var"][rows, :, slot]
+
+        valid = ~np.isnan(x)
+        x0 = np.where(valid, x, 0.0)
+        # Floors keep flat series from producing huge z-scores on tiny changes
+        floor = 1e-6 + 0.01 * np.abs(median)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            robust_z = (x0 - median) / np.maximum(_MAD_SCALE * mad, floor)
+            ewma_z = (x0 - mean) / np.maximum(np.sqrt(var), floor)
+            season_z = (x0 - s_mean) / np.maximum(np.sqrt(s_var), floor)
+
+        confirmed = (ewma_z >= self.threshold) | ((s_count >= 3) & (season_z >= self.threshold))
+        anomalous = valid & (count >= self.warmup) & (robust_z >= self.threshold) & confirmed
+
+        # Absorb the sample; the first sample of a series seeds its estimators.
+        # Once warm, deviations are clipped at the threshold so an outlier
+        # can't inflate the spread enough to hide the samples that follow it.
+        first = valid & (count == 0)
+        warm = count >= self.warmup
+        a = self.alpha
+        limit = self.threshold * np.maximum(np.sqrt(var), floor)
+        delta = np.where(warm, np.clip(x0 - mean, -limit, limit), x0 - mean)
+        new_mean = np.where(first, x0, mean + a * delta)
+        new_var = np.where(first, 0.0, (1 - a) * (var + a * delta * delta))
+        step = self.median_rate * np.maximum(mad, floor)
+        new_median = np.where(first, x0, median + step * np.sign(x0 - median))
+        new_mad = np.where(first, 0.0, mad + step * np.sign(np.abs(x0 - median) - mad))
+        # The stochastic MAD converges slowly from zero; seed it from the EWMA spread while warming up
+        new_mad = np.where(count < self.warmup, np.sqrt(new_var) / _MAD_SCALE, new_mad)
+        s_first = valid & (s_count == 0)
+        s_limit = self.threshold * np.maximum(np.sqrt(s_var), floor)
+        s_delta = np.where(s_count >= 3, np.clip(x0 - s_mean, -s_limit, s_limit), x0 - s_mean)
+        sa = self.season_alpha
+        new_s_mean = np.where(s_first, x0, s_mean + sa * s_delta)
+        new_s_var = np.where(s_first, 0.0, (1 - sa) * (s_var + sa * s_delta * s_delta))
+
+        streak = np.where(anomalous, s["streak"][rows] + 1, 0)
+        s["streak"][rows] = streak
+        s["count"][rows] = count + valid
+        s["mean"][rows] = np.where(valid, new_mean, mean)
+        s["var"][rows] = np.where(valid, new_var, var)
+        s["median"][rows] = np.where(valid, new_median, median)
+        s["mad"][rows] = np.where(valid, np.maximum(new_mad, 0.0), mad)
+        s["season_count"][rows, :, slot] = s_count + valid
+        s["season_mean"][rows, :, slot] = np.where(valid, new_s_mean, s_mean)
+        s["season_var"][rows, :, slot] = np.where(valid, new_s_var, s_var)
+        return robust_z, streak >= self.persistence
+
+    def _alert(self, timestamp, service, metric, value, score):
+        severity = "warning" if score >= 2 * self.threshold else "info"
+        unit = _UNITS.get(metric, "")
+        label = metric.replace("_", " ")
+        namespace = (self.namespace_of(service) if self.namespace_of else None) or "default"
+        return {
+            "labels": {
+                "alertname": ANOMALY_ALERT_NAMES.get(metric, f"{metric}_anomaly"),
+                "severity": severity,
+                "deployment": service,
+                "namespace": namespace,
+                "instance": service,
+                "source": "anomaly-detector",
+            },
+            "annotations": {
+                "summary": f"Anomalous {label} on {service}",
+                "description": (
+                    f"{label.capitalize()} of {service} is {value:.1f}{unit}, "
+                    f"{score:.1f} robust standard deviations above its recent median."
+                ),
+            },
+            "state": "firing",
+            "activeAt": datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z"),
+            "value": f"{value:.1f}{unit}",
+        }
+
+    def _publish(self, timestamp, services, values, scores, anomalous):
+        started = []
+        firing = set()
+        for i, j in zip(*np.nonzero(anomalous)):
+            service, metric = services[i], self.metrics[j]
+            value, score = float(values[i, j]), float(scores[i, j])
+            key = (service, metric)
+            firing.add(key)
+            self.events.append({"timestamp": timestamp, "service": service, "metric": metric,
+                                "value": value, "score": score})
+            alert = self._active.get(key)
+            if alert is None:
+                alert = self._active[key] = self._alert(timestamp, service, metric, value, score)
+                started.append(alert)
+            else:
+                alert["value"] = f"{value:.1f}{_UNITS.get(metric, '')}"
+        observed = set(services)
+        for key in list(self._active):
+            if key[0] in observed and key not in firing:
+                del self._active[key]
+        return started
+
+    def active_alerts(self):
+        """Return the anomaly alerts currently firing."""
+        with self._lock:
+            return [dict(alert) for alert in self._active.values()]
+
+    def recent_events(self, service=None, metric=None):
+        """Return recent anomalous samples, optionally for one service and metric."""
+        with self._lock:
+            return [
+                event for event in self.events
+                if (service is None or event["service"] == service) and (metric is None or event["metric"] == metric)
+            ]
+
+    def baseline(self, service, metric):
+        """Return the current EWMA mean and standard deviation of one series, or None."""
+        with self._lock:
+            row = self._rows.get(service)
+            if row is None:
+                return None
+            j = self.metrics.index(metric)
+            return float(self._state["mean"][row, j]), float(np.sqrt(self._state["var"][row, j]))
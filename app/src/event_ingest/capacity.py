@@ -0,0 +1,91 @@
+"""
+Alerts for resources forecast to run out of capacity.
+
+Turns the rows of ``metrics.get_capacity_forecasts`` that cross their
+threshold within ``CAPACITY_FORECAST_HORIZON`` seconds into alerts shaped
+like ``fetch_alerts`` entries. Alert names match the real exhaustion
+alerts, and ``source="capacity-forecast"`` marks them so auto-remediation
+reports them instead of acting as if the resource had already run out.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+CAPACITY_FORECAST_HORIZON = float(os.environ.get("CAPACITY_FORECAST_HORIZON", str(2 * 86400)))
+# Forecasts this close to exhaustion are raised as critical
+CAPACITY_CRITICAL_WITHIN = float(os.environ.get("CAPACITY_CRITICAL_WITHIN", str(6 * 3600)))
+
+CAPACITY_ALERT_NAMES = {"disk": "DiskPressure", "memory": "MemoryLeak", "replicas": "InsufficientResources"}
+_DESCRIPTIONS = {
+    "disk": "Volume {name} is {utilization:.0%} full and is forecast to reach its threshold in {eta}.",
+    "memory": "Container {name} uses {utilization:.0%} of its memory limit and is forecast to reach its threshold in {eta}.",
+    "replicas": "Autoscaler {name} runs {current:.0f} of {limit:.0f} maximum replicas and is forecast to max out in {eta}.",
+}
+
+# When each forecast alert was first raised, so activeAt stays stable across refreshes
+_first_seen = {}
+_first_seen_lock = threading.Lock()
+
+
+def format_duration(seconds):
+    """Format seconds as a short human-readable duration, e.g. ``"3.5 hours"`` or ``"8 days"``."""
+    if not np.isfinite(seconds):
+        return "never"
+    if seconds < 3600:
+        return f"{max(seconds, 0) / 60:.0f} minutes"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f} hours"
+    return f"{seconds / 86400:.0f} days"
+
+
+def capacity_alerts(forecasts, horizon=None, now=None):
+    """
+    Build alerts for forecast rows that reach their threshold within ``horizon`` seconds.
+
+    Args:
+        forecasts: DataFrame from ``get_capacity_forecasts``
+        horizon: Look-ahead in seconds (default: CAPACITY_FORECAST_HORIZON)
+        now: Epoch seconds the forecast is relative to (default: now)
+
+    Returns:
+        List of alerts in the ``fetch_alerts`` shape
+    """
+    horizon = CAPACITY_FORECAST_HORIZON if horizon is None else horizon
+    now = datetime.now(timezone.utc) if now is None else datetime.fromtimestamp(now, timezone.utc)
+    due = forecasts[forecasts["seconds_to_threshold"] <= horizon]
+
+    alerts = []
+    seen = {}
+    for row in due.itertuples(index=False):
+        eta = format_duration(row.seconds_to_threshold)
+        labels = {
+            "alertname": CAPACITY_ALERT_NAMES[row.resource],
+            "severity": "critical" if row.seconds_to_threshold <= CAPACITY_CRITICAL_WITHIN else "warning",
+            "namespace": row.namespace,
+            "instance": row.name,
+            "source": "capacity-forecast",
+        }
+        if row.deployment:
+            labels["deployment"] = row.deployment
+        key = (labels["alertname"], row.namespace, row.name)
+        with _first_seen_lock:
+            seen[key] = _first_seen.get(key, now)
+        alerts.append({
+            "labels": labels,
+            "annotations": {
+                "summary": f"{row.resource.capitalize()} capacity of {row.name} forecast to run out in {eta}",
+                "description": _DESCRIPTIONS[row.resource].format(
+                    name=row.name, utilization=row.utilization, current=row.current, limit=row.limit, eta=eta
+                ),
+            },
+            "state": "firing",
+            "activeAt": seen[key].isoformat().replace("+00:00", "Z"),
+            "value": f"{row.utilization * 100:.0f}%",
+        })
+
+    with _first_seen_lock:
+        _first_seen.clear()
+        _first_seen.update(seen)
+    return alerts
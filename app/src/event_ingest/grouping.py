@@ -0,0 +1,68 @@
+"""Alertmanager-style grouping of alerts by label keys within a time window."""
+import os
+import time
+
+from src.utils.timestamps import to_epoch
+
+ALERT_GROUP_BY = tuple(
+    key.strip() for key in os.environ.get("ALERT_GROUP_BY", "alertname,deployment,namespace").split(",") if key.strip()
+)
+ALERT_GROUP_WINDOW = float(os.environ.get("ALERT_GROUP_WINDOW", "300"))
+
+SEVERITY_RANK = {"critical": 0, "warning": 1, "info": 2}
+
+
+def _severity_rank(alert):
+    return SEVERITY_RANK.get(alert.get("labels", {}).get("severity", "").lower(), len(SEVERITY_RANK))
+
+
+def group_alerts(alerts, group_by=None, window=None):
+    """
+    Collapse alerts that share the ``group_by`` label values into groups.
+
+    Like Alertmanager's ``group_by``, every alert whose values for the
+    grouping keys match lands in the same group. Additionally, an alert that
+    became active more than ``window`` seconds after the first alert of its
+    group starts a new group, so an unrelated recurrence hours later is
+    analysed on its own.
+
+    Args:
+        alerts: Alerts in the ``fetch_alerts`` shape
+        group_by: Label keys to group on (default: ALERT_GROUP_BY)
+        window: Grouping window in seconds, 0 to disable (default: ALERT_GROUP_WINDOW)
+
+    Returns:
+        List of group dictionaries, most severe and largest first, with keys
+        ``labels`` (the grouping label values), ``alerts``, ``count``,
+        ``severity`` (worst in the group) and ``alert`` (the representative
+        alert to analyse and remediate: the earliest of the most severe)
+    """
+    group_by = ALERT_GROUP_BY if group_by is None else tuple(group_by)
+    window = ALERT_GROUP_WINDOW if window is None else window
+    now = time.time()
+
+    by_key = {}
+    for alert in alerts:
+        labels = alert.get("labels", {})
+        key = tuple(labels.get(name, "") for name in group_by)
+        by_key.setdefault(key, []).append((to_epoch(alert.get("activeAt"), now), alert))
+
+    groups = []
+    for key, members in by_key.items():
+        members.sort(key=lambda member: member[0])
+        current = None
+        for active_at, alert in members:
+            if current is None or (window and active_at - current["_start"] > window):
+                current = {"labels": dict(zip(group_by, key)), "alerts": [], "_start": active_at}
+                groups.append(current)
+            current["alerts"].append(alert)
+
+    for group in groups:
+        del group["_start"]
+        group["count"] = len(group["alerts"])
+        # min() keeps the first (earliest) alert among equally severe ones
+        group["alert"] = min(group["alerts"], key=_severity_rank)
+        group["severity"] = group["alert"].get("labels", {}).get("severity", "unknown")
+
+    groups.sort(key=lambda group: (_severity_rank(group["alert"]), -group["count"]))
+    return groups
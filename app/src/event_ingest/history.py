@@ -0,0 +1,241 @@
+"""Persistent alert history backed by a local SQLite database."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.utils.paths import data_path
+from src.utils.timestamps import to_epoch
+
+ALERT_HISTORY_DB = os.environ.get("ALERT_HISTORY_DB", data_path("alert_history.db"))
+SECONDS_PER_DAY = 86400
+# Columns of events_frame; everything after ``time`` is categorical
+EVENT_COLUMNS = ["time", "fingerprint", "state", "alertname", "severity", "namespace", "deployment"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    state TEXT NOT NULL,
+    alertname TEXT,
+    severity TEXT,
+    namespace TEXT,
+    deployment TEXT,
+    alert TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alert_events_ts ON alert_events (ts);
+CREATE INDEX IF NOT EXISTS idx_alert_events_day_severity ON alert_events (day, severity);
+CREATE INDEX IF NOT EXISTS idx_alert_events_fingerprint ON alert_events (fingerprint, ts);
+CREATE TABLE IF NOT EXISTS alert_daily_counts (
+    day INTEGER NOT NULL,
+    severity TEXT NOT NULL,
+    state TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, severity, state)
+) WITHOUT ROWID;
+"""
+
+
+def _event_time(kind, alert):
+    """Pick the timestamp a transition happened at."""
+    now = time.time()
+    if kind == "resolved":
+        return to_epoch(alert.get("resolvedAt") or alert.get("endsAt"), now)
+    if kind == "added":
+        return to_epoch(alert.get("activeAt"), now)
+    return now
+
+
+class AlertHistoryStore:
+    """
+    Append-only log of alert state transitions, partitioned by UTC day.
+
+    Every row carries its ``day`` so range reads hit the ``ts`` or
+    ``(day, severity)`` indexes, and per-day/severity/state counts are
+    maintained on write in ``alert_daily_counts`` so trend histograms never
+    scan the event table.
+    """
+
+    def __init__(self, path=ALERT_HISTORY_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def record_transitions(self, transitions):
+        """
+        Append a batch of ``(kind, alert)`` transitions.
+
+        ``kind`` is ``added``, ``state`` or ``resolved`` as emitted by
+        :meth:`AlertTable.subscribe`. The recorded state is the alert's own
+        ``state`` (``firing``, ``pending`` or ``resolved``).
+        """
+        rows = []
+        counts = Counter()
+        for kind, alert in transitions:
+            if alert.get("source") == "mock":
+                # Placeholder alerts shown while Prometheus is unreachable never happened
+                continue
+            labels = alert.get("labels", {})
+            ts = _event_time(kind, alert)
+            day = int(ts // SECONDS_PER_DAY)
+            state = "resolved" if kind == "resolved" else alert.get("state", "firing")
+            severity = labels.get("severity", "info").lower()
+            rows.append((
+                ts, day, alert.get("fingerprint", ""), state,
+                labels.get("alertname"), severity,
+                labels.get("namespace"), labels.get("deployment"),
+                json.dumps(alert),
+            ))
+            counts[(day, severity, state)] += 1
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO alert_events (ts, day, fingerprint, state, alertname, severity, namespace, deployment, alert) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                "INSERT INTO alert_daily_counts (day, severity, state, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (day, severity, state) DO UPDATE SET count = count + excluded.count",
+                [(day, severity, state, n) for (day, severity, state), n in counts.items()],
+            )
+
+    def query(self, start, end=None, states=("firing",)):
+        """
+        Return recorded alerts with a transition in ``[start, end)``.
+
+        Args:
+            start: Range start as epoch seconds
+            end: Range end as epoch seconds (default: now)
+            states: Recorded states to include
+
+        Returns:
+            List of alert dictionaries, oldest first
+        """
+        end = time.time() if end is None else end
+        placeholders = ",".join("?" * len(states))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT alert FROM alert_events WHERE ts >= ? AND ts < ? AND state IN ({placeholders}) ORDER BY ts",
+                (start, end, *states),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def severity_events(self, start, end=None, state="firing"):
+        """
+        Return the timestamps and severities of transitions into ``state`` in ``[start, end)``.
+
+        Returns:
+            Tuple of (epoch seconds float64 array, severity object array)
+        """
+        end = time.time() if end is None else end
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, severity FROM alert_events WHERE ts >= ? AND ts < ? AND state = ?",
+                (start, end, state),
+            ).fetchall()
+        if not rows:
+            return np.zeros(0), np.zeros(0, dtype=object)
+        timestamps, severities = zip(*rows)
+        return np.fromiter(timestamps, dtype=float, count=len(rows)), np.array(severities, dtype=object)
+
+    def _read_events(self, start, end):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, fingerprint, state, alertname, severity, namespace, deployment "
+                "FROM alert_events WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (start, end),
+            ).fetchall()
+        columns = list(zip(*rows)) if rows else [()] * len(EVENT_COLUMNS)
+        frame = pd.DataFrame({
+            name: pd.Categorical(values) for name, values in zip(EVENT_COLUMNS[1:], columns[1:])
+        })
+        frame.insert(0, "time", pd.to_datetime(np.asarray(columns[0], dtype=float), unit="s", utc=True))
+        return frame
+
+    def _day_total(self, day):
+        with self._lock:
+            row = self._conn.execute("SELECT SUM(count) FROM alert_daily_counts WHERE day = ?", (day,)).fetchone()
+        return row[0] or 0
+
+    def events_frame(self, start, end=None, spill=None):
+        """
+        Return every transition in ``[start, end)`` as a typed table, without parsing the stored JSON.
+
+        With a :class:`~src.utils.columnar.ColumnarStore`, each complete UTC
+        day is kept as its own columnar file and memory-mapped on later
+        reads; a day's file is rebuilt when its row count no longer matches
+        the day's counters (late transitions or pruning).
+
+        Args:
+            start: Range start as epoch seconds
+            end: Range end as epoch seconds (default: now)
+            spill: Optional ColumnarStore for the per-day files
+
+        Returns:
+            DataFrame with EVENT_COLUMNS, oldest first
+        """
+        now = time.time()
+        end = now if end is None else end
+        if spill is None or not spill.enabled:
+            return self._read_events(start, end)
+
+        today = int(now // SECONDS_PER_DAY)
+        first_day = int(start // SECONDS_PER_DAY)
+        last_closed = min(int(end // SECONDS_PER_DAY), today - 1)
+        frames = []
+        for day in range(first_day, last_closed + 1):
+            name = f"alert_events-{day}"
+            frame = spill.read(name)
+            if frame is None or len(frame) != self._day_total(day):
+                frame = self._read_events(day * SECONDS_PER_DAY, (day + 1) * SECONDS_PER_DAY)
+                spill.write(name, frame)
+            frames.append(frame)
+        frames.append(self._read_events(max(start, (last_closed + 1) * SECONDS_PER_DAY), end))
+
+        frame = pd.concat(frames, ignore_index=True)
+        frame = frame[(frame["time"] >= pd.Timestamp(start, unit="s", tz="UTC"))
+                      & (frame["time"] < pd.Timestamp(end, unit="s", tz="UTC"))]
+        # Categories differ between days, so concat falls back to strings
+        return frame.astype({name: "category" for name in EVENT_COLUMNS[1:]}).reset_index(drop=True)
+
+    def daily_severity_counts(self, days, state="firing", now=None):
+        """
+        Count transitions into ``state`` per UTC day and severity.
+
+        Args:
+            days: Number of days to include, ending with today
+            state: Recorded state to count
+            now: Reference epoch seconds (default: now)
+
+        Returns:
+            List of ``(day, severity, count)`` tuples where ``day`` is days since the epoch
+        """
+        today = int((time.time() if now is None else now) // SECONDS_PER_DAY)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT day, severity, count FROM alert_daily_counts WHERE day > ? AND day <= ? AND state = ?",
+                (today - days, today, state),
+            ).fetchall()
+
+    def prune(self, older_than_days):
+        """Delete history older than ``older_than_days`` days."""
+        cutoff = int(time.time() // SECONDS_PER_DAY) - older_than_days
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM alert_events WHERE day < ?", (cutoff,))
+            self._conn.execute("DELETE FROM alert_daily_counts WHERE day < ?", (cutoff,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
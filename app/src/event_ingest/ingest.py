@@ -1,26 +1,156 @@
-import requests
 import os
 import random
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, timezone
+
+from src.event_ingest.alert_table import AlertTable
+from src.event_ingest.anomaly import AnomalyDetector
+from src.event_ingest.capacity import capacity_alerts
+from src.event_ingest.history import AlertHistoryStore
+from src.utils.columnar import COLUMNAR_STORE, export_parquet
+from src.utils.http_client import get_prometheus_client
+from src.utils.metrics import METRICS_POLLER, SERVICE_CATALOG, get_capacity_forecasts
+from src.utils.trends import parse_bucket, severity_trend
+
+# Process-wide alert table shared by every dashboard session
+ALERT_TABLE = AlertTable()
+# Every state transition the table sees is persisted for trend queries
+ALERT_HISTORY = AlertHistoryStore()
+ALERT_TABLE.subscribe(ALERT_HISTORY.record_transitions)
+# Scores every metrics poll and raises alerts before Prometheus rules would fire
+ANOMALY_DETECTOR = AnomalyDetector(namespace_of=lambda service: next(iter(SERVICE_CATALOG.namespaces(service)), None))
+METRICS_POLLER.subscribe(ANOMALY_DETECTOR.observe)
+ALERT_SYNC_INTERVAL = float(os.environ.get("ALERT_SYNC_INTERVAL", "5"))
+_sync_lock = threading.Lock()
 
 def fetch_alerts():
     """
     Fetch alerts from Prometheus AlertManager.
-    If Prometheus is not available, return mock alerts for testing.
+    If Prometheus is not available, return mock alerts for testing, tagged
+    ``source: "mock"`` so they are never recorded as history.
+
+    Returns:
+        Tuple of (alerts, degraded), where degraded is True when Prometheus
+        could not be reached and the alerts are mocks
     """
     prometheus_url = os.environ.get("PROMETHEUS_URL", "http://prometheus-kube-prometheus-prometheus.monitoring.svc.cluster.local:9090")
     
     try:
-        response = requests.get(f"{prometheus_url}/api/v1/alerts", timeout=5)
+        response = get_prometheus_client(prometheus_url).get("/api/v1/alerts", timeout=5)
         if response.status_code == 200:
-            alerts = response.json().get("data", {}).get("alerts", [])
-            if alerts:
-                return alerts
+            return response.json().get("data", {}).get("alerts", []), False
+        print(f"Could not fetch alerts from Prometheus: HTTP {response.status_code}")
     except Exception as e:
         print(f"Could not fetch alerts from Prometheus: {e}")
     
     # Return mock alerts for testing when Prometheus is not available
-    return get_mock_alerts()
+    return get_mock_alerts(), True
+
+def fetch_capacity_alerts():
+    """
+    Alerts for resources forecast to run out of capacity soon.
+
+    Returns:
+        List of alerts, empty if the forecasts can't be computed
+    """
+    try:
+        forecasts = get_capacity_forecasts()
+    except Exception as e:
+        print(f"Error forecasting capacity: {str(e)}")
+        return []
+    return capacity_alerts(forecasts) if len(forecasts) else []
+
+def sync_alerts(max_age=None):
+    """
+    Refresh the shared alert table from Prometheus, the anomaly detector
+    and the capacity forecasts.
+
+    Skips the upstream fetch if the table was synced less than ``max_age``
+    seconds ago (defaults to ALERT_SYNC_INTERVAL), so several callers in the
+    same dashboard rerun share one request.
+
+    Each source is reconciled on its own, so alerts pushed by the webhook
+    survive the poll. A degraded poll (Prometheus unreachable) leaves the
+    polled alerts as they were instead of resolving them; its mock alerts
+    are reconciled only against earlier mocks.
+
+    Returns:
+        The table cursor after the sync
+    """
+    max_age = ALERT_SYNC_INTERVAL if max_age is None else max_age
+    with _sync_lock:
+        last_sync = ALERT_TABLE.last_sync
+        if last_sync and (datetime.now(timezone.utc) - last_sync).total_seconds() < max_age:
+            return ALERT_TABLE.cursor
+        polled, degraded = fetch_alerts()
+        if not degraded:
+            ALERT_TABLE.replace(polled, source="prometheus")
+        ALERT_TABLE.replace(polled if degraded else [], source="mock")
+        ALERT_TABLE.replace(ANOMALY_DETECTOR.active_alerts(), source="anomaly")
+        return ALERT_TABLE.replace(fetch_capacity_alerts(), source="capacity")
+
+def fetch_alert_delta(cursor=0, max_age=None):
+    """
+    Return new, changed and resolved alerts since ``cursor``.
+
+    Args:
+        cursor: Cursor returned by the previous call, or 0 for a full sync
+        max_age: Maximum age in seconds of the table before re-polling Prometheus
+
+    Returns:
+        Dictionary with keys ``cursor``, ``reset``, ``added``, ``changed`` and ``resolved``
+    """
+    sync_alerts(max_age)
+    return ALERT_TABLE.delta(cursor)
+
+def fetch_alert_history(days):
+    """
+    Return alerts that started firing within the last ``days`` days.
+
+    Reads from the persistent history store rather than the currently firing
+    set, so resolved incidents still count.
+    """
+    sync_alerts()
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    return ALERT_HISTORY.query(start.timestamp())
+
+def fetch_alert_history_frame(days):
+    """
+    Return every alert transition of the last ``days`` days as a typed DataFrame.
+
+    Complete days are served from memory-mapped columnar files, so long
+    windows open without re-reading and re-parsing the history database.
+    """
+    sync_alerts()
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    return ALERT_HISTORY.events_frame(start.timestamp(), spill=COLUMNAR_STORE)
+
+def export_alert_history(path, days=90):
+    """Write the alert transitions of the last ``days`` days to Parquet at ``path`` (a path or binary file object)."""
+    export_parquet(fetch_alert_history_frame(days), path)
+
+def fetch_incident_trend(bucket="1d", window="14d"):
+    """
+    Return a ready-to-plot DataFrame of firing alerts per bucket and severity.
+
+    Day-aligned buckets are aggregated from the store's per-day counts;
+    finer buckets bucket the raw transition timestamps.
+    """
+    sync_alerts()
+    bucket_ns = parse_bucket(bucket)
+    window_ns = parse_bucket(window)
+    day = parse_bucket("1d")
+    if bucket_ns % day == 0:
+        days = int(-(-window_ns // day)) + int(bucket_ns // day)
+        rows = ALERT_HISTORY.daily_severity_counts(days)
+        timestamps = [row[0] * 86400.0 for row in rows]
+        severities = [row[1] for row in rows]
+        counts = [row[2] for row in rows]
+        return severity_trend(timestamps, severities, bucket=bucket, window=window, weights=counts)
+
+    start = datetime.now(timezone.utc).timestamp() - window_ns / parse_bucket(1)
+    timestamps, severities = ALERT_HISTORY.severity_events(start)
+    return severity_trend(timestamps, severities, bucket=bucket, window=window)
 
 def get_mock_alerts():
     """
@@ -43,8 +173,9 @@ def get_mock_alerts():
                 "description": "Memory usage has exceeded 85% for test-app2 deployment. Consider restarting the service to free up memory."
             },
             "state": "firing",
-            "activeAt": (datetime.now() - timedelta(minutes=random.randint(5, 30))).isoformat(),
-            "value": f"{random.randint(85, 95)}%"
+            "activeAt": (datetime.now(timezone.utc) - timedelta(minutes=random.randint(5, 30))).isoformat(),
+            "value": f"{random.randint(85, 95)}%",
+            "source": "mock"
         })
     
     # Add some other random alerts
@@ -88,8 +219,9 @@ def get_mock_alerts():
                 "description": alert_template["description"]
             },
             "state": "firing",
-            "activeAt": (datetime.now() - timedelta(minutes=random.randint(1, 60))).isoformat(),
-            "value": f"{random.randint(70, 95)}%"
+            "activeAt": (datetime.now(timezone.utc) - timedelta(minutes=random.randint(1, 60))).isoformat(),
+            "value": f"{random.randint(70, 95)}%",
+            "source": "mock"
         })
     
     return mock_alerts
@@ -0,0 +1,272 @@
+"""
+Seedable synthetic alert streams for load testing.
+
+Produces realistic alert traffic (skewed service popularity, bursts across
+the pods of one deployment, flapping alerts and exponential resolution
+times) using the same label schema the remediation code reads. The same
+seed and parameters always give the same stream.
+
+Example:
+
+    python -m src.event_ingest.synthetic --count 200000 --format webhook > batches.jsonl
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+# (alertname, summary, description) – alertnames match the auto-remediation rules
+ALERT_CATALOGUE = [
+    ("HighMemory", "High memory usage detected", "Memory usage has exceeded 85% for {deployment}. Consider restarting the service to free up memory."),
+    ("HighCPU", "CPU usage is critically high", "CPU usage has exceeded 90% threshold on {deployment}. Immediate attention required."),
+    ("DiskFull", "Disk space is running low", "Available disk space is below 20% for {deployment}. Consider cleanup or expansion."),
+    ("PodCrashLooping", "Pod is crash looping", "Pod {instance} of {deployment} has restarted repeatedly in the last 10 minutes."),
+    ("ServiceUnavailable", "Service is unavailable", "{deployment} is not responding to health checks."),
+    ("LowReplicas", "Deployment has too few replicas", "{deployment} has fewer available replicas than desired."),
+    ("DatabaseConnectionIssue", "Database connection pool exhausted", "Database connection pool has reached maximum capacity on {deployment}. Service restart recommended."),
+]
+
+SERVICE_NAMES = ["api-gateway", "user-service", "database", "payment-service", "checkout", "inventory", "search", "notification", "test-app", "test-app2"]
+
+SEVERITIES = ["critical", "warning", "info"]
+
+
+def _service_names(count):
+    names = SERVICE_NAMES[:count]
+    for i in range(len(names), count):
+        names.append(f"{SERVICE_NAMES[i % len(SERVICE_NAMES)]}-{i // len(SERVICE_NAMES)}")
+    return names
+
+
+def _rfc3339(ts):
+    """Format an array of epoch seconds the way Prometheus does, with nanosecond precision."""
+    nanos = np.round(np.asarray(ts) * 1e9).astype("int64").astype("datetime64[ns]")
+    return [value + "Z" for value in np.datetime_as_string(nanos, unit="ns").tolist()]
+
+
+class SyntheticAlertGenerator:
+    """
+    Deterministic generator of alert episodes.
+
+    An episode is one firing period of one label set, from ``activeAt`` to
+    ``resolvedAt``. Episodes come from three populations:
+
+    - independent alerts spread uniformly over the time window
+    - bursts, where one alert fires on many pods of one deployment within
+      ``burst_window`` seconds
+    - flapping chains, where the same label set fires and resolves
+      ``flap_count`` times, ``flap_interval`` seconds apart
+
+    Pass ``start`` (epoch seconds) as well as ``seed`` for timestamps that
+    are reproducible across runs; by default the window ends now.
+    """
+
+    def __init__(self, seed=0, services=50, namespaces=("default",), pods_per_service=10,
+                 severity_weights=(0.2, 0.6, 0.2), start=None, duration=86400.0,
+                 mean_resolution=900.0, service_skew=1.0, burst_fraction=0.2,
+                 burst_size=40, burst_window=60.0, flap_fraction=0.05, flap_count=5,
+                 flap_interval=120.0):
+        for name, value in (("services", services), ("pods_per_service", pods_per_service),
+                            ("burst_size", burst_size), ("flap_count", flap_count)):
+            if value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+        if not namespaces:
+            raise ValueError("namespaces must not be empty")
+        if len(severity_weights) != len(SEVERITIES) or min(severity_weights) < 0 or sum(severity_weights) <= 0:
+            raise ValueError(f"severity_weights must be {len(SEVERITIES)} non-negative weights, not all zero")
+        if min(burst_fraction, flap_fraction) < 0 or burst_fraction + flap_fraction > 1:
+            raise ValueError("burst_fraction and flap_fraction must be non-negative and sum to at most 1")
+        if min(duration, mean_resolution, burst_window, flap_interval) < 0:
+            raise ValueError("durations and intervals must not be negative")
+        self.seed = seed
+        self.services = _service_names(services)
+        self.namespaces = list(namespaces)
+        self.pods_per_service = pods_per_service
+        self.severity_weights = np.asarray(severity_weights, dtype=float) / sum(severity_weights)
+        self.start = time.time() - duration if start is None else start
+        self.duration = duration
+        self.mean_resolution = mean_resolution
+        self.burst_fraction = burst_fraction
+        self.burst_size = burst_size
+        self.burst_window = burst_window
+        self.flap_fraction = flap_fraction
+        self.flap_count = flap_count
+        self.flap_interval = flap_interval
+        # Zipf-like popularity: a few services produce most of the alerts
+        weights = 1.0 / np.arange(1, services + 1) ** service_skew
+        self._service_weights = weights / weights.sum()
+
+    def _groups(self, rng, count):
+        """Draw per-group labels (service, alert, severity, namespace, pod) for ``count`` groups."""
+        return {
+            "service": rng.choice(len(self.services), count, p=self._service_weights),
+            "alert": rng.integers(0, len(ALERT_CATALOGUE), count),
+            "severity": rng.choice(len(SEVERITIES), count, p=self.severity_weights),
+            "namespace": rng.integers(0, len(self.namespaces), count),
+            "pod": rng.integers(0, self.pods_per_service, count),
+            "start": rng.uniform(0, self.duration, count),
+        }
+
+    def episodes(self, count):
+        """
+        Generate ``count`` episodes as a dictionary of numpy columns.
+
+        Columns are ``service``, ``alert``, ``severity``, ``namespace``,
+        ``pod`` (integer codes), ``start`` and ``end`` (epoch seconds),
+        sorted by ``start``.
+        """
+        if count < 0:
+            raise ValueError(f"count must not be negative, got {count}")
+        rng = np.random.default_rng(self.seed)
+        n_flap = int(count * self.flap_fraction)
+        n_burst = int(count * self.burst_fraction)
+        n_base = count - n_flap - n_burst
+
+        base = self._groups(rng, n_base)
+        base["end"] = base["start"] + rng.exponential(self.mean_resolution, n_base)
+
+        burst_id = np.arange(n_burst) // self.burst_size
+        bursts = self._groups(rng, math.ceil(n_burst / self.burst_size))
+        burst = {key: column[burst_id] for key, column in bursts.items()}
+        # Spread each burst over the deployment's pods, wrapping when it is larger
+        burst["pod"] = np.arange(n_burst) % self.burst_size % self.pods_per_service
+        burst["start"] = burst["start"] + rng.uniform(0, self.burst_window, n_burst)
+        burst["end"] = burst["start"] + rng.exponential(self.mean_resolution, n_burst)
+
+        chain_id = np.arange(n_flap) // self.flap_count
+        step = np.arange(n_flap) % self.flap_count
+        chains = self._groups(rng, math.ceil(n_flap / self.flap_count))
+        flap = {key: column[chain_id] for key, column in chains.items()}
+        flap["start"] = flap["start"] + step * self.flap_interval
+        flap["end"] = flap["start"] + rng.uniform(0.1, 0.5, n_flap) * self.flap_interval
+
+        columns = {key: np.concatenate([base[key], burst[key], flap[key]]) for key in base}
+        order = np.argsort(columns["start"], kind="stable")
+        columns = {key: column[order] for key, column in columns.items()}
+        columns["start"] = columns["start"] + self.start
+        columns["end"] = columns["end"] + self.start
+        columns["value"] = rng.integers(70, 100, count)
+        return columns
+
+    def _labelled(self, columns, rows):
+        """Yield ``(row, labels, annotations)`` for the given episode rows."""
+        service = columns["service"][rows].tolist()
+        alert = columns["alert"][rows].tolist()
+        severity = columns["severity"][rows].tolist()
+        namespace = columns["namespace"][rows].tolist()
+        pod = columns["pod"][rows].tolist()
+        for k, row in enumerate(rows.tolist()):
+            deployment = self.services[service[k]]
+            alertname, summary, description = ALERT_CATALOGUE[alert[k]]
+            instance = f"{deployment}-pod-{pod[k]}"
+            labels = {
+                "alertname": alertname,
+                "severity": SEVERITIES[severity[k]],
+                "deployment": deployment,
+                "namespace": self.namespaces[namespace[k]],
+                "instance": instance,
+            }
+            annotations = {
+                "summary": summary,
+                "description": description.format(deployment=deployment, instance=instance),
+            }
+            yield row, labels, annotations
+
+    def _prometheus_alerts(self, columns, rows, with_resolved):
+        active_at = _rfc3339(columns["start"][rows])
+        resolved_at = _rfc3339(columns["end"][rows]) if with_resolved else None
+        values = columns["value"][rows].tolist()
+        alerts = []
+        for k, (_, labels, annotations) in enumerate(self._labelled(columns, rows)):
+            alert = {
+                "labels": labels,
+                "annotations": annotations,
+                "state": "firing",
+                "activeAt": active_at[k],
+                "value": f"{values[k]}%",
+            }
+            if with_resolved:
+                alert["resolvedAt"] = resolved_at[k]
+            alerts.append(alert)
+        return alerts
+
+    def alerts(self, count):
+        """
+        Generate ``count`` alerts shaped like Prometheus ``/api/v1/alerts`` entries.
+
+        Each alert also carries ``resolvedAt`` so consumers can compute
+        resolution times.
+        """
+        columns = self.episodes(count)
+        return self._prometheus_alerts(columns, np.arange(count), with_resolved=True)
+
+    def firing_at(self, count, at):
+        """Return the Prometheus-shaped alerts from ``count`` episodes that are firing at epoch ``at``."""
+        columns = self.episodes(count)
+        active = np.flatnonzero((columns["start"] <= at) & (columns["end"] > at))
+        return self._prometheus_alerts(columns, active, with_resolved=False)
+
+    def webhook_batches(self, count, batch_size=100, receiver="incident-responder"):
+        """
+        Yield Alertmanager webhook payloads for ``count`` episodes.
+
+        Each episode produces a firing and a resolved notification; both are
+        emitted in time order, ``batch_size`` alerts per payload.
+        """
+        columns = self.episodes(count)
+        starts_at = _rfc3339(columns["start"])
+        ends_at = _rfc3339(columns["end"])
+        times = np.concatenate([columns["start"], columns["end"]])
+        order = np.argsort(times, kind="stable")
+
+        for offset in range(0, len(order), batch_size):
+            events = order[offset:offset + batch_size]
+            resolved = (events >= count).tolist()
+            alerts = []
+            for k, (i, labels, annotations) in enumerate(self._labelled(columns, events % count)):
+                alerts.append({
+                    "status": "resolved" if resolved[k] else "firing",
+                    "labels": labels,
+                    "annotations": annotations,
+                    "startsAt": starts_at[i],
+                    "endsAt": ends_at[i] if resolved[k] else "0001-01-01T00:00:00Z",
+                    "generatorURL": "",
+                })
+            yield {
+                "version": "4",
+                "receiver": receiver,
+                "status": "resolved" if all(resolved) else "firing",
+                "groupLabels": {},
+                "commonLabels": {},
+                "commonAnnotations": {},
+                "externalURL": "",
+                "alerts": alerts,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic alert stream as JSON lines.")
+    parser.add_argument("--count", type=int, default=10000, help="number of alert episodes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--services", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=86400.0, help="time window in seconds")
+    parser.add_argument("--start", type=float, default=None, help="window start as epoch seconds (default: now - duration)")
+    parser.add_argument("--format", choices=["prometheus", "webhook"], default="prometheus")
+    parser.add_argument("--batch-size", type=int, default=100, help="alerts per webhook payload")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticAlertGenerator(seed=args.seed, services=args.services,
+                                        start=args.start, duration=args.duration)
+    if args.format == "webhook":
+        records = generator.webhook_batches(args.count, batch_size=args.batch_size)
+    else:
+        records = generator.alerts(args.count)
+    for record in records:
+        sys.stdout.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Alertmanager webhook receiver.
+
+Alertmanager pushes batched notifications here instead of waiting for the
+dashboard to poll Prometheus. Alerts are normalised to the same shape
+``fetch_alerts`` returns and placed on a bounded in-memory queue; a
+consumer thread drains it into the shared alert table.
+
+Run it standalone with:
+
+    uvicorn src.event_ingest.webhook:app --host 0.0.0.0 --port 9095
+
+or set ALERT_WEBHOOK_PORT so the dashboard starts it in-process, sharing
+the dashboard's alert table. Point an Alertmanager ``webhook_configs``
+receiver at ``http://<host>:9095/api/v1/alertmanager``.
+"""
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+
+from src.event_ingest.ingest import ALERT_TABLE
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_QUEUE_SIZE = int(os.environ.get("WEBHOOK_QUEUE_SIZE", "50000"))
+_server_lock = threading.Lock()
+_server_thread = None
+_consumer_lock = threading.Lock()
+_consumer_thread = None
+
+
+class AlertQueue:
+    """
+    Bounded FIFO of alerts shared between the webhook and its consumers.
+
+    Batches are accepted all-or-nothing: if a notification does not fit, it
+    is rejected so Alertmanager retries it later instead of us silently
+    dropping part of a group.
+    """
+
+    def __init__(self, maxsize=WEBHOOK_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._not_empty = threading.Condition(threading.Lock())
+        self.accepted = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put_batch(self, alerts):
+        """Enqueue a batch of alerts. Returns False if the queue is too full to take it."""
+        with self._not_empty:
+            if len(self._items) + len(alerts) > self.maxsize:
+                self.rejected += len(alerts)
+                return False
+            self._items.extend(alerts)
+            self.accepted += len(alerts)
+            self._not_empty.notify()
+            return True
+
+    def get_batch(self, max_items=500, timeout=None):
+        """
+        Remove and return up to ``max_items`` alerts.
+
+        Blocks for up to ``timeout`` seconds (forever if None) while the queue
+        is empty, and returns an empty list if nothing arrived in time.
+        """
+        with self._not_empty:
+            if not self._items:
+                self._not_empty.wait(timeout)
+            count = min(max_items, len(self._items))
+            return [self._items.popleft() for _ in range(count)]
+
+
+def normalize_alert(alert):
+    """Convert an Alertmanager webhook alert to the Prometheus /api/v1/alerts shape."""
+    status = alert.get("status", "firing")
+    normalized = {
+        "labels": alert.get("labels", {}),
+        "annotations": alert.get("annotations", {}),
+        "state": status,
+        "activeAt": alert.get("startsAt"),
+        "value": alert.get("value", ""),
+        "status": status,
+    }
+    if status == "resolved":
+        normalized["endsAt"] = alert.get("endsAt")
+    return normalized
+
+
+alert_queue = AlertQueue()
+
+
+def _consume(queue, table):
+    while True:
+        alerts = queue.get_batch()
+        if alerts:
+            try:
+                table.update(alerts)
+            except Exception as e:
+                logger.exception("Error applying webhook alerts: %s", e)
+
+
+def start_consumer(queue=None, table=None):
+    """
+    Start the thread draining ``queue`` (default: the receiver's) into ``table`` (default: ALERT_TABLE), once.
+
+    Returns:
+        The consumer thread
+    """
+    global _consumer_thread
+    with _consumer_lock:
+        if _consumer_thread is None or not _consumer_thread.is_alive():
+            _consumer_thread = threading.Thread(
+                target=_consume, args=(queue or alert_queue, table or ALERT_TABLE), name="alert-webhook-consumer",
+                daemon=True,
+            )
+            _consumer_thread.start()
+        return _consumer_thread
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app):
+    start_consumer()
+    yield
+
+
+app = FastAPI(title="Incident Responder Alert Receiver", lifespan=_lifespan)
+
+
+@app.post("/api/v1/alertmanager")
+async def receive_alertmanager(request: Request):
+    """Accept an Alertmanager webhook notification."""
+    try:
+        payload = await request.json()
+        alerts = [normalize_alert(alert) for alert in payload.get("alerts", [])]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Alertmanager payload: {e}")
+
+    if not alert_queue.put_batch(alerts):
+        # 503 makes Alertmanager back off and retry the notification
+        raise HTTPException(status_code=503, detail="Alert queue is full")
+    return {"status": "accepted", "alerts": len(alerts), "received_at": time.time()}
+
+
+@app.get("/healthz")
+def healthz():
+    """Report queue depth and counters."""
+    return {
+        "status": "ok",
+        "queue_depth": len(alert_queue),
+        "queue_capacity": alert_queue.maxsize,
+        "accepted": alert_queue.accepted,
+        "rejected": alert_queue.rejected,
+    }
+
+
+def start_webhook_server(host="0.0.0.0", port=9095):
+    """
+    Start the receiver on a daemon thread, once per process.
+
+    Returns:
+        The server thread
+    """
+    global _server_thread
+    with _server_lock:
+        if _server_thread is None or not _server_thread.is_alive():
+            server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+            _server_thread = threading.Thread(target=server.run, name="alert-webhook", daemon=True)
+            _server_thread.start()
+        return _server_thread
@@ -18,10 +18,16 @@ import os
 app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, app_dir)
 
-from src.utils.metrics import get_all_services, get_service_metrics, get_deployment_status
+from src.utils.timestamps import parse_datetime
+from src.utils.metrics import get_all_services, get_service_metrics, get_service_health_table, plan_service_metrics, plan_service_history, run_queries, get_deployment_status, get_deployment_health, get_service_history, get_prometheus_stats, get_cache_stats, get_capacity_forecasts, start_metrics_poller, SERVICE_CATALOG, SERIES_STORE
 from src.actions.remediation import restart_service, scale_deployment, get_deployment_status, auto_remediate_service, auto_remediate_from_prometheus_alert, get_auto_remediation_rules
-from src.ai_agent.agent import IncidentAIAgent
-from src.event_ingest.ingest import fetch_alerts
+from src.ai_agent.agent import ANALYSIS_CACHE, IncidentAIAgent
+from src.event_ingest.ingest import ANOMALY_DETECTOR, export_alert_history, fetch_alert_delta, fetch_alert_history, fetch_incident_trend
+from src.event_ingest.webhook import start_webhook_server
+from src.event_ingest.grouping import group_alerts
+from src.event_ingest.capacity import format_duration
+from src.utils.columnar import HAS_PYARROW, export_parquet
+from src.utils.query_planner import QueryPlanner
 
 # Try to import the Streamlit Mermaid component
 try:
@@ -30,6 +36,13 @@ try:
 except ImportError:
     HAS_MERMAID = False
 
+# Receive Alertmanager pushes in-process when a webhook port is configured
+if os.environ.get("ALERT_WEBHOOK_PORT"):
+    start_webhook_server(port=int(os.environ["ALERT_WEBHOOK_PORT"]))
+
+# Sample every service's metrics in the background for trend sparklines
+start_metrics_poller()
+
 # Set page configuration
 st.set_page_config(
     page_title="DevOps Incident Responder",
@@ -243,46 +256,31 @@ if "auto_remediation_history" not in st.session_state:
 if 'history' not in st.session_state:
     st.session_state.history = []
 
-# Add after imports, before page config
-def parse_datetime(dt_string):
-    """Safely parse datetime strings from various formats."""
-    if not dt_string:
-        return None
-    try:
-        # Try direct ISO format parsing first
-        return datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
-    except (ValueError, AttributeError):
-        try:
-            # Try parsing with microseconds
-            dt_string = dt_string.replace('Z', '')
-            if '.' in dt_string:
-                main_part, ms_part = dt_string.split('.')
-                # Ensure microseconds are 6 digits
-                ms_part = ms_part[:6].ljust(6, '0')
-                dt_string = f"{main_part}.{ms_part}"
-            return datetime.fromisoformat(dt_string)
-        except (ValueError, AttributeError):
-            try:
-                # Try parsing without microseconds
-                return datetime.strptime(dt_string.split('.')[0], '%Y-%m-%dT%H:%M:%S')
-            except (ValueError, AttributeError):
-                return None
+def refresh_alert_view(max_age=None):
+    """Apply the alert delta since this session's cursor to its local alert view."""
+    view = st.session_state.setdefault("alert_view", {})
+    delta = fetch_alert_delta(st.session_state.get("alert_cursor", 0), max_age=max_age)
+    if delta["reset"]:
+        view.clear()
+    for alert in delta["added"] + delta["changed"]:
+        view[alert["fingerprint"]] = alert
+    for alert in delta["resolved"]:
+        view.pop(alert["fingerprint"], None)
+    st.session_state.alert_cursor = delta["cursor"]
+    return list(view.values())
+
+def stop_ai_generation():
+    """Button callback: the click's rerun interrupts the render, which closes the open AI streams."""
+    st.session_state.ai_generation_stopped = True
 
 # Safe fetch functions
 def safe_fetch_alerts(days=None):
     """Safely fetch alerts with error handling."""
     try:
-        alerts = fetch_alerts()
-        if days and alerts:
-            # Filter alerts to only include those from the specified number of days
-            cutoff_date = datetime.now() - timedelta(days=days)
-            filtered_alerts = []
-            for alert in alerts:
-                alert_time = parse_datetime(alert.get("activeAt", ""))
-                if alert_time and alert_time >= cutoff_date:
-                    filtered_alerts.append(alert)
-            return filtered_alerts
-        return alerts or []
+        if days:
+            # Historical ranges come from the persistent alert history
+            return fetch_alert_history(days)
+        return refresh_alert_view() or []
     except Exception as e:
         st.error(f"Error fetching alerts: {str(e)}")
         return []
@@ -295,6 +293,26 @@ def safe_get_metrics(service):
         st.warning(f"Error fetching metrics for {service}: {str(e)}")
         return {"status": "Error", "response_time": 0, "load": 0.0}
 
+def safe_get_service_health(services, planned=None):
+    """Safely get the service health table, one row per service in ``services``."""
+    try:
+        if planned is not None:
+            planned()  # Fills the shared cache the table is built from
+        # Fetch every service rather than listing them in a (possibly huge) regex matcher
+        table = get_service_health_table()
+        status = "Unknown"
+    except Exception as e:
+        st.warning(f"Error fetching service metrics: {str(e)}")
+        table = pd.DataFrame(columns=["service", "status", "response_time", "load"])
+        status = "Error"
+    table = table.set_index("service").reindex(services)
+    return pd.DataFrame({
+        "Service": services,
+        "Status": table["status"].astype(str).where(table["status"].notna(), status).to_numpy(),
+        "Response Time (ms)": table["response_time"].fillna(0).to_numpy(),
+        "Load": table["load"].fillna(0.0).to_numpy(),
+    })
+
 def safe_get_all_services():
     """Safely get all services with error handling."""
     try:
@@ -360,36 +378,20 @@ if selected_page == "Dashboard":
     # Add a chart showing incident trends
     st.markdown("### 📈 Incident Trends")
     
-    # Get historical alerts for the last 14 days
-    days = 14
-    date_range = [datetime.now() - timedelta(days=x) for x in range(days)]
-    date_range.reverse()
-    
-    # Structure for storing daily counts
-    incident_data = {
-        "Date": [d.strftime("%Y-%m-%d") for d in date_range],
-        "Critical": [0] * days,
-        "Warning": [0] * days,
-        "Info": [0] * days
+    # Bucket historical alerts by severity over the selected window
+    trend_ranges = {
+        "Last 24 hours (hourly)": ("1h", "1d"),
+        "Last 14 days (daily)": ("1d", "14d"),
+        "Last 90 days (weekly)": ("1w", "90d"),
     }
+    trend_range = st.selectbox("Trend window", list(trend_ranges.keys()), index=1, key="trend_range")
+    bucket, window = trend_ranges[trend_range]
     
-    # Count historical alerts by severity
-    historical_alerts = safe_fetch_alerts(days=days)
-    for alert in historical_alerts:
-        parsed_date = parse_datetime(alert.get("activeAt", ""))
-        if parsed_date:
-            alert_date = parsed_date.strftime("%Y-%m-%d")
-            if alert_date in incident_data["Date"]:
-                idx = incident_data["Date"].index(alert_date)
-                severity = alert.get("labels", {}).get("severity", "info").lower()
-                if severity == "critical":
-                    incident_data["Critical"][idx] += 1
-                elif severity == "warning":
-                    incident_data["Warning"][idx] += 1
-                else:
-                    incident_data["Info"][idx] += 1
-    
-    df = pd.DataFrame(incident_data)
+    try:
+        df = fetch_incident_trend(bucket=bucket, window=window)
+    except Exception as e:
+        st.error(f"Error fetching alert history: {str(e)}")
+        df = pd.DataFrame(columns=["Date", "Critical", "Warning", "Info"])
     
     # Create multi-line chart
     fig = px.line(
@@ -410,6 +412,24 @@ if selected_page == "Dashboard":
     
     st.plotly_chart(fig, use_container_width=True)
     
+    # Widgets register their Prometheus reads with one planner, which merges
+    # overlapping queries and issues them together before anything renders
+    render_planner = QueryPlanner(run_queries)
+    services = safe_get_all_services()  # This should return list of all monitored services
+    planned_status = plan_service_metrics(render_planner, widget="System Status")
+    history_service = st.session_state.get("history_service", services[0] if services else None)
+    history_metric = st.session_state.get("history_metric", "response_time")
+    planned_history = None
+    if history_service in services:
+        planned_history = (history_service, history_metric,
+                           plan_service_history(render_planner, history_service, history_metric, widget="Service History"))
+    alert_services = {alert.get("labels", {}).get("service") or alert.get("labels", {}).get("deployment") for alert in alerts}
+    planned_cards = {
+        service: plan_service_metrics(render_planner, [service], widget="Alert cards")
+        for service in sorted(alert_services & set(services))
+    }
+    render_planner.execute()
+    
     # Main dashboard tabs
     tab1, tab2, tab3 = st.tabs(["Current Alerts", "System Status", "AI Insights"])
     
@@ -422,6 +442,11 @@ if selected_page == "Dashboard":
         with alerts_container:
             fetch_button = st.button("🔄 Fetch Latest Alerts")
             
+            if not fetch_button and st.session_state.pop("ai_generation_stopped", False):
+                st.warning("⏹ AI generation stopped. Recommendations received so far:")
+                for title, text in st.session_state.pop("ai_partial_recommendations", {}).items():
+                    st.markdown(f"**{title}:** {text or '(nothing yet)'}")
+            
             if fetch_button:
                 with st.spinner("Fetching alerts from monitoring system..."):
                     # Add progress bar with animation
@@ -431,7 +456,7 @@ if selected_page == "Dashboard":
                         progress_bar.progress(i + 1)
                     
                     # Now fetch actual alerts
-                    alerts = fetch_alerts()
+                    alerts = refresh_alert_view(max_age=0)
                     
                     if not alerts:
                         st.info("✅ No active alerts found. All systems operational.")
@@ -443,7 +468,12 @@ if selected_page == "Dashboard":
                             st.info("Using basic alert processing without AI analysis.")
                             agent = None
                         
-                        for idx, alert in enumerate(alerts):
+                        # Analyse and remediate once per group rather than once per alert
+                        alert_groups = group_alerts(alerts)
+                        # Cards render first with placeholders; AI recommendations fill them in as they land
+                        suggestion_slots = {}
+                        for idx, group in enumerate(alert_groups):
+                            alert = group["alert"]
                             labels = alert.get("labels", {})
                             annotations = alert.get("annotations", {})
                             alert_name = labels.get("alertname", "Unknown Alert")
@@ -461,23 +491,34 @@ if selected_page == "Dashboard":
                                 severity_class = "alert-info"
                             
                             st.markdown(f'<div class="card {severity_class} fadeIn">', unsafe_allow_html=True)
-                            with st.expander(f"🔔 {idx+1}. {alert_name} [{severity.upper()}]", expanded=True):
+                            group_suffix = f" ×{group['count']}" if group["count"] > 1 else ""
+                            with st.expander(f"🔔 {idx+1}. {alert_name} [{severity.upper()}]{group_suffix}", expanded=True):
                                 cols = st.columns([2, 1])
                                 
                                 with cols[0]:
+                                    if group["count"] > 1:
+                                        instances = ", ".join(sorted({a.get("labels", {}).get("instance", "?") for a in group["alerts"]}))
+                                        st.markdown(f"**Grouped Alerts:** {group['count']} ({instances})")
                                     st.markdown(f"**Summary:** {summary}")
+                                    card_service = labels.get("service") or labels.get("deployment")
+                                    if card_service in planned_cards:
+                                        try:
+                                            card_metrics = planned_cards[card_service]()[card_service]
+                                            st.markdown(f"**Service Metrics:** {card_metrics['status']} · "
+                                                        f"{card_metrics['response_time']} ms · {card_metrics['load']:.1f}% load")
+                                        except Exception as e:
+                                            st.caption(f"Service metrics unavailable: {str(e)}")
                                     st.markdown(f"**Description:** {description}")
                                     st.markdown(f"**State:** {alert.get('state', 'unknown')}")
                                     st.markdown(f"**Active Since:** {alert.get('activeAt', 'unknown')}")
                                     st.markdown(f"**Value:** {alert.get('value', '')}")
                                 
                                 with cols[1]:
-                                    # Animated progress while AI analyzes
+                                    # Placeholder until this card's AI analysis completes
                                     if agent:
-                                        with st.spinner("AI analyzing incident..."):
-                                            suggestion = agent.analyze_incident(description)
-                                            
-                                        st.success(f"**AI Recommendation:**\n{suggestion}")
+                                        suggestion_slots[idx] = [st.empty()]
+                                        suggestion_slots[idx][0].info("⏳ AI analyzing incident...")
+                                        suggestion = None
                                     else:
                                         suggestion = "Automatic restart recommended for service issues"
                                         st.info(f"**Basic Recommendation:**\n{suggestion}")
@@ -502,7 +543,11 @@ if selected_page == "Dashboard":
                                             st.markdown("#### Auto-Remediation Analysis")
                                             
                                             # Show AI suggestion
-                                            st.info(f"**AI Analysis**: {suggestion}")
+                                            if suggestion is None:
+                                                suggestion_slots[idx].append(st.empty())
+                                                suggestion_slots[idx][-1].info("**AI Analysis**: ⏳ pending...")
+                                            else:
+                                                st.info(f"**AI Analysis**: {suggestion}")
                                             
                                             if auto_settings.get("enabled", True):
                                                 # Perform auto-remediation
@@ -584,6 +629,43 @@ if selected_page == "Dashboard":
                                 st.code(result)
                             
                             st.markdown('</div>', unsafe_allow_html=True)
+                        
+                        # Stream AI recommendations into their cards as they are written
+                        if agent and suggestion_slots:
+                            pending = sorted(suggestion_slots)
+                            contexts = [
+                                alert_groups[idx]["alert"].get("annotations", {}).get("description", "No description provided.")
+                                for idx in pending
+                            ]
+                            # Kept so a stop can show what had arrived
+                            partial = st.session_state.ai_partial_recommendations = {
+                                f"{idx+1}. {alert_groups[idx]['alert'].get('labels', {}).get('alertname', 'Unknown Alert')}": ""
+                                for idx in pending
+                            }
+                            titles = list(partial)
+                            stop_slot = st.empty()
+                            stop_slot.button("⏹ Stop AI generation", key="stop_ai_generation", on_click=stop_ai_generation)
+                            streams = agent.stream_analyses(contexts)
+                            try:
+                                for position, suggestion, done in streams:
+                                    partial[titles[position]] = suggestion
+                                    recommendation_slot, *analysis_slots = suggestion_slots[pending[position]]
+                                    if not done:
+                                        recommendation_slot.info(f"**AI Recommendation:**\n{suggestion} ▌")
+                                        continue
+                                    recommendation_slot.success(f"**AI Recommendation:**\n{suggestion}")
+                                    for slot in analysis_slots:
+                                        slot.info(f"**AI Analysis**: {suggestion}")
+                            finally:
+                                streams.close()
+                            stop_slot.empty()
+                            st.session_state.pop("ai_partial_recommendations", None)
+                            cache_stats = ANALYSIS_CACHE.stats()
+                            st.caption(
+                                f"AI analysis cache: {cache_stats['hit_rate']:.0%} hit rate "
+                                f"({cache_stats['hits']} hits, {cache_stats['misses']} misses), "
+                                f"{cache_stats['entries']} cached analyses"
+                            )
 
     with tab2:
         st.markdown("### 🖥️ System Status")
@@ -593,23 +675,9 @@ if selected_page == "Dashboard":
         
         with col1:
             # Fetch real service health data
-            system_health = {
-                "Service": [],
-                "Status": [],
-                "Response Time (ms)": [],
-                "Load": []
-            }
-            
-            # Get service list and their status
-            services = safe_get_all_services()  # This should return list of all monitored services
-            for service in services:
-                metrics = safe_get_metrics(service)  # This should return service metrics
-                system_health["Service"].append(service)
-                system_health["Status"].append(metrics.get("status", "Unknown"))
-                system_health["Response Time (ms)"].append(metrics.get("response_time", 0))
-                system_health["Load"].append(metrics.get("load", 0.0))
-            
-            health_df = pd.DataFrame(system_health)
+            # Service list and metrics were fetched by the render planner
+            health_df = safe_get_service_health(services, planned_status)  # One query per metric for all services
+            health_df["Load Trend"] = [SERIES_STORE.sparkline(service, "load").tolist() for service in services]
             
             # Create a color-coded table for system status
             def color_status(val):
@@ -621,18 +689,21 @@ if selected_page == "Dashboard":
                     return f'background-color: rgba(255, 99, 132, 0.2); color: #ef476f'
             
             st.dataframe(
-                health_df.style.applymap(color_status, subset=['Status'])
+                health_df.style.map(color_status, subset=['Status'])
                     .background_gradient(cmap='Blues', subset=['Response Time (ms)'])
                     .background_gradient(cmap='RdYlGn_r', subset=['Load']),
+                column_config={
+                    "Load Trend": st.column_config.LineChartColumn("Load (last hour)", y_min=0)
+                },
                 use_container_width=True,
                 height=300
             )
         
         with col2:
             # Calculate overall system health based on service status
-            total_services = len(system_health["Service"])
+            total_services = len(health_df)
             if total_services > 0:
-                healthy_count = sum(1 for status in system_health["Status"] if status == "Healthy")
+                healthy_count = int((health_df["Status"] == "Healthy").sum())
                 overall_health = healthy_count / total_services
             else:
                 overall_health = 0
@@ -660,6 +731,60 @@ if selected_page == "Dashboard":
             
             fig.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20))
             st.plotly_chart(fig, use_container_width=True)
+
+        # Real 7-day history per service, sized to the chart width
+        st.markdown("### 📈 Service History (7 days)")
+        hist_col1, hist_col2 = st.columns(2)
+        with hist_col1:
+            history_service = st.selectbox("Service", services, key="history_service") if services else None
+        with hist_col2:
+            history_metric = st.selectbox(
+                "Metric",
+                ["response_time", "load"],
+                format_func=lambda m: "Response Time (ms)" if m == "response_time" else "CPU Load (%)",
+                key="history_metric"
+            )
+        if history_service:
+            try:
+                if planned_history is not None and planned_history[:2] == (history_service, history_metric):
+                    timestamps, values = planned_history[2]()
+                else:
+                    timestamps, values = get_service_history(history_service, history_metric, days=7, width_px=800)
+            except Exception as e:
+                timestamps, values = np.zeros(0), np.zeros(0)
+                st.warning(f"⚠️ Could not load history for {history_service}: {e}")
+            if len(timestamps):
+                history_df = pd.DataFrame({
+                    "Time": (timestamps * 1e9).astype("int64").astype("datetime64[ns]"),
+                    "Value": values
+                })
+                fig = px.line(history_df, x="Time", y="Value", title=f"{history_service} · {history_metric.replace('_', ' ')}")
+                fig.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20))
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("No history available for this service yet.")
+
+        with st.expander("📡 Prometheus Client Stats"):
+            render_stats = render_planner.stats()
+            st.caption(
+                f"This render: {render_stats['registered']} widget queries, "
+                f"{render_stats['issued']} Prometheus requests, {render_stats['series']} series, "
+                f"{render_stats['samples']} samples in {render_stats['seconds'] * 1000:.0f} ms"
+            )
+            prometheus_stats = get_prometheus_stats()
+            if prometheus_stats:
+                stats_df = pd.DataFrame.from_dict(prometheus_stats, orient="index")
+                stats_df["avg_ms"] = (stats_df["total_seconds"] / stats_df["requests"] * 1000).round(1)
+                st.dataframe(stats_df, use_container_width=True)
+            else:
+                st.info("No Prometheus requests made yet.")
+            st.markdown("**Metrics cache:**")
+            st.json(get_cache_stats())
+            if SERVICE_CATALOG.last_refresh:
+                st.caption(
+                    f"Service catalog: {len(SERVICE_CATALOG)} services, "
+                    f"refreshed {int(time.time() - SERVICE_CATALOG.last_refresh)}s ago"
+                )
     
     with tab3:
         st.markdown("### 🧠 AI Insights")
@@ -738,19 +863,37 @@ if selected_page == "Dashboard":
                 "description": "API latency increases correlate with database connection pool saturation. Recommended increasing connection timeout and max pool size.",
                 "confidence": 0.87
             },
-            {
-                "type": "Predictive Alert",
-                "description": "Based on current growth patterns, disk usage will reach critical threshold in approximately 8 days. Consider cleanup or scaling storage.",
-                "confidence": 0.94
-            }
         ]
         
+        # Predictive insight from the capacity forecasts
+        try:
+            forecasts = get_capacity_forecasts()
+            at_risk = forecasts[forecasts["seconds_to_threshold"] <= 7 * 86400]
+        except Exception as e:
+            print(f"Error forecasting capacity: {str(e)}")
+            at_risk = pd.DataFrame()
+        if len(at_risk):
+            soonest = at_risk.iloc[0]
+            more = f" ({len(at_risk) - 1} more within 7 days)" if len(at_risk) > 1 else ""
+            insights.append({
+                "type": "Predictive Alert",
+                "description": f"Based on current growth patterns, {soonest['resource']} usage of {soonest['namespace']}/{soonest['name']} will reach its threshold in approximately {format_duration(soonest['seconds_to_threshold'])}{more}. Consider cleanup or scaling capacity.",
+                "confidence": float(soonest["r_squared"])
+            })
+        else:
+            insights.append({
+                "type": "Predictive Alert",
+                "description": "No disk, memory or replica capacity is forecast to run out within 7 days.",
+                "confidence": None
+            })
+        
         for idx, insight in enumerate(insights):
+            confidence = f'<p><small>Confidence: {insight["confidence"]*100:.1f}%</small></p>' if insight["confidence"] is not None else ""
             st.markdown(f"""
             <div class="card fadeIn">
                 <h4>{insight["type"]}</h4>
                 <p>{insight["description"]}</p>
-                <p><small>Confidence: {insight["confidence"]*100:.1f}%</small></p>
+                {confidence}
             </div>
             """, unsafe_allow_html=True)
 
@@ -1105,75 +1248,66 @@ elif selected_page == "AI Lab":
             This moves DevOps from "break-fix" to "predict-prevent" operations.
             """)
             
-            # Create time-series prediction visualization
-            # Generate sample data for a time series with anomaly
-            np.random.seed(42)
-            date_range = pd.date_range(start='2025-01-01', periods=100, freq='H')
-            normal = np.sin(np.linspace(0, 10, 100)) + np.random.normal(0, 0.1, 100)
-            
-            # Add an anomaly
-            normal[70:80] += np.linspace(0, 2, 10)
-            normal[80:90] += np.linspace(2, 0, 10)
-            
-            # Prediction range
-            prediction = np.sin(np.linspace(10, 15, 20)) + np.random.normal(0, 0.1, 20)
-            
-            # Combine data
-            df_normal = pd.DataFrame({
-                'Date': date_range[:90], 
-                'Value': normal[:90],
-                'Type': 'Historical'
-            })
-            
-            df_anomaly = pd.DataFrame({
-                'Date': date_range[70:90], 
-                'Value': normal[70:90],
-                'Type': 'Anomaly'
-            })
-            
-            df_prediction = pd.DataFrame({
-                'Date': pd.date_range(start=date_range[89], periods=21, freq='H')[1:], 
-                'Value': prediction,
-                'Type': 'Prediction'
-            })
-            
-            df = pd.concat([df_normal, df_prediction])
-            
-            # Create the plot
-            fig = px.line(
-                df, 
-                x='Date', 
-                y='Value', 
-                color='Type',
-                color_discrete_map={'Historical': '#3a86ff', 'Prediction': '#ff6b6b'},
-                title="Predictive Analysis of System Metrics"
-            )
-            
-            # Add the anomaly points
-            fig.add_scatter(
-                x=df_anomaly['Date'], 
-                y=df_anomaly['Value'], 
-                mode='markers',
-                marker=dict(color='#ff9e00', size=10),
-                name='Detected Anomaly'
-            )
-            
-            # Add a vertical line where prediction starts
-            fig.add_vline(x=date_range[89], line_dash="dash", line_color="#888888")
-            
-            # Add annotation
-            fig.add_annotation(
-                x=date_range[89], 
-                y=df_normal['Value'].max(),
-                text="AI Prediction Start",
-                showarrow=True,
-                arrowhead=1,
-                ax=40,
-                ay=-40
-            )
-            
-            fig.update_layout(height=400, margin=dict(l=20, r=20, t=50, b=20))
-            st.plotly_chart(fig, use_container_width=True)
+            # Live anomaly detection over the metrics the background poller samples
+            anomaly_services = SERIES_STORE.services()
+            if anomaly_services and len(SERIES_STORE):
+                col1, col2 = st.columns(2)
+                with col1:
+                    anomaly_service = st.selectbox("Service", anomaly_services, key="anomaly_service")
+                with col2:
+                    anomaly_metric = st.selectbox(
+                        "Metric",
+                        list(ANOMALY_DETECTOR.metrics),
+                        format_func=lambda m: "Response Time (ms)" if m == "response_time" else "CPU Load (%)",
+                        key="anomaly_metric"
+                    )
+
+                sample_times = SERIES_STORE.times()
+                df = pd.DataFrame({
+                    'Date': pd.to_datetime(sample_times, unit='s'),
+                    'Value': SERIES_STORE.sparkline(anomaly_service, anomaly_metric)
+                })
+                fig = px.line(
+                    df,
+                    x='Date',
+                    y='Value',
+                    color_discrete_sequence=['#3a86ff'],
+                    title=f"Live Anomaly Detection: {anomaly_service}"
+                )
+
+                # Shade the band the EWMA baseline considers normal
+                baseline = ANOMALY_DETECTOR.baseline(anomaly_service, anomaly_metric)
+                if baseline:
+                    mean, std = baseline
+                    fig.add_hrect(
+                        y0=mean - ANOMALY_DETECTOR.threshold * std,
+                        y1=mean + ANOMALY_DETECTOR.threshold * std,
+                        fillcolor="#3a86ff",
+                        opacity=0.1,
+                        line_width=0,
+                        annotation_text="Expected range",
+                        annotation_position="top left"
+                    )
+
+                # Add the anomaly points
+                events = [
+                    event for event in ANOMALY_DETECTOR.recent_events(anomaly_service, anomaly_metric)
+                    if event["timestamp"] >= sample_times[0]
+                ]
+                if events:
+                    fig.add_scatter(
+                        x=pd.to_datetime([event["timestamp"] for event in events], unit='s'),
+                        y=[event["value"] for event in events],
+                        mode='markers',
+                        marker=dict(color='#ff9e00', size=10),
+                        name='Detected Anomaly'
+                    )
+
+                fig.update_layout(height=400, margin=dict(l=20, r=20, t=50, b=20))
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption(f"{len(ANOMALY_DETECTOR.active_alerts())} anomaly alerts currently firing across the fleet")
+            else:
+                st.info("Waiting for the first metrics samples; anomaly detection starts once services are polled.")
             
         with st.expander("🤝 Human-AI Collaboration Models"):
             st.markdown("""
@@ -1367,8 +1501,67 @@ elif selected_page == "AI Lab":
         </div>
         """, unsafe_allow_html=True)
 
+elif selected_page == "Incidents":
+    st.markdown("## 🚨 Incidents")
+    st.markdown("### 📦 Deployment Health")
+
+    try:
+        deployment_health = get_deployment_health()
+    except Exception as e:
+        deployment_health = None
+        st.warning(f"⚠️ Could not load deployment health: {e}")
+
+    if deployment_health is not None and not deployment_health.empty:
+        col1, col2, col3 = st.columns(3)
+        status_counts = deployment_health["status"].value_counts()
+        col1.metric("Healthy", int(status_counts.get("healthy", 0)))
+        col2.metric("Degraded", int(status_counts.get("degraded", 0)))
+        col3.metric("Down", int(status_counts.get("down", 0)))
+
+        namespaces = sorted(deployment_health["namespace"].unique())
+        selected_namespaces = st.multiselect("Namespaces", namespaces, default=namespaces, key="health_namespaces")
+        only_unhealthy = st.checkbox("Only degraded or down", value=True, key="health_unhealthy")
+
+        visible = deployment_health[deployment_health["namespace"].isin(selected_namespaces)]
+        if only_unhealthy:
+            visible = visible[visible["status"] != "healthy"]
+
+        def color_deployment_status(val):
+            if val == "healthy":
+                return 'background-color: rgba(75, 192, 192, 0.2); color: #2a9d8f'
+            elif val == "degraded":
+                return 'background-color: rgba(255, 205, 86, 0.2); color: #e09f3e'
+            return 'background-color: rgba(255, 99, 132, 0.2); color: #ef476f'
+
+        st.dataframe(
+            visible.style.map(color_deployment_status, subset=["status"]),
+            use_container_width=True,
+            height=500
+        )
+    elif deployment_health is not None:
+        st.info("No deployments reported by kube-state-metrics.")
+
+    # Parquet exports for offline analysis, built only on request
+    if HAS_PYARROW:
+        with st.expander("📤 Export to Parquet"):
+            exports = {
+                "Alert history (90 days)": ("alert_history.parquet", lambda buffer: export_alert_history(buffer, days=90)),
+                "Deployment health": ("deployment_health.parquet", lambda buffer: export_parquet(get_deployment_health(), buffer)),
+                "Capacity forecasts": ("capacity_forecasts.parquet", lambda buffer: export_parquet(get_capacity_forecasts(), buffer)),
+            }
+            export_name = st.selectbox("Table", list(exports), key="export_table")
+            if st.button("Prepare export", key="export_prepare"):
+                file_name, export = exports[export_name]
+                buffer = BytesIO()
+                try:
+                    export(buffer)
+                    st.download_button(f"⬇️ Download {file_name}", buffer.getvalue(), file_name=file_name,
+                                       mime="application/vnd.apache.parquet", key="export_download")
+                except Exception as e:
+                    st.error(f"Error exporting {export_name.lower()}: {str(e)}")
+
 # Display note about other sections if not on Dashboard
-if selected_page in ["Incidents", "Analytics", "Settings"]:
+if selected_page in ["Analytics", "Settings"]:
     st.markdown(f"""
     <div class="card fadeIn">
         <h2>{selected_page} Section</h2>
@@ -0,0 +1,142 @@
+"""Process-wide TTL cache with stale-while-revalidate and request coalescing."""
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class _Entry:
+    __slots__ = ("value", "loaded_at")
+
+    def __init__(self, value, loaded_at):
+        self.value = value
+        self.loaded_at = loaded_at
+
+
+def _freeze(value):
+    """Make list/dict arguments hashable so they can be part of a cache key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, set):
+        return tuple(sorted(value))
+    return value
+
+
+class SWRCache:
+    """
+    Shared cache for expensive upstream reads.
+
+    - Entries younger than ``ttl`` seconds are served directly.
+    - Entries up to ``stale_ttl`` seconds past their TTL are still served,
+      while a single background refresh replaces them.
+    - Concurrent misses for the same key wait on one upstream load instead
+      of each issuing their own.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, ttl=15.0, stale_ttl=60.0, max_entries=1024, max_workers=4):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-refresh")
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0}
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` to (re)load it when needed."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.loaded_at
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self._stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        future = Future()
+                        self._inflight[key] = future
+                        self._stats["refreshes"] += 1
+                        self._executor.submit(self._load, key, loader, future)
+                    return entry.value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self._stats["misses"] += 1
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+
+        if owner:
+            self._load(key, loader, future)
+        return future.result()
+
+    def _load(self, key, loader, future):
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def _store(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = _Entry(value, time.monotonic())
+        if len(self._entries) > self.max_entries:
+            # Dicts keep insertion order, so the first key is the least recently loaded
+            del self._entries[next(iter(self._entries))]
+
+    def peek(self, key):
+        """Return the value cached for ``key`` if it is younger than ``ttl``, else None; never loads."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.loaded_at >= self.ttl:
+                return None
+            self._stats["hits"] += 1
+            return entry.value
+
+    def put(self, key, value):
+        """Store ``value`` for ``key`` as if it had just been loaded (e.g. by a batched fetch)."""
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything if ``key`` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return hit/miss/refresh counters plus the current entry count."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), inflight=len(self._inflight))
+
+    def cached(self, fn):
+        """Decorator caching ``fn`` keyed by its name and arguments."""
+        def key_of(args, kwargs):
+            return (fn.__qualname__, _freeze(args), _freeze(kwargs))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return self.get_or_load(key_of(args, kwargs), lambda: fn(*args, **kwargs))
+        wrapper.uncached = fn
+        # Read or fill the entry of one call without loading, for callers that fetch in bulk
+        wrapper.peek = lambda *args, **kwargs: self.peek(key_of(args, kwargs))
+        wrapper.put = lambda value, *args, **kwargs: self.put(key_of(args, kwargs), value)
+        return wrapper
@@ -0,0 +1,162 @@
+"""
+Columnar spill files for analytics tables.
+
+Query results and alert history are written as Arrow IPC files with every
+string column dictionary-encoded, so a table of thousands of deployments
+stores each namespace or status string once. Reads memory-map the file and
+hand the columns to pandas without parsing JSON; dictionary columns come
+back as categoricals. Any table can also be exported to Parquet for
+offline analysis.
+
+pyarrow is optional: without it nothing is spilled, reads return None and
+callers fall back to querying upstream.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+
+from src.utils.paths import data_path
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_CACHE_DIR = os.environ.get("COLUMNAR_CACHE_DIR", data_path("columnar_cache"))
+
+
+def to_arrow(frame):
+    """Convert a DataFrame to an Arrow table with its string columns dictionary-encoded."""
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            table = table.set_column(i, field.name, pc.dictionary_encode(table.column(i)))
+    return table
+
+
+def export_parquet(frame, path):
+    """
+    Write a DataFrame (or Arrow table) to Parquet.
+
+    Args:
+        frame: DataFrame or ``pyarrow.Table``
+        path: File path or writable binary file object
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError("Parquet export requires pyarrow")
+    table = frame if isinstance(frame, pa.Table) else to_arrow(frame)
+    pq.write_table(table, path)
+
+
+class ColumnarStore:
+    """
+    Directory of named Arrow IPC spill files.
+
+    Args:
+        directory: Where the ``<name>.arrow`` files live (created on first write)
+    """
+
+    def __init__(self, directory=COLUMNAR_CACHE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """Whether spilling is available (pyarrow is installed)."""
+        return HAS_PYARROW
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.arrow")
+
+    def age(self, name):
+        """Seconds since ``name`` was last written, or None if it doesn't exist."""
+        try:
+            return time.time() - os.path.getmtime(self.path(name))
+        except OSError:
+            return None
+
+    def write(self, name, frame):
+        """
+        Spill a DataFrame under ``name``, replacing any previous version atomically.
+
+        Returns:
+            True if the table was written, False if pyarrow is unavailable
+        """
+        if not HAS_PYARROW:
+            return False
+        table = to_arrow(frame)
+        path = self.path(name)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with pa.OSFile(partial, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(partial, path)
+        return True
+
+    def read_table(self, name, max_age=None):
+        """
+        Memory-map the spilled table ``name``.
+
+        Returns:
+            ``pyarrow.Table`` backed by the mapped file, or None if it is
+            missing, older than ``max_age`` seconds or pyarrow is unavailable
+        """
+        if not HAS_PYARROW:
+            return None
+        age = self.age(name)
+        if age is None or (max_age is not None and age > max_age):
+            return None
+        try:
+            # The mapping stays open for as long as the table's buffers reference it
+            return pa.ipc.open_file(pa.memory_map(self.path(name))).read_all()
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning("Error reading spilled table %s: %s", name, e)
+            return None
+
+    def read(self, name, max_age=None):
+        """Return the spilled table ``name`` as a DataFrame, or None (see :meth:`read_table`)."""
+        table = self.read_table(name, max_age)
+        return None if table is None else table.to_pandas()
+
+    def spilled(self, name, max_age=None):
+        """
+        Decorator persisting a DataFrame-returning function's latest result under ``name``.
+
+        Every call writes its result; the first call in a process returns the
+        spilled table instead of calling the function if it is at most
+        ``max_age`` seconds old, so analytics pages open from the local file
+        after a restart. Only calls without arguments are spilled, and only
+        when pyarrow is installed.
+        """
+        def decorator(fn):
+            warm = []
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if args or kwargs or not HAS_PYARROW:
+                    return fn(*args, **kwargs)
+                if not warm:
+                    warm.append(True)
+                    frame = self.read(name, max_age)
+                    if frame is not None:
+                        return frame
+                frame = fn()
+                try:
+                    self.write(name, frame)
+                except (OSError, pa.ArrowException) as e:
+                    logger.warning("Error spilling table %s: %s", name, e)
+                return frame
+            return wrapper
+        return decorator
+
+
+COLUMNAR_STORE = ColumnarStore()
@@ -0,0 +1,51 @@
+"""Largest-Triangle-Three-Buckets downsampling for plotting dense time series."""
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """
+    Downsample a series to ``threshold`` points, preserving its visual shape.
+
+    Implements Steinarsson's Largest-Triangle-Three-Buckets: the first and
+    last points are kept and, for every bucket in between, the point forming
+    the largest triangle with the previously selected point and the average
+    of the next bucket is chosen. NaN values are dropped first.
+
+    Args:
+        x: Monotonic x values (e.g. epoch seconds)
+        y: Values
+        threshold: Number of points to return (at least 3)
+
+    Returns:
+        Tuple of (x, y) numpy arrays of at most ``threshold`` points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = next_start + 1
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Twice the triangle area; the constant factor doesn't change the argmax
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return x[selected], y[selected]
@@ -0,0 +1,194 @@
+"""
+Vectorised capacity-exhaustion forecasting.
+
+Every function takes a whole batch of series at once: a ``(series, points)``
+matrix of samples on a shared, evenly spaced time grid (the shape a range
+query returns), with NaN for missing samples. The fits loop over iterations
+or time steps, never over series, so tens of thousands of volumes or
+containers are forecast in one pass.
+
+- :func:`robust_linear_fit` solves the batched weighted least-squares line
+  fit in closed form, with a few Tukey-biweight reweighting rounds so
+  cleanup drops and spikes don't drag the slope.
+- :func:`holt_winters` runs additive Holt-Winters (level, trend, season)
+  with all series advancing in lockstep.
+- :func:`time_to_threshold` turns both into seconds until each series
+  crosses its threshold.
+"""
+import numpy as np
+
+_TUKEY_C = 4.685
+
+
+def _forward_fill(values):
+    """Fill NaNs with the previous valid sample along each row (leading NaNs become the first valid one)."""
+    values = np.array(values, dtype=float)
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = np.take_along_axis(values, index, axis=1)
+    first = np.argmax(valid, axis=1)
+    leading = np.arange(values.shape[1])[None, :] < first[:, None]
+    first_values = values[np.arange(values.shape[0]), first]
+    return np.where(leading, first_values[:, None], filled)
+
+
+def robust_linear_fit(timestamps, values, iterations=3):
+    """
+    Fit ``value = intercept + slope * (t - timestamps[-1])`` to every row of ``values``.
+
+    Args:
+        timestamps: Shared sample times in epoch seconds, shape (points,)
+        values: Samples, shape (series, points); NaN marks missing samples
+        iterations: Tukey-biweight reweighting rounds after the initial fit
+
+    Returns:
+        Tuple of (intercept, slope per second, r_squared) arrays of shape
+        (series,); the intercept is the fitted value at the last timestamp
+    """
+    t = np.asarray(timestamps, dtype=float)
+    t = t - t[-1]
+    t2 = t * t
+    y = np.asarray(values, dtype=float)
+    valid = ~np.isnan(y)
+    y0 = np.where(valid, y, 0.0)
+    weights = valid.astype(float)
+    rows = np.arange(y.shape[0])
+    median_index = np.maximum(valid.sum(axis=1) - 1, 0) // 2
+
+    for round_ in range(iterations + 1):
+        # Weighted normal equations [[Sw, St], [St, Stt]] @ [a, b] = [Sy, Sty], one 2x2 system per row
+        wy = weights * y0
+        s_w = weights.sum(axis=1)
+        s_t = weights @ t
+        s_tt = weights @ t2
+        s_y = wy.sum(axis=1)
+        s_ty = wy @ t
+        det = s_w * s_tt - s_t * s_t
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(det > 0, (s_w * s_ty - s_t * s_y) / det, 0.0)
+            intercept = np.where(s_w > 0, (s_y - slope * s_t) / s_w, 0.0)
+        residuals = y0 - intercept[:, None] - slope[:, None] * t[None, :]
+        if round_ == iterations:
+            break
+        # Tukey biweight on residuals scaled by their MAD (missing samples sort last)
+        abs_res = np.abs(residuals)
+        abs_res[~valid] = np.inf
+        abs_res.sort(axis=1)
+        scale = 1.4826 * abs_res[rows, median_index]
+        scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+        u = residuals * (1.0 / (_TUKEY_C * scale))[:, None]
+        u *= u
+        weights = np.clip(1.0 - u, 0.0, None)
+        weights *= weights
+        weights[~valid] = 0.0
+
+    count = np.maximum(valid.sum(axis=1), 1)
+    mean = y0.sum(axis=1) / count
+    centred = np.where(valid, y0 - mean[:, None], 0.0)
+    residuals[~valid] = 0.0
+    ss_tot = np.einsum('ij,ij->i', centred, centred)
+    ss_res = np.einsum('ij,ij->i', residuals, residuals)
+    r_squared = np.where(ss_tot > 0, 1 - ss_res / np.maximum(ss_tot, 1e-12), 0.0)
+    return intercept, slope, np.clip(r_squared, 0.0, 1.0)
+
+
+def holt_winters(values, season_length=None, alpha=0.2, beta=0.02, gamma=0.1):
+    """
+    Run additive Holt-Winters over every row of ``values``.
+
+    Missing samples are forward-filled. Seasonality is used only when there
+    are at least two full seasons of data; otherwise this is Holt's linear
+    trend method.
+
+    Returns:
+        Tuple of (level, trend per step, season) with shapes (series,),
+        (series,) and (series, season_length or 0); ``season[:, k]`` is the
+        seasonal offset ``k + 1`` steps after the last sample
+    """
+    # Time-major layout so each step reads one contiguous row
+    y = np.ascontiguousarray(_forward_fill(values).T)
+    n_points, n_series = y.shape
+    seasonal = bool(season_length) and n_points >= 2 * season_length
+    if seasonal:
+        first = y[:season_length].mean(axis=0)
+        second = y[season_length:2 * season_length].mean(axis=0)
+        trend = (second - first) / season_length
+        # Seasonal offsets from the first two seasons with the initial trend removed
+        offsets = (np.arange(2 * season_length) - (season_length - 1) / 2)[:, None] * trend[None, :]
+        detrended = y[:2 * season_length] - first[None, :] - offsets
+        season = 0.5 * (detrended[:season_length] + detrended[season_length:])
+        level = first + trend * (season_length - 1) / 2
+        start = season_length
+    else:
+        level = y[0].copy()
+        trend = (y[min(n_points - 1, 1)] - y[0]) if n_points > 1 else np.zeros(n_series)
+        season = np.zeros((0, n_series))
+        start = 1
+
+    for i in range(start, n_points):
+        previous_level = level
+        if seasonal:
+            k = i % season_length
+            level = alpha * (y[i] - season[k]) + (1 - alpha) * (level + trend)
+            season[k] = gamma * (y[i] - level) + (1 - gamma) * season[k]
+        else:
+            level = alpha * y[i] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+
+    if seasonal:
+        # Rotate so column k is the season k + 1 steps past the last sample
+        season = np.roll(season, -(n_points % season_length), axis=0)
+    season = season.T
+    level = np.where(np.isnan(level), 0.0, level)
+    trend = np.where(np.isnan(trend), 0.0, trend)
+    return level, trend, season
+
+
+def _seconds_until(current, rate, threshold):
+    """Seconds until ``current + rate * t`` reaches ``threshold``: 0 if already there, inf if never."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seconds = np.where(rate > 0, (threshold - current) / rate, np.inf)
+    return np.where(current >= threshold, 0.0, seconds)
+
+
+def time_to_threshold(timestamps, values, threshold, season_length=None):
+    """
+    Estimate how long until each series reaches ``threshold``.
+
+    Args:
+        timestamps: Shared, evenly spaced sample times (epoch seconds)
+        values: Samples, shape (series, points)
+        threshold: Scalar or per-series array
+        season_length: Samples per season for Holt-Winters (e.g. 24 for hourly data)
+
+    Returns:
+        Dictionary of arrays of shape (series,): ``current`` (robust fitted
+        value now), ``slope`` (per second), ``r_squared``, ``linear`` and
+        ``holt_winters`` (seconds to threshold by each method, inf if the
+        series isn't heading there) and ``seconds``, the earlier of the two
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    values = np.asarray(values, dtype=float)
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (values.shape[0],))
+    step = float(np.median(np.diff(timestamps))) if len(timestamps) > 1 else 1.0
+
+    intercept, slope, r_squared = robust_linear_fit(timestamps, values)
+    linear = _seconds_until(intercept, slope, threshold)
+
+    level, trend, season = holt_winters(values, season_length)
+    # Be conservative about seasonality: assume every future point sits at the seasonal peak
+    peak = season.max(axis=1) if season.shape[1] else 0.0
+    hw = _seconds_until(level + peak, trend / step, threshold)
+
+    no_data = np.isnan(values).all(axis=1)
+    linear = np.where(no_data, np.inf, linear)
+    hw = np.where(no_data, np.inf, hw)
+    return {
+        "current": intercept,
+        "slope": slope,
+        "r_squared": r_squared,
+        "linear": linear,
+        "holt_winters": hw,
+        "seconds": np.minimum(linear, hw),
+    }
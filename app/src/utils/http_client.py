@@ -0,0 +1,162 @@
+"""Shared, pooled HTTP transport for all Prometheus access."""
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PROMETHEUS_TIMEOUT = float(os.getenv('PROMETHEUS_TIMEOUT', '5'))
+PROMETHEUS_RETRIES = int(os.getenv('PROMETHEUS_RETRIES', '2'))
+PROMETHEUS_POOL_SIZE = int(os.getenv('PROMETHEUS_POOL_SIZE', '20'))
+
+# Status codes worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class PrometheusClient:
+    """
+    Keep-alive HTTP client for one Prometheus server.
+
+    Every call has a timeout, transient failures are retried a bounded
+    number of times with full-jitter exponential backoff, responses are
+    gzip-compressed, and latency and error counters are kept per endpoint.
+    """
+
+    def __init__(self, base_url, timeout=PROMETHEUS_TIMEOUT, retries=PROMETHEUS_RETRIES,
+                 backoff=0.1, max_backoff=2.0, pool_size=PROMETHEUS_POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip', 'Accept': 'application/json'})
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    def _record(self, endpoint, elapsed, error=False, retried=False):
+        with self._stats_lock:
+            stats = self._stats.setdefault(endpoint, {
+                "requests": 0, "errors": 0, "retries": 0, "total_seconds": 0.0, "max_seconds": 0.0
+            })
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["retries"] += int(retried)
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    def _backoff(self, attempt, deadline=None):
+        """Seconds to wait before retrying ``attempt``, or None if there is no time left for a retry."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def get(self, path, params=None, timeout=None, deadline=None):
+        """
+        GET ``path`` relative to the server, retrying transient failures.
+
+        Args:
+            path: Path of the endpoint, e.g. ``/api/v1/query``
+            params: Query parameters
+            timeout: Seconds each attempt may take
+            deadline: ``time.monotonic()`` value bounding all attempts and
+                the backoff between them; no retry starts after it
+
+        Returns:
+            The final ``requests.Response`` (callers check its status)
+
+        Raises:
+            requests.RequestException: if every attempt failed to connect or timed out
+        """
+        url = f'{self.base_url}{path}'
+        timeout = self.timeout if timeout is None else timeout
+        for attempt in range(self.retries + 1):
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise requests.Timeout(f"Deadline passed before attempt {attempt + 1} of {url}")
+                timeout = min(timeout, remaining)
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(path, time.perf_counter() - start, error=True, retried=attempt > 0)
+                delay = None if attempt == self.retries else self._backoff(attempt, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+
+            failed = response.status_code >= 400
+            self._record(path, time.perf_counter() - start, error=failed, retried=attempt > 0)
+            delay = None
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                delay = self._backoff(attempt, deadline)
+            if delay is None:
+                return response
+            # Return the connection to the pool before the next attempt
+            response.close()
+            time.sleep(delay)
+
+    def query(self, query, timeout=None, deadline=None):
+        """
+        Run an instant PromQL query.
+
+        Returns:
+            The ``data.result`` list of the response
+
+        Raises:
+            requests.RequestException: on transport or HTTP errors
+            ValueError: if Prometheus reports a failed query
+        """
+        response = self.get('/api/v1/query', params={'query': query}, timeout=timeout, deadline=deadline)
+        response.raise_for_status()
+        data = response.json()
+        if data.get('status') != 'success':
+            raise ValueError(f"Prometheus query failed: {data.get('error', 'unknown error')}")
+        return data['data']['result']
+
+    def query_range(self, query, start, end, step, timeout=None, deadline=None):
+        """
+        Run a PromQL range query.
+
+        Args:
+            query: PromQL expression
+            start: Range start as epoch seconds
+            end: Range end as epoch seconds
+            step: Resolution in seconds
+
+        Returns:
+            The ``data.result`` matrix of the response
+        """
+        params = {'query': query, 'start': start, 'end': end, 'step': step}
+        response = self.get('/api/v1/query_range', params=params, timeout=timeout, deadline=deadline)
+        response.raise_for_status()
+        data = response.json()
+        if data.get('status') != 'success':
+            raise ValueError(f"Prometheus query failed: {data.get('error', 'unknown error')}")
+        return data['data']['result']
+
+    def stats(self):
+        """Return a copy of the per-endpoint request, error, retry and latency counters."""
+        with self._stats_lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_prometheus_client(base_url):
+    """Return the process-wide client for ``base_url``, creating it on first use."""
+    key = base_url.rstrip('/')
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = PrometheusClient(base_url)
+        return _clients[key]
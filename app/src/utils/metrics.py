@@ -1,98 +1,290 @@
 """Utility functions for fetching service metrics from Prometheus."""
-import requests
 from datetime import datetime, timedelta
+import math
 import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.utils.cache import SWRCache
+from src.utils.columnar import COLUMNAR_STORE
+from src.utils.downsample import lttb
+from src.utils.forecast import time_to_threshold
+from src.utils.http_client import get_prometheus_client
+from src.utils.query_executor import get_query_executor
+from src.utils.query_planner import label_matcher
+from src.utils.series_store import MetricsPoller, SeriesStore
+from src.utils.service_catalog import ServiceCatalog
 
 PROMETHEUS_URL = os.getenv('PROMETHEUS_URL', 'http://localhost:9090')
+SCRAPE_INTERVAL = float(os.getenv('PROMETHEUS_SCRAPE_INTERVAL', '15'))
+# Prometheus refuses range queries returning more than 11,000 points per series
+MAX_POINTS_PER_SERIES = 11000
+
+# PromQL for the per-service history charts
+SERVICE_HISTORY_QUERIES = {
+    "response_time": 'avg by (service) (rate(http_request_duration_seconds_sum{{service="{service}"}}[5m])) * 1000',
+    "load": 'avg by (service) (rate(process_cpu_seconds_total{{service="{service}"}}[5m])) * 100',
+}
+
+# kube-state-metrics series behind each column of the deployment health table
+DEPLOYMENT_REPLICA_METRICS = {
+    "desired": "kube_deployment_spec_replicas",
+    "available": "kube_deployment_status_replicas_available",
+    "ready": "kube_deployment_status_replicas_ready",
+    "updated": "kube_deployment_status_replicas_updated",
+}
+
+# Capacity forecasts: usage query, limit query, fraction of the limit that counts
+# as exhausted, and the labels identifying one resource
+CAPACITY_RESOURCES = {
+    "disk": (
+        'sum by (namespace, persistentvolumeclaim) (kubelet_volume_stats_used_bytes)',
+        'sum by (namespace, persistentvolumeclaim) (kubelet_volume_stats_capacity_bytes)',
+        0.9,
+        ("namespace", "persistentvolumeclaim"),
+    ),
+    "memory": (
+        'sum by (namespace, pod, container) (container_memory_working_set_bytes{container!=""})',
+        'sum by (namespace, pod, container) (container_spec_memory_limit_bytes{container!=""})',
+        0.9,
+        ("namespace", "pod", "container"),
+    ),
+    "replicas": (
+        'max by (namespace, horizontalpodautoscaler) (kube_horizontalpodautoscaler_status_current_replicas)',
+        'max by (namespace, horizontalpodautoscaler) (kube_horizontalpodautoscaler_spec_max_replicas)',
+        1.0,
+        ("namespace", "horizontalpodautoscaler"),
+    ),
+}
+CAPACITY_FORECAST_DAYS = float(os.getenv('CAPACITY_FORECAST_DAYS', '7'))
+CAPACITY_FORECAST_STEP = float(os.getenv('CAPACITY_FORECAST_STEP', '3600'))
+CAPACITY_FORECAST_DEADLINE = float(os.getenv('CAPACITY_FORECAST_DEADLINE', '30'))
+
+# Shared by every dashboard session so concurrent viewers don't multiply Prometheus load
+METRICS_CACHE = SWRCache(
+    ttl=float(os.getenv('METRICS_CACHE_TTL', '15')),
+    stale_ttl=float(os.getenv('METRICS_CACHE_STALE_TTL', '60')),
+)
+
+# Forecasts read days of history, so they are refreshed far less often
+FORECAST_CACHE = SWRCache(
+    ttl=float(os.getenv('CAPACITY_FORECAST_TTL', '300')),
+    stale_ttl=float(os.getenv('CAPACITY_FORECAST_STALE_TTL', '900')),
+)
+
+# Fleet-wide tables are spilled to local columnar files; one this fresh is
+# served on the first render after a restart instead of re-querying
+COLUMNAR_SPILL_MAX_AGE = float(os.getenv('COLUMNAR_SPILL_MAX_AGE', '900'))
+# Status categories of the service health table
+SERVICE_STATUSES = ["Healthy", "Degraded", "Unknown", "Error"]
+
+def _client():
+    return get_prometheus_client(PROMETHEUS_URL)
+
+def run_queries(queries, deadline=None):
+    """
+    Run independent PromQL queries concurrently and wait for all of them.
+
+    Args:
+        queries: PromQL strings, or dictionaries with ``query``, ``start``,
+            ``end`` and ``step`` for range queries
+        deadline: Seconds each query may take (default: PROMETHEUS_QUERY_DEADLINE)
+
+    Returns:
+        List of ``data.result`` values, in input order; a failed or timed-out
+        query gives its exception instead
+    """
+    return get_query_executor(PROMETHEUS_URL).run(queries, deadline)
+
+# Service membership is refreshed in the background rather than on every render
+SERVICE_CATALOG = ServiceCatalog(_client)
 
 def get_all_services():
     """Get list of all monitored services from Prometheus."""
     try:
-        # Query Prometheus for all services with up metric
-        query = 'up'
-        response = requests.get(f'{PROMETHEUS_URL}/api/v1/query', params={'query': query})
-        response.raise_for_status()
-        
-        services = []
-        data = response.json()
-        if data['status'] == 'success' and data['data']['result']:
-            for result in data['data']['result']:
-                service = result['metric'].get('service', '')
-                if service and service not in services:
-                    services.append(service)
-        
-        return sorted(services)
+        SERVICE_CATALOG.ensure_loaded()
+        return SERVICE_CATALOG.services()
     except Exception as e:
         print(f"Error fetching services: {str(e)}")
         return []
 
-def get_service_metrics(service):
-    """Get metrics for a specific service."""
-    try:
-        metrics = {
-            "status": "Unknown",
-            "response_time": 0,
-            "load": 0.0
+def _escape(value):
+    """Escape a value for use inside a double-quoted PromQL string."""
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+def _service_selector(services):
+    """Build a label matcher restricting a query to ``services`` (all services if None)."""
+    if services is None:
+        return 'service!=""'
+    return label_matcher("service", services)
+
+def _by_service(result):
+    """Split a ``by (service)`` vector result into {service: value}."""
+    return {series['metric'].get('service', ''): float(series['value'][1]) for series in result}
+
+@METRICS_CACHE.cached
+def get_all_service_metrics(services=None):
+    """
+    Get metrics for many services with one query per metric.
+
+    Each query aggregates ``by (service)`` and the vector result is split
+    locally, so the number of requests doesn't grow with the number of services.
+
+    Args:
+        services: Services to fetch (default: every service Prometheus knows)
+
+    Returns:
+        Dictionary of service name to {"status", "response_time", "load"}
+    """
+    if services is not None and not services:
+        return {}
+    return _service_metrics_from(run_queries(_service_metric_queries(services)), services)
+
+def _service_metric_queries(services):
+    selector = _service_selector(services)
+    return [
+        # A service is healthy only if all of its targets are up
+        f'min by (service) (up{{{selector}}})',
+        f'avg by (service) (rate(http_request_duration_seconds_sum{{{selector}}}[5m]))',
+        f'avg by (service) (rate(process_cpu_seconds_total{{{selector}}}[5m]))',
+    ]
+
+def _service_metrics_from(results, services):
+    """Build the get_all_service_metrics dictionary from its three query results (or exceptions)."""
+    up, response_times, loads = results
+    if isinstance(up, Exception):
+        raise up
+    up = _by_service(up)
+    # Response time and load are optional; show zeros if they are unavailable
+    response_times = {} if isinstance(response_times, Exception) else _by_service(response_times)
+    loads = {} if isinstance(loads, Exception) else _by_service(loads)
+
+    names = services if services is not None else sorted(set(up) | set(response_times) | set(loads))
+    metrics = {}
+    for service in names:
+        status = "Unknown"
+        if service in up:
+            status = "Healthy" if up[service] == 1 else "Degraded"
+        metrics[service] = {
+            "status": status,
+            "response_time": int(response_times.get(service, 0) * 1000),  # Convert to ms
+            "load": loads.get(service, 0.0) * 100  # Convert to percentage
         }
-        
-        # Check service health
-        up_query = f'up{{service="{service}"}}'
-        response = requests.get(f'{PROMETHEUS_URL}/api/v1/query', params={'query': up_query})
-        response.raise_for_status()
-        data = response.json()
-        
-        if data['status'] == 'success' and data['data']['result']:
-            value = float(data['data']['result'][0]['value'][1])
-            metrics["status"] = "Healthy" if value == 1 else "Degraded"
-        
-        # Get average response time (if available)
-        rt_query = f'rate(http_request_duration_seconds_sum{{service="{service}"}}[5m])'
-        response = requests.get(f'{PROMETHEUS_URL}/api/v1/query', params={'query': rt_query})
-        if response.ok:
-            data = response.json()
-            if data['status'] == 'success' and data['data']['result']:
-                metrics["response_time"] = int(float(data['data']['result'][0]['value'][1]) * 1000)  # Convert to ms
-        
-        # Get CPU load
-        load_query = f'rate(process_cpu_seconds_total{{service="{service}"}}[5m])'
-        response = requests.get(f'{PROMETHEUS_URL}/api/v1/query', params={'query': load_query})
-        if response.ok:
-            data = response.json()
-            if data['status'] == 'success' and data['data']['result']:
-                metrics["load"] = float(data['data']['result'][0]['value'][1]) * 100  # Convert to percentage
-        
+    return metrics
+
+def plan_service_metrics(planner, services=None, widget=None):
+    """
+    Register the queries of ``get_all_service_metrics(services)`` with a QueryPlanner.
+
+    Nothing is registered if the shared cache already holds a fresh result.
+
+    Returns:
+        Zero-argument callable returning the metrics dictionary once the
+        planner has executed; the result is stored in the shared cache
+    """
+    cached = get_all_service_metrics.peek(services)
+    if cached is not None or (services is not None and not services):
+        return lambda: cached if cached is not None else {}
+    handles = [planner.register(query, widget) for query in _service_metric_queries(services)]
+
+    def result():
+        metrics = _service_metrics_from([handle.value for handle in handles], services)
+        get_all_service_metrics.put(metrics, services)
         return metrics
-    except Exception as e:
-        print(f"Error fetching metrics for {service}: {str(e)}")
-        return {
-            "status": "Error",
-            "response_time": 0,
-            "load": 0.0
-        }
+    return result
+
+@METRICS_CACHE.cached
+def get_service_metrics(service):
+    """
+    Get metrics for a specific service.
+
+    Errors propagate rather than being cached; callers supply their own fallback.
+    """
+    return get_all_service_metrics([service])[service]
+
+@METRICS_CACHE.cached
+@COLUMNAR_STORE.spilled("service_health", max_age=COLUMNAR_SPILL_MAX_AGE)
+def get_service_health_table(services=None):
+    """
+    Get the metrics of many services as a typed table.
+
+    Returns:
+        DataFrame with columns ``service``, ``status`` (categorical over
+        SERVICE_STATUSES), ``response_time`` (ms) and ``load`` (%)
+    """
+    metrics = get_all_service_metrics(services)
+    names = list(metrics)
+    return pd.DataFrame({
+        "service": names,
+        "status": pd.Categorical([metrics[name]["status"] for name in names], categories=SERVICE_STATUSES),
+        "response_time": np.fromiter((metrics[name]["response_time"] for name in names), dtype=np.int32, count=len(names)),
+        "load": np.fromiter((metrics[name]["load"] for name in names), dtype=float, count=len(names)),
+    })
 
-def get_deployment_status(deployment_name):
-    """Get the current status of a deployment."""
+@METRICS_CACHE.cached
+@COLUMNAR_STORE.spilled("deployment_health", max_age=COLUMNAR_SPILL_MAX_AGE)
+def get_deployment_health():
+    """
+    Get replica counts for every deployment in every namespace.
+
+    Issues one ``by (namespace, deployment)`` query per replica metric, all
+    concurrently, and joins the vectors locally.
+
+    Returns:
+        DataFrame with columns ``namespace``, ``deployment``, ``desired``,
+        ``available``, ``ready``, ``updated`` and ``status`` ("healthy",
+        "degraded" or "down"), degraded and down deployments first
+    """
+    results = run_queries([
+        f'max by (namespace, deployment) ({metric})' for metric in DEPLOYMENT_REPLICA_METRICS.values()
+    ])
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    index = {}
+    columns = {name: [] for name in DEPLOYMENT_REPLICA_METRICS}
+    for name, result in zip(DEPLOYMENT_REPLICA_METRICS, results):
+        values = columns[name]
+        for series in result:
+            key = (series['metric'].get('namespace', ''), series['metric'].get('deployment', ''))
+            row = index.setdefault(key, len(index))
+            values.extend([0] * (row + 1 - len(values)))
+            values[row] = int(float(series['value'][1]))
+
+    keys = list(index)
+    table = pd.DataFrame({
+        "namespace": pd.Categorical([key[0] for key in keys]),
+        "deployment": [key[1] for key in keys],
+        **{name: np.pad(np.asarray(values, dtype=np.int32), (0, len(keys) - len(values)))
+           for name, values in columns.items()},
+    })
+    table["status"] = np.select(
+        [(table["available"] == 0) & (table["desired"] > 0), table["available"] < table["desired"]], ["down", "degraded"], "healthy"
+    )
+    order = table["status"].map({"down": 0, "degraded": 1, "healthy": 2})
+    table = table.assign(_order=order).sort_values(["_order", "namespace", "deployment"]).drop(columns="_order")
+    return table.reset_index(drop=True)
+
+def get_deployment_status(deployment_name, namespace=None):
+    """Get the current status of a deployment, from the fleet-wide health table."""
     try:
-        # Query for deployment replicas
-        query = f'kube_deployment_status_replicas{{deployment="{deployment_name}"}}'
-        response = requests.get(f'{PROMETHEUS_URL}/api/v1/query', params={'query': query})
-        response.raise_for_status()
-        data = response.json()
+        table = get_deployment_health()
+        rows = table[table["deployment"] == deployment_name]
+        if namespace is not None:
+            rows = rows[rows["namespace"] == namespace]
 
-        if not data['data']['result']:
+        if rows.empty:
             return {
                 "status": "unknown",
                 "message": f"Deployment {deployment_name} not found",
                 "replicas": {"desired": 0, "available": 0}
             }
 
-        # Get available and desired replicas
-        available_query = f'kube_deployment_status_replicas_available{{deployment="{deployment_name}"}}'
-        available_response = requests.get(f'{PROMETHEUS_URL}/api/v1/query', params={'query': available_query})
-        available_data = available_response.json()
-
-        desired = int(float(data['data']['result'][0]['value'][1]))
-        available = int(float(available_data['data']['result'][0]['value'][1])) if available_data['data']['result'] else 0
+        desired = int(rows["desired"].sum())
+        available = int(rows["available"].sum())
 
         if available == desired:
             return {
@@ -114,3 +306,206 @@ def get_deployment_status(deployment_name):
             "message": f"Error fetching status: {str(e)}",
             "replicas": {"desired": 0, "available": 0}
         }
+
+def choose_step(start, end, width_px=800, min_step=None):
+    """
+    Pick a range-query step giving roughly one point per horizontal pixel.
+
+    The step is never finer than the scrape interval (finer steps only
+    repeat samples) and never so fine that Prometheus would reject the query.
+    """
+    min_step = SCRAPE_INTERVAL if min_step is None else min_step
+    span = max(end - start, 0)
+    step = max(min_step, span / max(width_px, 1), span / MAX_POINTS_PER_SERIES)
+    return float(math.ceil(step))
+
+def _matrix_to_series(result):
+    series = []
+    for item in result:
+        samples = np.array(item.get('values', []), dtype=object).reshape(-1, 2)
+        series.append({
+            "metric": item.get('metric', {}),
+            "timestamps": samples[:, 0].astype(float),
+            "values": samples[:, 1].astype(float),
+        })
+    return series
+
+@METRICS_CACHE.cached
+def _range_query(query, start, end, step):
+    return _matrix_to_series(_client().query_range(query, start, end, step))
+
+def get_range_series(query, start=None, end=None, width_px=800, max_points=None):
+    """
+    Run a range query sized for a chart ``width_px`` pixels wide.
+
+    Start and end are aligned to the chosen step, so repeated renders hit the
+    shared cache, and any series still denser than ``max_points`` (default:
+    ``width_px``) is reduced with LTTB before it reaches the browser.
+
+    Args:
+        query: PromQL expression
+        start: Range start as epoch seconds (default: 1 hour before end)
+        end: Range end as epoch seconds (default: now)
+        width_px: Chart width in pixels
+        max_points: Maximum points per returned series
+
+    Returns:
+        List of {"metric", "timestamps", "values"} dictionaries with numpy arrays
+    """
+    start, end, step = _range_window(start, end, width_px)
+    return _downsample(_range_query(query, start, end, step), width_px if max_points is None else max_points)
+
+def _range_window(start, end, width_px):
+    """Return (start, end, step) for a chart ``width_px`` wide, aligned to the step."""
+    end = time.time() if end is None else end
+    start = end - 3600 if start is None else start
+    step = choose_step(start, end, width_px)
+    return math.floor(start / step) * step, math.ceil(end / step) * step, step
+
+def _downsample(series, max_points):
+    reduced = []
+    for item in series:
+        timestamps, values = item["timestamps"], item["values"]
+        if len(timestamps) > max_points:
+            timestamps, values = lttb(timestamps, values, max_points)
+        reduced.append({"metric": item["metric"], "timestamps": timestamps, "values": values})
+    return reduced
+
+# Recent samples of every service, kept in memory for sparklines and trends
+SERIES_STORE = SeriesStore(
+    max_services=int(os.getenv('SERIES_STORE_MAX_SERVICES', '1000')),
+    capacity=int(os.getenv('SERIES_STORE_CAPACITY', '240')),
+)
+METRICS_POLLER = MetricsPoller(lambda: get_all_service_metrics.uncached(), SERIES_STORE, interval=SCRAPE_INTERVAL)
+SERVICE_CATALOG.subscribe(lambda added, removed: SERIES_STORE.remove(removed))
+
+def start_metrics_poller():
+    """Start sampling all services into SERIES_STORE every scrape interval, once per process."""
+    METRICS_POLLER.start()
+
+def get_service_history(service, metric, days=7, width_px=800):
+    """
+    Get the history of ``metric`` (``response_time`` in ms or ``load`` in %) for a service.
+
+    Returns:
+        Tuple of (timestamps, values) numpy arrays; empty if there is no data
+    """
+    query = SERVICE_HISTORY_QUERIES[metric].format(service=_escape(service))
+    end = time.time()
+    return _history_from(get_range_series(query, start=end - days * 86400, end=end, width_px=width_px))
+
+def _history_from(series):
+    if not series:
+        return np.zeros(0), np.zeros(0)
+    return series[0]["timestamps"], series[0]["values"]
+
+def plan_service_history(planner, service, metric, days=7, width_px=800, widget=None):
+    """
+    Register the range query of ``get_service_history`` with a QueryPlanner.
+
+    Returns:
+        Zero-argument callable returning (timestamps, values) once the
+        planner has executed, like ``get_service_history``
+    """
+    query = SERVICE_HISTORY_QUERIES[metric].format(service=_escape(service))
+    end = time.time()
+    start, end, step = _range_window(end - days * 86400, end, width_px)
+    cached = _range_query.peek(query, start, end, step)
+    if cached is None:
+        handle = planner.register({"query": query, "start": start, "end": end, "step": step}, widget)
+
+    def result():
+        series = cached
+        if series is None:
+            series = _matrix_to_series(handle.result())
+            _range_query.put(series, query, start, end, step)
+        return _history_from(_downsample(series, width_px))
+    return result
+
+def _deployment_of(resource, labels):
+    """Best-effort owning deployment of a capacity resource, for remediation."""
+    if resource == "memory":
+        # Deployment pods are named <deployment>-<replicaset hash>-<suffix>
+        parts = labels.get("pod", "").rsplit("-", 2)
+        return parts[0] if len(parts) == 3 else labels.get("container", "")
+    if resource == "replicas":
+        # HPAs are conventionally named after the deployment they scale
+        return labels.get("horizontalpodautoscaler", "")
+    return ""
+
+@FORECAST_CACHE.cached
+@COLUMNAR_STORE.spilled("capacity_forecasts", max_age=COLUMNAR_SPILL_MAX_AGE)
+def get_capacity_forecasts(days=CAPACITY_FORECAST_DAYS, step=CAPACITY_FORECAST_STEP):
+    """
+    Forecast when every volume, container memory limit and HPA runs out.
+
+    Fetches ``days`` of usage history at ``step`` resolution with one range
+    query per resource type (plus one instant query for the limits), then
+    fits all series of a type at once (robust linear and Holt-Winters with
+    a daily season).
+
+    Returns:
+        DataFrame with one row per resource: ``resource`` (disk, memory or
+        replicas), ``namespace``, ``name``, ``deployment``, ``current``,
+        ``limit``, ``utilization``, ``seconds_to_threshold`` (inf if not
+        heading there) and ``r_squared``, soonest first
+
+    Raises:
+        Exception: the first error of the underlying queries
+    """
+    end = math.floor(time.time() / step) * step
+    start = end - days * 86400
+    grid = start + np.arange(int(round((end - start) / step)) + 1) * step
+    queries = []
+    for usage, limit, _, _ in CAPACITY_RESOURCES.values():
+        queries.append({"query": usage, "start": start, "end": end, "step": step})
+        queries.append(limit)
+    # Failures propagate, so the caches and the spilled table keep the last good forecasts
+    results = run_queries(queries, deadline=CAPACITY_FORECAST_DEADLINE)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    frames = []
+    for k, (resource, (_, _, fraction, keys)) in enumerate(CAPACITY_RESOURCES.items()):
+        usage, limits = _matrix_to_series(results[2 * k]), results[2 * k + 1]
+        limit_by_key = {tuple(item['metric'].get(key, '') for key in keys): float(item['value'][1]) for item in limits}
+        series = [item for item in usage
+                  if limit_by_key.get(tuple(item["metric"].get(key, '') for key in keys), 0) > 0]
+        if not series:
+            continue
+
+        matrix = np.full((len(series), len(grid)), np.nan)
+        for row, item in enumerate(series):
+            index = np.rint((item["timestamps"] - start) / step).astype(np.intp)
+            keep = (index >= 0) & (index < len(grid))
+            matrix[row, index[keep]] = item["values"][keep]
+        limit = np.array([limit_by_key[tuple(item["metric"].get(key, '') for key in keys)] for item in series])
+
+        forecast = time_to_threshold(grid, matrix, fraction * limit, season_length=int(round(86400 / step)))
+        labels = [item["metric"] for item in series]
+        frames.append(pd.DataFrame({
+            "resource": resource,
+            "namespace": [item.get("namespace", "") for item in labels],
+            "name": ["/".join(item.get(key, '') for key in keys[1:]) for item in labels],
+            "deployment": [_deployment_of(resource, item) for item in labels],
+            "current": forecast["current"],
+            "limit": limit,
+            "utilization": forecast["current"] / limit,
+            "seconds_to_threshold": forecast["seconds"],
+            "r_squared": forecast["r_squared"],
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=["resource", "namespace", "name", "deployment", "current", "limit",
+                                     "utilization", "seconds_to_threshold", "r_squared"])
+    table = pd.concat(frames, ignore_index=True)
+    return table.sort_values("seconds_to_threshold", kind="stable").reset_index(drop=True)
+
+def get_cache_stats():
+    """Get hit/miss/refresh counters for the shared metrics cache."""
+    return METRICS_CACHE.stats()
+
+def get_prometheus_stats():
+    """Get per-endpoint request, error and latency counters for Prometheus calls."""
+    return _client().stats()
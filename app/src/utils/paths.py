@@ -0,0 +1,11 @@
+"""Where the responder keeps its local state (alert history, caches, spilled tables)."""
+import os
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Anchored to the app rather than the working directory, so every launch shares the same state
+RESPONDER_DATA_DIR = os.environ.get("RESPONDER_DATA_DIR", os.path.join(APP_DIR, "data"))
+
+
+def data_path(name):
+    """Path of ``name`` inside RESPONDER_DATA_DIR."""
+    return os.path.join(RESPONDER_DATA_DIR, name)
@@ -0,0 +1,112 @@
+"""
+Concurrent fan-out of Prometheus queries that can't be merged into one expression.
+
+Queries run on asyncio with at most ``max_concurrency`` in flight and a
+deadline per query, over the shared pooled client. Streamlit code calls the
+synchronous :meth:`QueryExecutor.run`, which returns once every query has
+finished or hit its deadline, so N independent queries cost roughly one
+round trip instead of N.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.utils.http_client import PROMETHEUS_POOL_SIZE, PROMETHEUS_TIMEOUT, get_prometheus_client
+
+PROMETHEUS_MAX_CONCURRENCY = int(os.getenv('PROMETHEUS_MAX_CONCURRENCY', '8'))
+PROMETHEUS_QUERY_DEADLINE = float(os.getenv('PROMETHEUS_QUERY_DEADLINE', str(PROMETHEUS_TIMEOUT)))
+
+
+class QueryExecutor:
+    """
+    Run many PromQL queries against one server concurrently.
+
+    A query is either a PromQL string (instant query) or a dictionary with
+    ``query``, ``start``, ``end`` and ``step`` keys (range query). Results
+    come back in input order; a query that failed or missed its deadline
+    yields its exception in place of a result (``asyncio.TimeoutError`` for
+    a missed deadline).
+    """
+
+    def __init__(self, client, max_concurrency=PROMETHEUS_MAX_CONCURRENCY, deadline=PROMETHEUS_QUERY_DEADLINE):
+        self.client = client
+        # More in-flight requests than pooled connections would just queue inside requests
+        self.max_concurrency = max(1, min(max_concurrency, PROMETHEUS_POOL_SIZE))
+        self.deadline = deadline
+        # Outlives each run's event loop: asyncio.run joins the default executor's threads on
+        # the way out, which would make run() wait for calls it has already given up on
+        self._threads = ThreadPoolExecutor(max_workers=PROMETHEUS_POOL_SIZE, thread_name_prefix="prometheus-query")
+
+    def _call(self, query, expires_at):
+        # Retries and their backoff share the query's deadline rather than each getting all of it
+        if isinstance(query, dict):
+            return self.client.query_range(query['query'], query['start'], query['end'], query['step'],
+                                           timeout=expires_at - time.monotonic(), deadline=expires_at)
+        return self.client.query(query, timeout=expires_at - time.monotonic(), deadline=expires_at)
+
+    async def _run_one(self, semaphore, query, expires_at):
+        async with semaphore:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"Deadline passed before query started: {query}")
+            # The client's deadline stops the worker thread; wait_for stops us waiting on it
+            call = asyncio.get_running_loop().run_in_executor(self._threads, self._call, query, expires_at)
+            try:
+                return await asyncio.wait_for(call, remaining)
+            except requests.Timeout as e:
+                # Every attempt's timeout is cut to the deadline, so this is the deadline too
+                raise asyncio.TimeoutError(f"Deadline passed during query: {query}") from e
+
+    async def query_all(self, queries, deadline=None):
+        """
+        Run ``queries`` concurrently.
+
+        Args:
+            queries: PromQL strings or range-query dictionaries
+            deadline: Seconds each query may take, counted from this call,
+                including time spent waiting for a concurrency slot
+
+        Returns:
+            List of results or exceptions, in the order of ``queries``
+        """
+        deadline = self.deadline if deadline is None else deadline
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        expires_at = time.monotonic() + deadline
+        return await asyncio.gather(
+            *(self._run_one(semaphore, query, expires_at) for query in queries),
+            return_exceptions=True,
+        )
+
+    def run(self, queries, deadline=None):
+        """Synchronous :meth:`query_all` for callers without an event loop."""
+        queries = list(queries)
+        if not queries:
+            return []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.query_all(queries, deadline))
+
+        # Called from inside a running loop (e.g. a FastAPI handler): use a private one
+        results = []
+        thread = threading.Thread(target=lambda: results.append(asyncio.run(self.query_all(queries, deadline))))
+        thread.start()
+        thread.join()
+        return results[0]
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_query_executor(base_url):
+    """Return the process-wide executor for ``base_url``, creating it on first use."""
+    key = base_url.rstrip('/')
+    with _executors_lock:
+        if key not in _executors:
+            _executors[key] = QueryExecutor(get_prometheus_client(base_url))
+        return _executors[key]
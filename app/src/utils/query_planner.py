@@ -0,0 +1,321 @@
+"""
+Per-render PromQL request planner.
+
+Widgets register the queries they need while a page renders, then one
+:meth:`QueryPlanner.execute` issues the smallest set of requests that
+answers all of them and hands each widget its slice:
+
+- identical queries (same expression and range) are issued once;
+- queries that differ only in an equality matcher on one mergeable label,
+  e.g. ``up{service="a"}`` and ``up{service="b"}``, become one query
+  matching ``service=~"a|b"``, with the label added to the ``by (...)``
+  clause of an aggregation so every widget's series can be told apart;
+- if the fleet-wide form of such a query (the label matched with ``!=""``)
+  is registered too, they are sliced out of its result instead.
+
+Only simple shapes are merged: an optional aggregation with ``by``, single
+argument label-preserving functions, one selector and an optional scalar
+factor. Anything else is deduplicated and issued as is.
+
+The planner also counts what a render costs: registered, unique and
+issued queries, and the series and samples Prometheus returned.
+"""
+import re
+import time
+
+MERGE_LABELS = ("service", "deployment", "namespace", "job", "instance", "pod")
+
+_AGGREGATIONS = {"sum", "avg", "min", "max", "count", "group", "stddev", "stdvar"}
+# Functions of one vector argument that keep every label of their input
+_LABEL_PRESERVING = {
+    "rate", "irate", "increase", "delta", "idelta", "deriv", "resets", "changes",
+    "abs", "ceil", "floor", "exp", "ln", "log2", "log10", "sqrt",
+    "avg_over_time", "min_over_time", "max_over_time", "sum_over_time", "count_over_time",
+    "last_over_time", "stddev_over_time", "stdvar_over_time",
+}
+_FACTOR = re.compile(r'\s*[*/]\s*[0-9.]+$')
+_AGGREGATION = re.compile(r'^([a-z]+)\s*(?:by\s*\(([\w\s,]*)\)\s*)?\((.*)\)$', re.S)
+_BODY = re.compile(
+    r'^(?P<functions>(?:[a-z_]+\s*\(\s*)*)(?P<metric>[a-zA-Z_:][\w:]*)\s*(?:\{(?P<matchers>[^{}]*)\})?'
+    r'\s*(?P<range>\[\w+\])?\s*(?P<closing>(?:\)\s*)*)$'
+)
+_MATCHER = re.compile(r'\s*([a-zA-Z_]\w*)\s*(=~|!~|!=|=)\s*"((?:[^"\\]|\\.)*)"\s*(?:,|$)')
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _unescape(value):
+    return re.sub(r'\\(.)', r'\1', value)
+
+
+def label_matcher(label, values):
+    """Build a matcher for ``label`` equal to any of ``values``: ``=`` for one value, an anchored ``=~`` otherwise."""
+    values = list(values)
+    if len(values) == 1:
+        return f'{label}="{_escape(values[0])}"'
+    # Escape regex metacharacters, then escape the backslashes for the PromQL string literal
+    pattern = "|".join(_escape(re.sub(r'([.*+?^${}()|\[\]\\])', r'\\\1', value)) for value in values)
+    return f'{label}=~"{pattern}"'
+
+
+def _parse_matchers(text):
+    """Split ``a="x", b=~"y"`` into ((label, op, raw value), ...), or None if it doesn't parse."""
+    matchers = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _MATCHER.match(text, position)
+        if match is None:
+            return None
+        matchers.append(match.groups())
+        position = match.end()
+    return tuple(matchers)
+
+
+class _Shape:
+    """A parsed mergeable query: ``agg by (by) (f1(f2(metric{matchers}[range])))`` times ``factor``."""
+
+    __slots__ = ("agg", "by", "functions", "metric", "matchers", "range", "factor")
+
+    @classmethod
+    def parse(cls, query):
+        query = query.strip()
+        factor = _FACTOR.search(query)
+        if factor is not None:
+            query = query[:factor.start()]
+        agg, by = None, ""
+        aggregation = _AGGREGATION.match(query)
+        if aggregation is not None and aggregation.group(1) in _AGGREGATIONS:
+            agg, by, query = aggregation.group(1), aggregation.group(2) or "", aggregation.group(3)
+        body = _BODY.match(query.strip())
+        if body is None:
+            return None
+        functions = tuple(re.findall(r'([a-z_]+)\s*\(', body.group("functions")))
+        if any(name not in _LABEL_PRESERVING for name in functions) or body.group("closing").count(")") != len(functions):
+            return None
+        matchers = _parse_matchers(body.group("matchers") or "")
+        if matchers is None:
+            return None
+
+        shape = cls()
+        shape.agg = agg
+        shape.by = tuple(label.strip() for label in by.split(",") if label.strip())
+        shape.functions = functions
+        shape.metric = body.group("metric")
+        shape.matchers = matchers
+        shape.range = body.group("range") or ""
+        shape.factor = re.sub(r'\s+', '', factor.group(0)) if factor is not None else ""
+        return shape
+
+    def render(self, matchers, by):
+        selector = f'{self.metric}{{{", ".join(matchers)}}}{self.range}'
+        expression = "".join(f"{name}(" for name in self.functions) + selector + ")" * len(self.functions)
+        if self.agg is not None:
+            expression = f'{self.agg} by ({", ".join(by)}) ({expression})'
+        return f"{expression} {self.factor[0]} {self.factor[1:]}" if self.factor else expression
+
+    def canonical(self):
+        """The query re-rendered with normalised spacing, for spotting duplicates."""
+        return self.render([f'{name}{op}"{value}"' for name, op, value in self.matchers], self.by)
+
+    def merge_key(self, labels):
+        """Return (label, value, template) for the first equality matcher on one of ``labels``, or None."""
+        for label in labels:
+            for i, (name, op, value) in enumerate(self.matchers):
+                if name == label and op == "=":
+                    rest = tuple(sorted(self.matchers[:i] + self.matchers[i + 1:]))
+                    return label, _unescape(value), (self.agg, self.by, self.functions, self.metric, rest,
+                                                     self.range, self.factor, label)
+        return None
+
+    def fleet_keys(self, labels):
+        """Templates this query answers for every value of a label it matches with ``!=""``."""
+        if any(name in labels and op == "=" for name, op, _ in self.matchers):
+            return []
+        keys = []
+        for i, (name, op, value) in enumerate(self.matchers):
+            if name in labels and op == "!=" and value == "" and (self.agg is None or name in self.by):
+                rest = tuple(sorted(self.matchers[:i] + self.matchers[i + 1:]))
+                keys.append((self.agg, self.by, self.functions, self.metric, rest, self.range, self.factor, name))
+        return keys
+
+
+class _Request:
+    __slots__ = ("query", "range", "shape", "handles", "value", "source", "label", "label_value", "drop_label")
+
+    def __init__(self, query, range_params, shape=None):
+        self.query = query
+        self.range = range_params
+        self.shape = shape
+        self.handles = []
+        self.value = None
+        # Set when this request is answered from another request's result
+        self.source = None
+        self.label = self.label_value = None
+        self.drop_label = False
+
+
+class PlannedQuery:
+    """Handle a widget gets back from :meth:`QueryPlanner.register`."""
+
+    __slots__ = ("widget", "_request")
+
+    def __init__(self, widget, request):
+        self.widget = widget
+        self._request = request
+
+    @property
+    def value(self):
+        """The ``data.result`` list, or the exception the query failed with."""
+        if self._request.value is None:
+            raise RuntimeError("Query planner has not been executed yet")
+        return self._request.value
+
+    def result(self):
+        """Return the ``data.result`` list, raising the query's exception if it failed."""
+        value = self.value
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+def _samples(result):
+    return sum(len(item.get("values", ())) or 1 for item in result)
+
+
+class QueryPlanner:
+    """
+    Collect the queries of one render and issue them as few requests as possible.
+
+    Args:
+        run: Callable taking (queries, deadline) and returning results or
+            exceptions in order, e.g. ``metrics.run_queries``
+        merge_labels: Labels whose equality matchers may be merged, in order of preference
+    """
+
+    def __init__(self, run, merge_labels=MERGE_LABELS):
+        self.run = run
+        self.merge_labels = tuple(merge_labels)
+        self._requests = {}
+        self._pending = []
+        self.issued = []
+        self._stats = {"registered": 0, "unique": 0, "issued": 0, "series": 0, "samples": 0, "seconds": 0.0}
+        self._widgets = {}
+
+    def register(self, query, widget=None):
+        """
+        Register a query for the next :meth:`execute`.
+
+        Args:
+            query: PromQL string, or a dictionary with ``query``, ``start``,
+                ``end`` and ``step`` for a range query
+            widget: Name the query's cost is attributed to
+
+        Returns:
+            PlannedQuery whose result is available after :meth:`execute`
+        """
+        if isinstance(query, dict):
+            expression, range_params = query["query"], (query["start"], query["end"], query["step"])
+        else:
+            expression, range_params = query, None
+        shape = _Shape.parse(expression)
+        key = (shape.canonical() if shape is not None else " ".join(expression.split()), range_params)
+        request = self._requests.get(key)
+        if request is None:
+            request = self._requests[key] = _Request(expression, range_params, shape)
+            self._pending.append(request)
+            self._stats["unique"] += 1
+        handle = PlannedQuery(widget, request)
+        request.handles.append(handle)
+        self._stats["registered"] += 1
+        self._widgets.setdefault(widget, {"queries": 0, "series": 0})["queries"] += 1
+        return handle
+
+    def _plan(self, requests):
+        """Return the requests to issue, pointing every other request at the one that answers it."""
+        fleet = {}
+        for request in requests:
+            if request.shape is not None:
+                for template in request.shape.fleet_keys(self.merge_labels):
+                    fleet.setdefault((template, request.range), request)
+
+        groups = {}
+        direct = []
+        for request in requests:
+            key = request.shape.merge_key(self.merge_labels) if request.shape is not None else None
+            if key is None:
+                direct.append(request)
+                continue
+            label, value, template = key
+            request.label, request.label_value = label, value
+            groups.setdefault((template, request.range), []).append(request)
+
+        issued = list(direct)
+        for group_key, members in groups.items():
+            parent = fleet.get(group_key)
+            if parent is not None:
+                for request in members:
+                    request.source = parent
+                continue
+            if len(members) == 1:
+                members[0].label = None
+                issued.append(members[0])
+                continue
+
+            shape, label = members[0].shape, members[0].label
+            values = sorted({request.label_value for request in members})
+            by = shape.by
+            drop = shape.agg is not None and label not in by
+            if drop:
+                by = by + (label,)
+            rest = [f'{name}{op}"{value}"' for name, op, value in group_key[0][4]]
+            merged = _Request(shape.render(rest + [label_matcher(label, values)], by), members[0].range)
+            for request in members:
+                request.source = merged
+                request.drop_label = drop
+            issued.append(merged)
+        return issued
+
+    @staticmethod
+    def _slice(request):
+        value = request.source.value
+        if isinstance(value, Exception):
+            return value
+        series = [item for item in value if item.get("metric", {}).get(request.label) == request.label_value]
+        if request.drop_label:
+            series = [dict(item, metric={k: v for k, v in item["metric"].items() if k != request.label})
+                      for item in series]
+        return series
+
+    def execute(self, deadline=None):
+        """Issue every query registered since the last call and resolve their handles."""
+        requests, self._pending = self._pending, []
+        if not requests:
+            return
+        start = time.perf_counter()
+        issued = self._plan(requests)
+        queries = [
+            {"query": request.query, "start": request.range[0], "end": request.range[1], "step": request.range[2]}
+            if request.range else request.query
+            for request in issued
+        ]
+        for request, value in zip(issued, self.run(queries, deadline)):
+            request.value = value
+            if not isinstance(value, Exception):
+                self._stats["series"] += len(value)
+                self._stats["samples"] += _samples(value)
+        for request in requests:
+            if request.source is not None:
+                request.value = self._slice(request)
+            if not isinstance(request.value, Exception):
+                for handle in request.handles:
+                    self._widgets[handle.widget]["series"] += len(request.value)
+        self.issued.extend(queries)
+        self._stats["issued"] += len(queries)
+        self._stats["seconds"] += time.perf_counter() - start
+
+    def stats(self):
+        """Return the render's query counts, returned series and samples, time spent, and series per widget."""
+        return dict(self._stats, widgets={widget: dict(counts) for widget, counts in self._widgets.items()})
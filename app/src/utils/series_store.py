@@ -0,0 +1,262 @@
+"""
+In-process store of recent per-service metric samples.
+
+All samples live in one preallocated ``(services, metrics, capacity)``
+numpy array used as a ring buffer along the time axis, with one shared ring
+of tick timestamps, so memory is fixed at construction: 1000 services x 3
+metrics x 240 samples (1 hour at 15 s) of float32 is 2.9 MB. A background
+:class:`MetricsPoller` appends one tick for every service at a time.
+
+Reads copy into caller-supplied buffers or preallocated scratch space and
+never allocate in proportion to the history length.
+"""
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_METRICS = ("up", "response_time", "load")
+_STATUS_VALUES = {"Healthy": 1.0, "Degraded": 0.0}
+
+
+class SeriesStore:
+    """
+    Fixed-capacity ring buffers per (service, metric).
+
+    Args:
+        max_services: Number of service rows to preallocate; samples for
+            further services are dropped until rows are freed with :meth:`remove`
+        capacity: Samples kept per series
+        metrics: Metric names, in column order
+        dtype: Sample dtype
+    """
+
+    def __init__(self, max_services=1000, capacity=240, metrics=DEFAULT_METRICS, dtype=np.float32):
+        self.max_services = max_services
+        self.capacity = capacity
+        self.metrics = tuple(metrics)
+        self._metric_index = {name: i for i, name in enumerate(self.metrics)}
+        self._values = np.full((max_services, len(self.metrics), capacity), np.nan, dtype=dtype)
+        self._times = np.full(capacity, np.nan)
+        self._rows = {}
+        self._free = list(range(max_services - 1, -1, -1))
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        # Scratch space for percentile reads
+        self._scratch = np.empty(capacity, dtype=dtype)
+        self._scratch_nan = np.empty(capacity, dtype=bool)
+        self.dropped = 0
+
+    @property
+    def nbytes(self):
+        """Memory held by the sample and timestamp buffers."""
+        return self._values.nbytes + self._times.nbytes + self._scratch.nbytes + self._scratch_nan.nbytes
+
+    def __len__(self):
+        """Number of ticks currently held."""
+        return self._count
+
+    def services(self):
+        """Return the services that have a row."""
+        with self._lock:
+            return sorted(self._rows)
+
+    def _row(self, service):
+        row = self._rows.get(service)
+        if row is None and self._free:
+            row = self._free.pop()
+            self._values[row] = np.nan
+            self._rows[service] = row
+        return row
+
+    def record(self, timestamp, samples):
+        """
+        Append one tick.
+
+        Args:
+            timestamp: Epoch seconds of the tick
+            samples: {service: {metric: value}}, as returned by
+                ``get_all_service_metrics``; a ``status`` string is stored as
+                ``up`` (1 healthy, 0 degraded). Services or metrics missing
+                from the tick get NaN.
+        """
+        with self._lock:
+            head = self._head
+            self._values[:, :, head] = np.nan
+            self._times[head] = timestamp
+            for service, values in samples.items():
+                row = self._row(service)
+                if row is None:
+                    self.dropped += 1
+                    continue
+                if "status" in values and "up" in self._metric_index:
+                    self._values[row, self._metric_index["up"], head] = _STATUS_VALUES.get(values["status"], np.nan)
+                for name, value in values.items():
+                    column = self._metric_index.get(name)
+                    if column is not None and isinstance(value, (int, float)):
+                        self._values[row, column, head] = value
+            self._head = (head + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def remove(self, services):
+        """Free the rows of ``services`` (e.g. ones the service catalog reports as removed)."""
+        with self._lock:
+            for service in services:
+                row = self._rows.pop(service, None)
+                if row is not None:
+                    self._free.append(row)
+
+    def _copy_window(self, source, points, out):
+        """Copy the last ``points`` entries of ring ``source`` into ``out[:points]`` in time order."""
+        start = (self._head - points) % self.capacity
+        first = min(points, self.capacity - start)
+        out[:first] = source[start:start + first]
+        out[first:points] = source[:points - first]
+        return out[:points]
+
+    def _points(self, points):
+        return self._count if points is None else min(points, self._count)
+
+    def times(self, points=None, out=None):
+        """Return the last ``points`` tick timestamps (default: all held), oldest first."""
+        with self._lock:
+            points = self._points(points)
+            out = np.empty(points) if out is None else out
+            return self._copy_window(self._times, points, out)
+
+    def sparkline(self, service, metric, points=None, out=None):
+        """
+        Return the last ``points`` samples of one series, oldest first.
+
+        Pass ``out`` (at least ``points`` long) to avoid allocating; the
+        returned array is then a view of it. Unknown services give an empty array.
+        """
+        with self._lock:
+            row = self._rows.get(service)
+            points = self._points(points) if row is not None else 0
+            out = np.empty(points, dtype=self._values.dtype) if out is None else out
+            if row is None:
+                return out[:0]
+            return self._copy_window(self._values[row, self._metric_index[metric]], points, out)
+
+    def latest(self, service, metric):
+        """Return the most recent sample of one series, or NaN."""
+        with self._lock:
+            row = self._rows.get(service)
+            if row is None or not self._count:
+                return float("nan")
+            return float(self._values[row, self._metric_index[metric], (self._head - 1) % self.capacity])
+
+    def rate_of_change(self, service, metric, window=4):
+        """
+        Return the change per second of one series over the last ``window`` ticks, or NaN.
+
+        Computed from the two end samples only, so it is O(1).
+        """
+        with self._lock:
+            row = self._rows.get(service)
+            window = min(window, self._count - 1)
+            if row is None or window < 1:
+                return float("nan")
+            last = (self._head - 1) % self.capacity
+            first = (last - window) % self.capacity
+            series = self._values[row, self._metric_index[metric]]
+            elapsed = self._times[last] - self._times[first]
+            if not elapsed:
+                return float("nan")
+            return float((series[last] - series[first]) / elapsed)
+
+    def rolling_percentile(self, service, metric, q, window=None):
+        """
+        Return the ``q``-th percentile (0-100) of the last ``window`` samples, ignoring NaN.
+
+        Uses preallocated scratch space and an in-place partition (nearest
+        rank), so nothing is allocated per call.
+        """
+        with self._lock:
+            row = self._rows.get(service)
+            if row is None:
+                return float("nan")
+            points = self._points(window)
+            values = self._copy_window(self._values[row, self._metric_index[metric]], points, self._scratch)
+            nan = np.isnan(values, out=self._scratch_nan[:points])
+            valid = points - int(np.count_nonzero(nan))
+            if not valid:
+                return float("nan")
+            k = min(valid - 1, int(round(q / 100 * (valid - 1))))
+            # partition() orders NaN last, so the first ``valid`` entries are the real samples
+            values.partition(k)
+            return float(values[k])
+
+    def window(self, metric, points=None):
+        """
+        Return (services, matrix) with the last ``points`` samples of ``metric`` for every service.
+
+        The matrix has one row per service, oldest sample first, for
+        vectorised consumers.
+        """
+        with self._lock:
+            services = sorted(self._rows)
+            rows = np.fromiter((self._rows[service] for service in services), dtype=np.intp, count=len(services))
+            points = self._points(points)
+            start = (self._head - points) % self.capacity
+            order = (start + np.arange(points)) % self.capacity
+            return services, self._values[rows[:, None], self._metric_index[metric], order[None, :]]
+
+
+class MetricsPoller:
+    """
+    Background thread sampling every service's metrics into a SeriesStore.
+
+    Args:
+        fetch: Callable returning {service: {metric: value}}
+        store: SeriesStore to append to
+        interval: Seconds between polls
+    """
+
+    def __init__(self, fetch, store, interval=15.0):
+        self.fetch = fetch
+        self.store = store
+        self.interval = interval
+        self._listeners = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.errors = 0
+
+    def subscribe(self, listener):
+        """Call ``listener(timestamp, samples)`` after every tick is stored."""
+        self._listeners.append(listener)
+
+    def poll(self):
+        """Take one sample now."""
+        timestamp = time.time()
+        samples = self.fetch()
+        self.store.record(timestamp, samples)
+        for listener in self._listeners:
+            listener(timestamp, samples)
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error polling service metrics: {str(e)}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """Start polling on a daemon thread, once."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="metrics-poller", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,181 @@
+"""
+Process-wide catalog of monitored services, refreshed in the background.
+
+Membership comes from the label-values endpoint
+(``/api/v1/label/service/values?match[]=up``), which returns each service
+name once however many targets it has. Which namespaces and jobs a service
+runs in comes from one ``count by (service, namespace, job)`` query, issued
+only when membership changes or every ``reindex_every`` refreshes. Listeners
+receive the added and removed services after each refresh that changed them.
+"""
+import os
+import threading
+import time
+
+SERVICE_CATALOG_INTERVAL = float(os.getenv('SERVICE_CATALOG_INTERVAL', '60'))
+
+
+class ServiceCatalog:
+    """
+    Set-based index of services with their namespaces and jobs.
+
+    Args:
+        client_factory: Callable returning the PrometheusClient to use
+        interval: Seconds between background refreshes
+        selector: Series selector the services must appear on
+        reindex_every: Re-run the namespace/job query every this many
+            refreshes even if membership is unchanged
+        retry_interval: Seconds between background attempts while the
+            catalog has never loaded
+    """
+
+    def __init__(self, client_factory, interval=SERVICE_CATALOG_INTERVAL, selector='up', reindex_every=10,
+                 retry_interval=5.0):
+        self.client_factory = client_factory
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.selector = selector
+        self.reindex_every = reindex_every
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._load_attempted = False
+        self._services = frozenset()
+        self._sorted = []
+        self._namespaces = {}
+        self._jobs = {}
+        self._by_namespace = {}
+        self._listeners = []
+        self._refreshes = 0
+        self.last_refresh = None
+        self.version = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, listener):
+        """Call ``listener(added, removed)`` (sorted lists) after each refresh that changed membership."""
+        self._listeners.append(listener)
+
+    def _fetch_services(self, client):
+        response = client.get(
+            '/api/v1/label/service/values', params={'match[]': self.selector}, timeout=None
+        )
+        response.raise_for_status()
+        data = response.json()
+        if data.get('status') != 'success':
+            raise ValueError(f"Prometheus label query failed: {data.get('error', 'unknown error')}")
+        return frozenset(value for value in data['data'] if value)
+
+    def _fetch_index(self, client):
+        namespaces, jobs = {}, {}
+        for series in client.query(f'count by (service, namespace, job) ({self.selector})'):
+            labels = series['metric']
+            service = labels.get('service', '')
+            if not service:
+                continue
+            if labels.get('namespace'):
+                namespaces.setdefault(service, set()).add(labels['namespace'])
+            if labels.get('job'):
+                jobs.setdefault(service, set()).add(labels['job'])
+        return namespaces, jobs
+
+    def refresh(self):
+        """
+        Re-read the catalog from Prometheus.
+
+        Returns:
+            Dictionary with ``added`` and ``removed`` service lists
+        """
+        with self._refresh_lock:
+            client = self.client_factory()
+            services = self._fetch_services(client)
+            added = sorted(services - self._services)
+            removed = sorted(self._services - services)
+            reindex = added or removed or self._refreshes % self.reindex_every == 0
+            if reindex:
+                namespaces, jobs = self._fetch_index(client)
+            else:
+                namespaces, jobs = self._namespaces, self._jobs
+
+            by_namespace = {}
+            for service, service_namespaces in namespaces.items():
+                if service in services:
+                    for namespace in service_namespaces:
+                        by_namespace.setdefault(namespace, set()).add(service)
+
+            with self._lock:
+                self._services = services
+                self._sorted = sorted(services)
+                self._namespaces = namespaces
+                self._jobs = jobs
+                self._by_namespace = by_namespace
+                self._refreshes += 1
+                self.last_refresh = time.time()
+                if added or removed:
+                    self.version += 1
+
+        if added or removed:
+            for listener in self._listeners:
+                listener(added, removed)
+        return {"added": added, "removed": removed}
+
+    def ensure_loaded(self):
+        """
+        Start background refresh, loading the catalog synchronously on the first call.
+
+        Only that first load blocks on Prometheus (concurrent callers wait
+        for it). If it fails, it raises and later calls return straight away
+        while the background thread keeps retrying.
+        """
+        self.start()
+        with self._load_lock:
+            if not self._load_attempted:
+                self._load_attempted = True
+                self.refresh()
+
+    def services(self):
+        """Return the sorted list of known services."""
+        with self._lock:
+            return list(self._sorted)
+
+    def __contains__(self, service):
+        return service in self._services
+
+    def __len__(self):
+        return len(self._services)
+
+    def namespaces(self, service):
+        """Return the sorted namespaces ``service`` runs in."""
+        with self._lock:
+            return sorted(self._namespaces.get(service, ()))
+
+    def jobs(self, service):
+        """Return the sorted scrape jobs reporting ``service``."""
+        with self._lock:
+            return sorted(self._jobs.get(service, ()))
+
+    def services_in_namespace(self, namespace):
+        """Return the sorted services running in ``namespace``."""
+        with self._lock:
+            return sorted(self._by_namespace.get(namespace, ()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval if self.last_refresh else min(self.interval, self.retry_interval)):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing service catalog: {str(e)}")
+
+    def start(self):
+        """Start the background refresh thread, once."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="service-catalog", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
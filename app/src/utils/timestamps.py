@@ -0,0 +1,127 @@
+"""
+Helpers for parsing the timestamps Prometheus and Alertmanager report.
+
+Timestamps are RFC 3339 strings such as ``2024-05-01T12:00:00.123456789Z``.
+Values without an offset are treated as UTC. Scalar parsing hands the
+string to the C ``fromisoformat`` (reshaped once first on Python < 3.11,
+which rejects ``Z`` and nanoseconds), through a bounded LRU memo because
+the same ``activeAt`` values are parsed over and over across dashboard
+reruns. Whole columns are converted to numpy ``datetime64[ns]`` in one call.
+"""
+import functools
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+NANOS_PER_SECOND = 1000000000
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_NAT = np.datetime64("NaT", "ns")
+
+
+# fromisoformat accepts "Z" and (truncating) more than six fraction digits from 3.11
+_NATIVE_RFC3339 = sys.version_info >= (3, 11)
+
+_MEMO_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=_MEMO_SIZE)
+def parse_datetime(value):
+    """Parse an RFC 3339 timestamp to an aware UTC datetime (microsecond precision), or None."""
+    if not value:
+        return None
+    try:
+        if _NATIVE_RFC3339:
+            parsed = datetime.fromisoformat(value)
+        elif len(value) < 19:
+            return None
+        elif len(value) == 30 and value[29] == "Z" and value[19] == "." and value[26:29].isdigit():
+            # Fast path for the shape Prometheus always emits
+            return datetime.fromisoformat(value[:26] + "+00:00")
+        else:
+            return _parse_general(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is timezone.utc:
+        return parsed
+    if len(value) < 19:
+        # Bare dates and times without seconds are only accepted with an explicit UTC offset
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _parse_general(value):
+    # Split off the offset so the rest can be reshaped for fromisoformat,
+    # which (before Python 3.11) rejects "Z" and more than 6 fraction digits.
+    if value[-1] in "Zz":
+        body, offset = value[:-1], "+00:00"
+    elif len(value) >= 25 and value[-6] in "+-" and value[-3] == ":":
+        body, offset = value[:-6], value[-6:]
+    else:
+        body, offset = value, "+00:00"
+
+    if len(body) > 19:
+        fraction = body[20:]
+        if body[19] != "." or not fraction.isdigit():
+            return None
+        body = body[:20] + fraction[:6].ljust(6, "0")
+    parsed = datetime.fromisoformat(body + offset)
+    if offset != "+00:00":
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed
+
+
+def clear_cache():
+    """Drop all memoised parse results."""
+    parse_datetime.cache_clear()
+
+
+def parse_timestamp_ns(value):
+    """
+    Parse an RFC 3339 timestamp to integer nanoseconds since the epoch.
+
+    Fractional seconds keep up to nanosecond precision. Returns None if the
+    value is empty or not a valid timestamp.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        return None
+    nanos = (parsed - _EPOCH) // _MICROSECOND * 1000
+    # datetime stops at microseconds; add back digits 7-9 of the fraction
+    if len(value) > 26 and value[19] == ".":
+        end = 20
+        while end < len(value) and value[end].isdigit():
+            end += 1
+        nanos += int(value[26:end][:3].ljust(3, "0") or 0)
+    return nanos
+
+
+def to_epoch(value, default=None):
+    """Convert an RFC 3339 timestamp to epoch seconds, or return ``default``."""
+    parsed = parse_datetime(value)
+    return default if parsed is None else parsed.timestamp()
+
+
+def to_datetime64(values):
+    """
+    Convert a sequence of RFC 3339 strings to a ``datetime64[ns]`` array.
+
+    UTC values (``Z`` suffix) are handed to numpy's C parser in one call;
+    values with an explicit offset go through :func:`parse_timestamp_ns`.
+    Empty or invalid entries become ``NaT``.
+    """
+    values = list(values)
+    stripped = [value[:-1] if value and value[-1] in "Zz" else "NaT" for value in values]
+    try:
+        parsed = np.array(stripped, dtype="datetime64[ns]")
+    except ValueError:
+        # Something numpy can't read slipped through; use the scalar path for all
+        parsed = np.full(len(values), _NAT)
+    for i in np.flatnonzero(np.isnat(parsed)).tolist():
+        nanos = parse_timestamp_ns(values[i])
+        if nanos is not None:
+            parsed[i] = np.datetime64(nanos, "ns")
+    return parsed
@@ -0,0 +1,93 @@
+"""Vectorised incident-trend aggregation: bucket alert timestamps by severity."""
+import numpy as np
+import pandas as pd
+
+from src.utils.timestamps import to_datetime64
+
+SEVERITY_COLUMNS = ["Critical", "Warning", "Info"]
+_SEVERITY_CODES = {"critical": 0, "warning": 1}  # everything else counts as Info
+
+# Buckets are floored relative to a Monday so weekly buckets start on Mondays
+_ORIGIN = np.datetime64("1970-01-05T00:00:00", "ns")
+_UNITS = {"m": "m", "h": "h", "d": "D", "w": "W"}
+
+
+def parse_bucket(spec):
+    """
+    Convert a bucket or window size such as ``"1h"``, ``"1d"``, ``"1w"`` or ``"90d"``
+    (or a number of seconds, or a numpy timedelta64) to ``timedelta64[ns]``.
+    """
+    if isinstance(spec, np.timedelta64):
+        return spec.astype("timedelta64[ns]")
+    if isinstance(spec, (int, float)):
+        return np.timedelta64(int(spec * 1e9), "ns")
+    value, unit = spec[:-1], spec[-1].lower()
+    if unit not in _UNITS or not value.isdigit():
+        raise ValueError(f"Invalid bucket size: {spec!r}")
+    return np.timedelta64(int(value), _UNITS[unit]).astype("timedelta64[ns]")
+
+
+def severity_codes(severities):
+    """Map severity labels to 0 (critical), 1 (warning) or 2 (info/other), vectorised."""
+    # Hash-factorise first so the per-label Python work is per distinct value only
+    inverse, uniques = pd.factorize(np.asarray(severities, dtype=object), use_na_sentinel=False)
+    lookup = np.array([_SEVERITY_CODES.get(str(value).lower(), 2) for value in uniques], dtype=np.intp)
+    return lookup[inverse]
+
+
+def _to_ns(timestamps):
+    """Accept datetime64 arrays, epoch-second floats or RFC 3339 strings."""
+    timestamps = np.asarray(timestamps)
+    if np.issubdtype(timestamps.dtype, np.datetime64):
+        return timestamps.astype("datetime64[ns]")
+    if np.issubdtype(timestamps.dtype, np.number):
+        return (timestamps * 1e9).astype("int64").astype("datetime64[ns]")
+    return to_datetime64(timestamps.tolist())
+
+
+def severity_trend(timestamps, severities, bucket="1d", window="14d", end=None, weights=None):
+    """
+    Count alerts per time bucket and severity.
+
+    Args:
+        timestamps: Alert times as datetime64, epoch seconds or RFC 3339 strings
+        severities: Severity label per timestamp
+        bucket: Bucket size, e.g. ``"1h"``, ``"1d"`` or ``"1w"``
+        window: How far back from ``end`` to cover, e.g. ``"90d"``
+        end: End of the window as datetime64 (default: now, UTC)
+        weights: Optional count per timestamp, for feeding pre-aggregated rows
+
+    Returns:
+        DataFrame with a ``Date`` column (bucket start, UTC) and one count
+        column per severity, one row per bucket including empty ones
+    """
+    bucket = parse_bucket(bucket)
+    window = parse_bucket(window)
+    end = np.datetime64("now", "ns") if end is None else np.datetime64(end, "ns")
+
+    last = _ORIGIN + ((end - _ORIGIN) // bucket) * bucket
+    n_buckets = max(1, int(-(-window // bucket)))
+    first = last - (n_buckets - 1) * bucket
+
+    ns = _to_ns(timestamps)
+    codes = severity_codes(severities)
+    with np.errstate(invalid="ignore"):  # NaT (unparseable) timestamps are dropped below
+        index = (ns - first) // bucket
+    keep = ~np.isnat(ns) & (index >= 0) & (index < n_buckets)
+    flat = index[keep].astype(np.intp) * len(SEVERITY_COLUMNS) + codes[keep]
+    counts = np.bincount(
+        flat,
+        weights=None if weights is None else np.asarray(weights, dtype=float)[keep],
+        minlength=n_buckets * len(SEVERITY_COLUMNS),
+    ).reshape(n_buckets, len(SEVERITY_COLUMNS)).astype(np.int64)
+
+    frame = pd.DataFrame(counts, columns=SEVERITY_COLUMNS)
+    frame.insert(0, "Date", first + np.arange(n_buckets) * bucket)
+    return frame
+
+
+def alert_severity_trend(alerts, bucket="1d", window="14d", end=None):
+    """Run :func:`severity_trend` over alert dictionaries, bucketing on ``activeAt``."""
+    timestamps = [alert.get("activeAt") for alert in alerts]
+    severities = [alert.get("labels", {}).get("severity", "info") for alert in alerts]
+    return severity_trend(timestamps, severities, bucket=bucket, window=window, end=end)
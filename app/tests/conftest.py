@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep every on-disk store out of the real data directory; set before any src import reads them
+_data = tempfile.mkdtemp(prefix="responder-tests-")
+os.environ.setdefault("RESPONDER_DATA_DIR", _data)
+os.environ.setdefault("ALERT_HISTORY_DB", os.path.join(_data, "alert_history.db"))
+os.environ.setdefault("AI_ANALYSIS_CACHE_DB", os.path.join(_data, "ai_analysis_cache.db"))
+os.environ.setdefault("COLUMNAR_CACHE_DIR", os.path.join(_data, "columnar_cache"))
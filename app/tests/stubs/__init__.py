@@ -0,0 +1,12 @@
+"""
+Local stand-ins for the services the responder talks to (Prometheus,
+OpenRouter, AWS Secrets Manager), shared by the tests and benchmarks.
+"""
+import socket
+
+
+def free_port():
+    """Return a TCP port on localhost that is free right now."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
@@ -0,0 +1,175 @@
+"""
+Local stand-in for OpenRouter's completions API, for offline benchmarks and development.
+
+Serves ``POST /api/v1/completions`` with canned remediation advice after a
+configurable time to first token, generating words at a fixed rate. With
+``"stream": true`` the reply is sent as server-sent events like
+OpenRouter's (processing comments while queued, one ``data:`` event per
+chunk, ``data: [DONE]``); batch prompts get a JSON reply with one
+recommendation per numbered incident. The app counts requests, streamed
+tokens and streams the client abandoned before the end.
+
+Run it standalone and point the agent at it:
+
+    python -m tests.stubs.openrouter --port 8081
+    OPENROUTER_ENDPOINT=http://localhost:8081/api/v1/completions streamlit run src/ui/dashboard.py
+
+or use it from code as a context manager:
+
+    with OpenRouterStub(first_token=1.0, tokens_per_second=40) as url:
+        ...
+"""
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from tests.stubs import free_port
+
+ADVICE = (
+    "Likely cause: {subject} is under sustained pressure after a recent change. "
+    "1. Check the latest deployment and roll it back if the errors started with it. "
+    "2. Restart the affected pods to recover quickly, then watch memory and CPU for a repeat. "
+    "3. If load is the cause, scale the deployment out and review its resource limits."
+)
+_INCIDENT = re.compile(r'^Incident (\d+):\n(.*)$', re.M)
+
+
+def _subject(text):
+    words = text.strip().splitlines()[-1].split() if text.strip() else []
+    return " ".join(words[:6]) or "the service"
+
+
+def completion_text(prompt):
+    """The stand-in's reply to ``prompt``: JSON for batch prompts, advice text otherwise."""
+    incidents = _INCIDENT.findall(prompt)
+    if incidents:
+        return json.dumps({"analyses": [
+            {"id": int(number), "recommendation": ADVICE.format(subject=_subject(context))}
+            for number, context in incidents
+        ]})
+    return " " + ADVICE.format(subject=_subject(prompt))
+
+
+def create_app(first_token=0.8, tokens_per_second=40.0):
+    """
+    Build the stand-in API.
+
+    ``app.state`` counts ``requests``, ``tokens`` streamed and ``abandoned``
+    streams (client disconnected before the end).
+    """
+    app = FastAPI(title="OpenRouter stand-in")
+    app.state.requests = 0
+    app.state.tokens = 0
+    app.state.abandoned = 0
+
+    @app.post("/api/v1/completions")
+    async def completions(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse({"error": {"code": 401, "message": "No auth credentials found"}}, status_code=401)
+        model = body.get("model", "stand-in")
+        text = completion_text(body.get("prompt", ""))
+        # Words with their leading space, roughly one token each; batch replies are never cut short
+        tokens = re.findall(r'\s*\S+', text)
+        if not text.startswith("{"):
+            tokens = tokens[:int(body.get("max_tokens", 150))]
+        completion_id = f"gen-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(first_token + len(tokens) / tokens_per_second)
+            return {"id": completion_id, "model": model,
+                    "choices": [{"index": 0, "text": "".join(tokens), "finish_reason": "stop"}]}
+
+        async def events():
+            finished = False
+            try:
+                yield ": OPENROUTER PROCESSING\n\n"
+                await asyncio.sleep(first_token)
+                for token in tokens:
+                    chunk = {"id": completion_id, "model": model,
+                             "choices": [{"index": 0, "text": token, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    app.state.tokens += 1
+                    await asyncio.sleep(1 / tokens_per_second)
+                chunk = {"id": completion_id, "model": model,
+                         "choices": [{"index": 0, "text": "", "finish_reason": "stop"}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+                finished = True
+            finally:
+                if not finished:
+                    app.state.abandoned += 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class OpenRouterStub:
+    """
+    Run the stand-in on a background thread for the duration of a ``with`` block.
+
+    Entering the block returns the completions endpoint URL.
+    """
+
+    def __init__(self, first_token=0.8, tokens_per_second=40.0, host="127.0.0.1", port=None):
+        self.app = create_app(first_token=first_token, tokens_per_second=tokens_per_second)
+        self.host = host
+        self.port = port or free_port()
+        self.url = f"http://{host}:{self.port}/api/v1/completions"
+        self._server = None
+        self._thread = None
+
+    @property
+    def requests(self):
+        """Number of completion requests served so far."""
+        return self.app.state.requests
+
+    def start(self, timeout=10.0):
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="openrouter-stub", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"OpenRouter stand-in failed to start on {self.url}")
+            time.sleep(0.01)
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a stand-in OpenRouter completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--first-token", type=float, default=0.8, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    args = parser.parse_args(argv)
+
+    app = create_app(first_token=args.first_token, tokens_per_second=args.tokens_per_second)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+"""
+Local stand-in for the Prometheus HTTP API, for offline benchmarks and development.
+
+Serves ``/api/v1/query``, ``/api/v1/query_range``, ``/api/v1/alerts`` and
+``/api/v1/label/<name>/values`` over a seeded synthetic fleet, with optional
+injected latency and errors. Only the PromQL shapes this project issues are
+understood: selectors with ``=``, ``!=``, ``=~`` and ``!~`` matchers,
+``rate(...[5m])``, ``sum``/``avg``/``min``/``max``/``count`` with
+``by (...)`` and multiplication or division by a constant.
+
+Run it standalone and point the dashboard at it:
+
+    python -m tests.stubs.prometheus --services 100 --port 9090
+    PROMETHEUS_URL=http://localhost:9090 streamlit run src/ui/dashboard.py
+
+or use it from code as a context manager:
+
+    with PrometheusStub(services=1000, latency=0.08) as url:
+        ...
+"""
+import argparse
+import asyncio
+import math
+import re
+import threading
+import time
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from src.event_ingest.synthetic import SyntheticAlertGenerator
+from tests.stubs import free_port
+
+_AGGREGATIONS = {
+    "sum": np.sum,
+    "avg": np.mean,
+    "min": np.min,
+    "max": np.max,
+    "count": lambda values, axis: np.full(values.shape[1 - axis], values.shape[axis], dtype=float),
+}
+_TOKEN = re.compile(r'\s*(?:(?P<number>\d+(?:\.\d+)?)|(?P<ident>[a-zA-Z_:][a-zA-Z0-9_:]*)'
+                    r'|(?P<string>"(?:[^"\\]|\\.)*")|(?P<duration>\[\d+[smhd]\])|(?P<op>=~|!~|!=|[=(){},*/]))')
+_now = time.time  # the query handler's ``time`` parameter shadows the module
+
+
+class QueryError(ValueError):
+    """Raised for PromQL the stand-in does not understand."""
+
+
+class SyntheticFleet:
+    """
+    Deterministic metric series for ``services`` services.
+
+    Every service runs ``pods_per_service`` pods in one of ``namespaces``.
+    Per pod there are ``up``, ``http_request_duration_seconds_sum``,
+    ``process_cpu_seconds_total`` and container memory series; per service
+    ``kube_deployment_*`` replica gauges, one volume and one HPA. Counter
+    rates and gauges follow a daily sine wave plus seeded noise, and
+    capacity gauges drift linearly, so a value depends only on the seed,
+    the series and the timestamp.
+    """
+
+    def __init__(self, services=100, seed=0, namespaces=("default", "production"), pods_per_service=3,
+                 down_fraction=0.05, degraded_fraction=0.1, scrape_interval=15.0, alerts_per_service=5,
+                 start=None):
+        rng = np.random.default_rng(seed)
+        self.scrape_interval = scrape_interval
+        self.start = time.time() if start is None else start
+        generator = SyntheticAlertGenerator(
+            seed=seed, services=services, namespaces=namespaces, pods_per_service=pods_per_service,
+            start=self.start - 3600, duration=3600,
+        )
+        self.services = generator.services
+        self.alerts = generator.firing_at(services * alerts_per_service, self.start)
+        self._noise = rng.normal(0, 1, 4096)
+        self._series = {}
+
+        namespace = [namespaces[i % len(namespaces)] for i in range(services)]
+        pod_labels = [
+            {"service": service, "namespace": namespace[i], "job": service,
+             "instance": f"{service}-pod-{pod}", "pod": f"{service}-pod-{pod}"}
+            for i, service in enumerate(self.services) for pod in range(pods_per_service)
+        ]
+        n_pods = len(pod_labels)
+        up = (rng.random(n_pods) >= down_fraction).astype(float)
+        self._add("up", pod_labels, "gauge", up, 0.0, rng)
+        self._add("http_request_duration_seconds_sum", pod_labels, "counter",
+                  rng.lognormal(-2.5, 0.6, n_pods), 0.3, rng)
+        self._add("process_cpu_seconds_total", pod_labels, "counter",
+                  rng.uniform(0.05, 0.9, n_pods), 0.4, rng)
+
+        deployment_labels = [{"namespace": namespace[i], "deployment": service}
+                             for i, service in enumerate(self.services)]
+        desired = rng.integers(1, 6, services).astype(float)
+        degraded = rng.random(services) < degraded_fraction
+        available = np.where(degraded, np.floor(desired * rng.uniform(0, 0.9, services)), desired)
+        for name, base in (("kube_deployment_spec_replicas", desired),
+                           ("kube_deployment_status_replicas", desired),
+                           ("kube_deployment_status_replicas_available", available),
+                           ("kube_deployment_status_replicas_ready", available),
+                           ("kube_deployment_status_replicas_updated", desired)):
+            self._add(name, deployment_labels, "gauge", base, 0.0, rng)
+
+        # Capacity gauges with a linear drift, for the exhaustion forecasts
+        day = 86400.0
+        volume_labels = [{"namespace": namespace[i], "persistentvolumeclaim": f"data-{service}"}
+                         for i, service in enumerate(self.services)]
+        volume_size = rng.choice([10, 50, 100], services) * 2.0 ** 30
+        self._add("kubelet_volume_stats_capacity_bytes", volume_labels, "gauge", volume_size, 0.0, rng)
+        self._add("kubelet_volume_stats_used_bytes", volume_labels, "gauge",
+                  volume_size * rng.uniform(0.3, 0.8, services), 0.02, rng,
+                  slope=volume_size * rng.uniform(-0.01, 0.04, services) / day)
+
+        container_labels = [{"namespace": item["namespace"], "pod": item["pod"], "container": item["service"]}
+                            for item in pod_labels]
+        memory_limit = rng.choice([256, 512, 1024, 2048], n_pods) * 2.0 ** 20
+        self._add("container_spec_memory_limit_bytes", container_labels, "gauge", memory_limit, 0.0, rng)
+        self._add("container_memory_working_set_bytes", container_labels, "gauge",
+                  memory_limit * rng.uniform(0.2, 0.7, n_pods), 0.05, rng,
+                  slope=memory_limit * rng.uniform(-0.005, 0.03, n_pods) / day)
+
+        hpa_labels = [{"namespace": namespace[i], "horizontalpodautoscaler": service}
+                      for i, service in enumerate(self.services)]
+        self._add("kube_horizontalpodautoscaler_spec_max_replicas", hpa_labels, "gauge",
+                  desired + rng.integers(2, 8, services), 0.0, rng)
+        self._add("kube_horizontalpodautoscaler_status_current_replicas", hpa_labels, "gauge",
+                  desired, 0.0, rng, slope=rng.uniform(-0.2, 0.5, services) / day)
+
+    def _add(self, name, labels, kind, base, amplitude, rng, slope=0.0):
+        self._series[name] = {
+            "labels": [dict(item, __name__=name) for item in labels],
+            "kind": kind,
+            "base": np.asarray(base, dtype=float),
+            "amplitude": amplitude,
+            "phase": rng.uniform(0, 2 * math.pi, len(labels)),
+            "slope": np.broadcast_to(np.asarray(slope, dtype=float), (len(labels),)),
+        }
+
+    def label_values(self, name, matches=()):
+        """Return the sorted distinct values of label ``name``, optionally only on series matching ``matches``."""
+        selectors = [_Parser(self, match, []).selector() for match in matches]
+        values = set()
+        for metric, series in self._series.items():
+            for labels in series["labels"]:
+                if name not in labels:
+                    continue
+                if selectors and not any(
+                    metric == selector_name and _matches(labels, matchers) for selector_name, matchers in selectors
+                ):
+                    continue
+                values.add(labels[name])
+        return sorted(values)
+
+    def _rate(self, series, rows, timestamps):
+        """Per-second rate (or gauge value) of ``rows`` at ``timestamps``, shape (rows, timestamps)."""
+        base = series["base"][rows, None]
+        drift = series["slope"][rows, None] * (timestamps[None, :] - self.start)
+        if not series["amplitude"]:
+            return np.maximum(base + drift, 0.0)
+        wave = np.sin(2 * math.pi * timestamps[None, :] / 86400 + series["phase"][rows, None])
+        slot = (timestamps // self.scrape_interval).astype(np.int64)
+        noise = self._noise[(slot[None, :] + rows[:, None] * 7919) % len(self._noise)]
+        return np.maximum(base * (1 + series["amplitude"] * wave + 0.05 * noise) + drift, 0.0)
+
+    def select(self, name, matchers, timestamps, rate_window=None):
+        """
+        Evaluate a selector at ``timestamps``.
+
+        Returns:
+            Tuple of (list of label dicts, values array of shape (series, timestamps))
+        """
+        series = self._series.get(name)
+        if series is None:
+            return [], np.zeros((0, len(timestamps)))
+        rows = [i for i, labels in enumerate(series["labels"]) if _matches(labels, matchers)]
+        rows = np.asarray(rows, dtype=np.intp)
+        values = self._rate(series, rows, timestamps)
+        if series["kind"] == "counter" and rate_window is None:
+            # A raw counter: integrate the rate since the fleet started
+            values = values * np.maximum(timestamps - self.start + 86400, 0)[None, :]
+        labels = [series["labels"][i] for i in rows.tolist()]
+        if rate_window is not None:
+            labels = [{key: value for key, value in item.items() if key != "__name__"} for item in labels]
+        return labels, values
+
+
+def _matches(labels, matchers):
+    for key, op, value in matchers:
+        actual = labels.get(key, "")
+        if op == "=" and actual != value:
+            return False
+        if op == "!=" and actual == value:
+            return False
+        if op == "=~" and not re.fullmatch(value, actual):
+            return False
+        if op == "!~" and re.fullmatch(value, actual):
+            return False
+    return True
+
+
+def _tokenize(query):
+    tokens, position = [], 0
+    query = query.strip()
+    while position < len(query):
+        match = _TOKEN.match(query, position)
+        if not match:
+            raise QueryError(f"unexpected character at position {position}: {query[position:position + 10]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "string":
+            text = re.sub(r'\\(.)', r'\1', text[1:-1])
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser for the supported PromQL subset, evaluating as it goes."""
+
+    def __init__(self, fleet, query, timestamps):
+        self.fleet = fleet
+        self.tokens = _tokenize(query)
+        self.position = 0
+        self.timestamps = timestamps
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, text=None):
+        kind, value = self.peek()
+        if kind is None or (text is not None and value != text):
+            raise QueryError(f"expected {text or 'more input'}, found {value!r}")
+        self.position += 1
+        return kind, value
+
+    def parse(self):
+        result = self.expression()
+        if self.position != len(self.tokens):
+            raise QueryError(f"unexpected {self.peek()[1]!r}")
+        return result
+
+    def expression(self):
+        labels, values = self.term()
+        while self.peek()[1] in ("*", "/"):
+            op = self.take()[1]
+            kind, number = self.take()
+            if kind != "number":
+                raise QueryError("only scalar multiplication and division are supported")
+            values = values * float(number) if op == "*" else values / float(number)
+        return labels, values
+
+    def term(self):
+        kind, value = self.peek()
+        if kind == "number":
+            self.take()
+            return [{}], np.full((1, len(self.timestamps)), float(value))
+        if value in _AGGREGATIONS:
+            return self.aggregation()
+        if value == "rate":
+            self.take()
+            self.take("(")
+            name, matchers = self.selector()
+            kind, window = self.take()
+            if kind != "duration":
+                raise QueryError("rate() needs a range selector")
+            self.take(")")
+            return self.fleet.select(name, matchers, self.timestamps, rate_window=window)
+        if value == "(":
+            self.take()
+            result = self.expression()
+            self.take(")")
+            return result
+        name, matchers = self.selector()
+        return self.fleet.select(name, matchers, self.timestamps)
+
+    def grouping(self):
+        self.take("by")
+        self.take("(")
+        keys = []
+        while self.peek()[1] != ")":
+            keys.append(self.take()[1])
+            if self.peek()[1] == ",":
+                self.take()
+        self.take(")")
+        return keys
+
+    def aggregation(self):
+        function = _AGGREGATIONS[self.take()[1]]
+        keys = self.grouping() if self.peek()[1] == "by" else None
+        self.take("(")
+        labels, values = self.expression()
+        self.take(")")
+        if keys is None and self.peek()[1] == "by":
+            keys = self.grouping()
+        keys = keys or []
+
+        groups = {}
+        for row, item in enumerate(labels):
+            groups.setdefault(tuple(item.get(key, "") for key in keys), []).append(row)
+        out_labels, out_values = [], []
+        for group, rows in groups.items():
+            out_labels.append({key: value for key, value in zip(keys, group) if value})
+            out_values.append(function(values[rows], axis=0))
+        if not out_values:
+            return [], np.zeros((0, len(self.timestamps)))
+        return out_labels, np.vstack(out_values)
+
+    def selector(self):
+        name, matchers = None, []
+        if self.peek()[0] == "ident":
+            name = self.take()[1]
+        if self.peek()[1] == "{":
+            self.take()
+            while self.peek()[1] != "}":
+                key = self.take()[1]
+                op = self.take()[1]
+                kind, value = self.take()
+                if op not in ("=", "!=", "=~", "!~") or kind != "string":
+                    raise QueryError(f"invalid label matcher for {key!r}")
+                if key == "__name__" and op == "=":
+                    name = value
+                else:
+                    matchers.append((key, op, value))
+                if self.peek()[1] == ",":
+                    self.take()
+            self.take("}")
+        if name is None:
+            raise QueryError("a metric name is required")
+        return name, matchers
+
+
+def evaluate(fleet, query, timestamps):
+    """Evaluate ``query`` over ``fleet`` at the epoch-second ``timestamps`` array."""
+    return _Parser(fleet, query, np.asarray(timestamps, dtype=float)).parse()
+
+
+def _error(status, error_type, message):
+    return JSONResponse({"status": "error", "errorType": error_type, "error": message}, status_code=status)
+
+
+def create_app(fleet, latency=0.0, error_rate=0.0, error_status=503, seed=0):
+    """
+    Build the FastAPI app serving ``fleet``.
+
+    Args:
+        fleet: The SyntheticFleet to serve
+        latency: Added delay per request in seconds, or a (min, max) range
+        error_rate: Fraction of requests answered with ``error_status`` instead
+        error_status: HTTP status used for injected errors
+        seed: Seed for the latency and error draws
+    """
+    app = FastAPI(title="Prometheus stand-in")
+    rng = np.random.default_rng(seed)
+    rng_lock = threading.Lock()
+    app.state.fleet = fleet
+    app.state.requests = 0
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        with rng_lock:
+            app.state.requests += 1
+            delay = rng.uniform(*latency) if isinstance(latency, (tuple, list)) else latency
+            fail = error_rate and rng.random() < error_rate
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            return _error(error_status, "unavailable", "injected error")
+        return await call_next(request)
+
+    @app.get("/api/v1/query")
+    def query(query: str, time: float = None):
+        at = _now() if time is None else time
+        try:
+            labels, values = evaluate(fleet, query, [at])
+        except QueryError as e:
+            return _error(400, "bad_data", str(e))
+        result = [{"metric": item, "value": [at, repr(float(row[0]))]} for item, row in zip(labels, values)]
+        # JSONResponse skips FastAPI's recursive encoder, which dominates on large results
+        return JSONResponse({"status": "success", "data": {"resultType": "vector", "result": result}})
+
+    @app.get("/api/v1/query_range")
+    def query_range(query: str, start: float, end: float, step: float):
+        if step <= 0 or end < start:
+            return _error(400, "bad_data", "invalid start, end or step")
+        if (end - start) / step > 11000:
+            return _error(400, "bad_data", "exceeded maximum resolution of 11,000 points per timeseries")
+        timestamps = start + np.arange(int((end - start) // step) + 1) * step
+        try:
+            labels, values = evaluate(fleet, query, timestamps)
+        except QueryError as e:
+            return _error(400, "bad_data", str(e))
+        stamps = timestamps.tolist()
+        result = [
+            {"metric": item, "values": [[t, repr(v)] for t, v in zip(stamps, row.tolist())]}
+            for item, row in zip(labels, values)
+        ]
+        return JSONResponse({"status": "success", "data": {"resultType": "matrix", "result": result}})
+
+    @app.get("/api/v1/alerts")
+    def alerts():
+        return {"status": "success", "data": {"alerts": fleet.alerts}}
+
+    @app.get("/api/v1/label/{name}/values")
+    def label_values(name: str, request: Request):
+        matches = request.query_params.getlist("match[]")
+        try:
+            return {"status": "success", "data": fleet.label_values(name, matches)}
+        except QueryError as e:
+            return _error(400, "bad_data", str(e))
+
+    return app
+
+
+class PrometheusStub:
+    """
+    Run the stand-in on a background thread for the duration of a ``with`` block.
+
+    Entering the block returns the server's base URL. Keyword arguments not
+    used here are passed to SyntheticFleet.
+    """
+
+    def __init__(self, services=100, seed=0, latency=0.0, error_rate=0.0, error_status=503,
+                 host="127.0.0.1", port=None, **fleet_options):
+        self.fleet = SyntheticFleet(services=services, seed=seed, **fleet_options)
+        self.app = create_app(self.fleet, latency=latency, error_rate=error_rate,
+                              error_status=error_status, seed=seed)
+        self.host = host
+        self.port = port or free_port()
+        self.url = f"http://{host}:{self.port}"
+        self._server = None
+        self._thread = None
+
+    @property
+    def requests(self):
+        """Number of requests served so far."""
+        return self.app.state.requests
+
+    def start(self, timeout=10.0):
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="prometheus-stub", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"Prometheus stand-in failed to start on {self.url}")
+            time.sleep(0.01)
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a synthetic Prometheus API.")
+    parser.add_argument("--services", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9090)
+    parser.add_argument("--latency", type=float, default=0.0, help="added delay per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 503")
+    args = parser.parse_args(argv)
+
+    fleet = SyntheticFleet(services=args.services, seed=args.seed)
+    app = create_app(fleet, latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
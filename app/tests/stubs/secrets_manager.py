@@ -0,0 +1,138 @@
+"""
+Local stand-in for AWS Secrets Manager, for offline development and tests.
+
+Answers the ``GetSecretValue`` and ``PutSecretValue`` actions of the
+Secrets Manager JSON protocol for secrets held in memory, counting reads so
+callers can check how often the real service would have been hit.
+
+Run it standalone and point the agent at it:
+
+    python -m tests.stubs.secrets_manager --secret openrouter=sk-or-test --port 4566
+    SECRETS_MANAGER_ENDPOINT_URL=http://localhost:4566 OPENROUTER_API_KEY_SECRET_ARN=openrouter \\
+        AWS_ACCESS_KEY_ID=test AWS_SECRET_ACCESS_KEY=test streamlit run src/ui/dashboard.py
+
+or use it from code as a context manager:
+
+    with SecretsManagerStub({"openrouter": "sk-or-test"}) as url:
+        fetch = secretsmanager_fetcher("openrouter", endpoint_url=url)
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from tests.stubs import free_port
+
+_CONTENT_TYPE = "application/x-amz-json-1.1"
+
+
+def _error(status, code, message):
+    return JSONResponse({"__type": code, "message": message}, status_code=status, media_type=_CONTENT_TYPE)
+
+
+def create_app(secrets):
+    """
+    Build the stand-in API over ``secrets``, a dictionary of secret id to value.
+
+    ``app.state.reads`` counts ``GetSecretValue`` calls per secret id.
+    """
+    app = FastAPI(title="Secrets Manager stand-in")
+    app.state.secrets = {name: (value, str(uuid.uuid4())) for name, value in secrets.items()}
+    app.state.reads = {}
+    lock = threading.Lock()
+
+    def _arn(name):
+        return name if name.startswith("arn:") else f"arn:aws:secretsmanager:us-west-2:000000000000:secret:{name}"
+
+    @app.post("/")
+    async def dispatch(request: Request):
+        action = request.headers.get("x-amz-target", "").rpartition(".")[2]
+        body = json.loads(await request.body() or b"{}")
+        name = body.get("SecretId", "")
+        with lock:
+            if action == "GetSecretValue":
+                if name not in app.state.secrets:
+                    return _error(400, "ResourceNotFoundException", "Secrets Manager can't find the specified secret.")
+                value, version = app.state.secrets[name]
+                app.state.reads[name] = app.state.reads.get(name, 0) + 1
+                return JSONResponse({"ARN": _arn(name), "Name": name, "SecretString": value, "VersionId": version,
+                                     "VersionStages": ["AWSCURRENT"], "CreatedDate": time.time()},
+                                    media_type=_CONTENT_TYPE)
+            if action == "PutSecretValue":
+                version = str(uuid.uuid4())
+                app.state.secrets[name] = (body.get("SecretString", ""), version)
+                return JSONResponse({"ARN": _arn(name), "Name": name, "VersionId": version,
+                                     "VersionStages": ["AWSCURRENT"]}, media_type=_CONTENT_TYPE)
+        return _error(400, "InvalidAction", f"Action {action or '(none)'} is not supported by the stand-in")
+
+    return app
+
+
+class SecretsManagerStub:
+    """
+    Run the stand-in on a background thread for the duration of a ``with`` block.
+
+    Entering the block returns the server's endpoint URL. boto3 still signs
+    its requests, so dummy AWS credentials are needed when none are set.
+    """
+
+    def __init__(self, secrets=None, host="127.0.0.1", port=None):
+        self.app = create_app(secrets or {})
+        self.host = host
+        self.port = port or free_port()
+        self.url = f"http://{host}:{self.port}"
+        self._server = None
+        self._thread = None
+
+    def reads(self, name):
+        """Number of ``GetSecretValue`` calls for ``name`` so far."""
+        return self.app.state.reads.get(name, 0)
+
+    def rotate(self, name, value):
+        """Replace the value of ``name``, as a rotation would."""
+        self.app.state.secrets[name] = (value, str(uuid.uuid4()))
+
+    def start(self, timeout=10.0):
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="secrets-stub", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"Secrets Manager stand-in failed to start on {self.url}")
+            time.sleep(0.01)
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve an in-memory Secrets Manager API.")
+    parser.add_argument("--secret", action="append", default=[], metavar="NAME=VALUE",
+                        help="secret to serve (repeatable)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4566)
+    args = parser.parse_args(argv)
+
+    secrets = dict(item.split("=", 1) for item in args.secret)
+    uvicorn.run(create_app(secrets), host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.ai_agent.agent import ANALYSIS_CACHE, IncidentAIAgent
+from src.ai_agent.credentials import SecretProvider
+from src.ai_agent.streaming import Cancellation
+from tests.stubs.openrouter import OpenRouterStub
+
+CONTEXTS = [f"Memory usage has exceeded 90% for service-{n} deployment." for n in range(5)]
+
+
+@pytest.fixture
+def stub():
+    ANALYSIS_CACHE.clear()
+    stub = OpenRouterStub(first_token=0.3, tokens_per_second=100)
+    with stub:
+        yield stub
+    ANALYSIS_CACHE.clear()
+
+
+@pytest.fixture
+def agent(stub):
+    agent = IncidentAIAgent(credentials=SecretProvider(lambda: "key"))
+    agent.endpoint = stub.url
+    return agent
+
+
+def _cached(agent):
+    return sum(ANALYSIS_CACHE.peek(agent.model, agent._prompt(context)) is not None for context in CONTEXTS)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_storms_stream_by_default(stub, agent):
+    updates = list(agent.stream_analyses(CONTEXTS))
+
+    assert any(not done for _, _, done in updates)
+    finished = {index: text for index, text, done in updates if done}
+    assert sorted(finished) == list(range(len(CONTEXTS)))
+    assert all(text.startswith("Likely cause") for text in finished.values())
+    assert stub.requests == len(CONTEXTS)
+    assert _cached(agent) == len(CONTEXTS)
+
+
+def test_batches_when_asked(stub, agent):
+    updates = list(agent.stream_analyses(CONTEXTS, batch=True))
+
+    assert all(done for _, _, done in updates)
+    assert sorted(index for index, _, _ in updates) == list(range(len(CONTEXTS)))
+    assert stub.requests == 1
+
+
+def test_cancel_closes_the_batch_request(stub, agent):
+    cancel = Cancellation()
+    threading.Timer(0.5, cancel.cancel).start()
+
+    start = time.monotonic()
+    updates = list(agent.stream_analyses(CONTEXTS, batch=True, cancel=cancel))
+
+    assert time.monotonic() - start < 1.0
+    assert updates == []
+    _wait_for(lambda: stub.app.state.abandoned == 1)
+    assert _cached(agent) == 0
+
+
+def test_closing_the_generator_closes_the_batch_request(stub, agent):
+    # One cached analysis arrives at once; the rest are still being generated as one batch
+    ANALYSIS_CACHE.put(agent.model, agent._prompt(CONTEXTS[0]), "Restart it.")
+    analyses = agent.iter_analyses(CONTEXTS)
+
+    assert next(analyses) == (0, "Restart it.")
+    analyses.close()
+
+    _wait_for(lambda: stub.app.state.abandoned == 1)
+    assert stub.requests == 1
+    assert _cached(agent) == 1
+
+
+def test_closing_the_streams_stops_generation(stub, agent):
+    streams = agent.stream_analyses(CONTEXTS)
+    next(update for update in streams if update[1])
+    streams.close()
+
+    _wait_for(lambda: stub.app.state.abandoned == len(CONTEXTS))
+    assert _cached(agent) == 0
+
+
+def _collect(agen):
+    async def drain():
+        return [item async for item in agen]
+    return asyncio.run(drain())
+
+
+class _SlowAnalyses:
+    """Stands in for analyze_incident, recording how many calls overlap."""
+
+    def __init__(self, delay, slow=()):
+        self.delay = delay
+        self.slow = set(slow)
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, context, timeout=None, cancel=None):
+        with self._lock:
+            self.calls.append(context)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay * (20 if context in self.slow else 1))
+            return f"analysis of {context}"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_analyze_incidents_caps_concurrency_and_dedupes(monkeypatch):
+    ANALYSIS_CACHE.clear()
+    agent = IncidentAIAgent(credentials=SecretProvider(lambda: "key"))
+    fake = _SlowAnalyses(0.05)
+    monkeypatch.setattr(agent, "analyze_incident", fake)
+    contexts = CONTEXTS * 2 + [f"Pod api-{n} is crash looping." for n in range(5)]
+
+    results = dict(_collect(agent.analyze_incidents(contexts, max_concurrency=3, batch=False)))
+
+    assert sorted(results) == list(range(len(contexts)))
+    assert all(results[index] == f"analysis of {context}" for index, context in enumerate(contexts))
+    assert len(fake.calls) == 10
+    assert fake.peak == 3
+
+
+def test_analyze_incidents_deadline_bounds_each_analysis(monkeypatch):
+    ANALYSIS_CACHE.clear()
+    agent = IncidentAIAgent(credentials=SecretProvider(lambda: "key"))
+    fake = _SlowAnalyses(0.02, slow=[CONTEXTS[0]])
+    monkeypatch.setattr(agent, "analyze_incident", fake)
+
+    async def timed():
+        started = time.monotonic()
+        return [(index, text, time.monotonic() - started)
+                async for index, text in agent.analyze_incidents(CONTEXTS, max_concurrency=5, deadline=0.2, batch=False)]
+
+    results = asyncio.run(timed())
+
+    index, text, elapsed = results[-1]
+    assert index == 0 and text.startswith("Error from OpenRouter: analysis timed out")
+    assert elapsed < 0.35  # the slow analysis takes 0.4 s; its result is given up on at the 0.2 s deadline
+    assert all(text.startswith("analysis of") for index, text, _ in results[:-1])
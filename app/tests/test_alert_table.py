@@ -0,0 +1,87 @@
+from src.event_ingest.alert_table import AlertTable, alert_fingerprint
+
+
+def _alert(name, state="firing", **annotations):
+    return {"labels": {"alertname": name, "instance": f"{name}:9100"}, "annotations": annotations,
+            "state": state, "activeAt": "2024-05-01T12:00:00Z"}
+
+
+def _names(alerts):
+    return sorted(alert["labels"]["alertname"] for alert in alerts)
+
+
+def test_fingerprint_ignores_label_order():
+    assert alert_fingerprint({"a": "1", "b": "2"}) == alert_fingerprint({"b": "2", "a": "1"})
+
+
+def test_first_delta_is_a_full_sync():
+    table = AlertTable()
+    table.replace([_alert("A"), _alert("B")])
+
+    delta = table.delta()
+
+    assert delta["reset"] and _names(delta["added"]) == ["A", "B"]
+    assert delta["cursor"] == table.cursor
+
+
+def test_delta_reports_only_what_changed_since_the_cursor():
+    table = AlertTable()
+    cursor = table.replace([_alert("A"), _alert("B"), _alert("C")])
+
+    table.replace([_alert("A"), _alert("B", summary="worse"), _alert("D")])
+    delta = table.delta(cursor)
+
+    assert not delta["reset"]
+    assert _names(delta["added"]) == ["D"]
+    assert _names(delta["changed"]) == ["B"]
+    assert _names(delta["resolved"]) == ["C"]
+    assert delta["resolved"][0]["state"] == "resolved"
+    assert table.delta(delta["cursor"]) == dict(delta, added=[], changed=[], resolved=[])
+
+
+def test_unchanged_poll_does_not_advance_the_cursor():
+    table = AlertTable()
+    cursor = table.replace([_alert("A")])
+    assert table.replace([_alert("A")]) == cursor
+
+
+def test_alert_added_and_changed_since_the_cursor_is_reported_once_as_added():
+    table = AlertTable()
+    cursor = table.replace([_alert("A")])
+    table.update([_alert("B", state="pending")])
+    table.update([_alert("B")])
+
+    delta = table.delta(cursor)
+
+    assert _names(delta["added"]) == ["B"] and delta["changed"] == []
+    assert delta["added"][0]["state"] == "firing"
+
+
+def test_cursor_that_fell_off_the_log_resets():
+    table = AlertTable(max_log=2)
+    cursor = table.replace([_alert("A")])
+    for name in "BCD":
+        table.update([_alert(name)])
+
+    delta = table.delta(cursor)
+
+    assert delta["reset"] and _names(delta["added"]) == ["A", "B", "C", "D"]
+
+
+def test_cursor_from_another_table_resets():
+    table = AlertTable()
+    table.replace([_alert("A")])
+    assert table.delta(table.cursor + 5)["reset"]
+
+
+def test_replace_only_resolves_alerts_its_source_owns():
+    table = AlertTable()
+    table.replace([_alert("Polled")], source="prometheus")
+    table.update([_alert("Pushed")])
+
+    table.replace([], source="prometheus")
+    assert _names(table.snapshot()) == ["Pushed"]
+
+    table.replace([_alert("Pushed")], source="prometheus")
+    table.replace([], source="prometheus")
+    assert table.snapshot() == []
@@ -0,0 +1,55 @@
+import pytest
+
+from src.ai_agent.analysis_cache import AnalysisCache, cache_key, normalize_prompt
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Pod api-7d4b9c8f6d-x2x9k restarted at 2024-05-01T12:00:00Z",
+     "Pod api-5f6c7d8b9c-k7m2p restarted at 2024-05-02T08:30:15.123Z"),
+    ("Memory usage is 91.5% on checkout-pod-2", "memory usage is 97 % on checkout-pod-0"),
+    ("Alert fired at 1714564800 on node-1", "Alert fired at 1714568400123 on node-1"),
+    ("HighCPU   on\nweb", "highcpu on web"),
+])
+def test_volatile_details_normalise_away(first, second):
+    assert normalize_prompt(first) == normalize_prompt(second)
+    assert cache_key("model", first) == cache_key("model", second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("HighMemory on checkout", "HighMemory on payments"),
+    ("Disk full on node-1", "Disk full on node-2"),
+    ("replicas at 3", "replicas at 4"),
+])
+def test_meaningful_differences_are_kept(first, second):
+    assert normalize_prompt(first) != normalize_prompt(second)
+
+
+def test_normalize_prompt_placeholders():
+    assert normalize_prompt("CPU at 85% since 2024-05-01 12:00 on api-pod-3") == "cpu at <pct> since <time> on api"
+
+
+def test_keys_depend_on_the_model():
+    assert cache_key("a", "prompt") != cache_key("b", "prompt")
+
+
+def test_lru_eviction_and_ttl(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.db"), max_entries=2, ttl=3600)
+    cache.put("m", "first", "one")
+    cache.put("m", "second", "two")
+    assert cache.get("m", "first") == "one"  # now the most recently used
+    cache.put("m", "third", "three")
+
+    assert cache.peek("m", "second") is None
+    assert cache.peek("m", "first") == "one"
+    assert cache.stats()["evictions"] == 1
+
+    cache.ttl = -1
+    assert cache.get("m", "first") is None
+    assert cache.stats()["expired"] == 1
+    cache.close()
+
+
+def test_missing_parent_directory_is_created(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "data" / "cache.db"))
+    cache.put("model", "prompt", "analysis")
+    assert cache.get("model", "prompt") == "analysis"
@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.actions import remediation
+from src.event_ingest.anomaly import AnomalyDetector
+
+
+def _warm(detector, services, ticks=30, start=0):
+    rng = np.random.default_rng(7)
+    for tick in range(start, start + ticks):
+        detector.observe(tick * 5.0, {service: {"response_time": 100 + rng.normal(0, 2), "load": 50 + rng.normal(0, 1)}
+                                      for service in services})
+    return start + ticks
+
+
+def _spike(detector, services, tick):
+    for offset in range(2):
+        detector.observe((tick + offset) * 5.0, {service: {"response_time": 500.0, "load": 50.0} for service in services})
+    return tick + 2
+
+
+def test_sustained_spike_raises_an_anomaly_alert():
+    detector = AnomalyDetector()
+    tick = _warm(detector, ["checkout"])
+    _spike(detector, ["checkout"], tick)
+
+    alerts = detector.active_alerts()
+    assert [alert["labels"]["alertname"] for alert in alerts] == ["HighLatency"]
+    assert alerts[0]["labels"]["source"] == "anomaly-detector"
+
+
+def test_tracked_services_are_capped_and_stale_ones_dropped_with_their_alerts():
+    detector = AnomalyDetector(max_services=2)
+    tick = _warm(detector, ["a", "b"])
+    tick = _spike(detector, ["a"], tick)
+    assert detector.active_alerts()
+
+    _warm(detector, ["b", "c"], start=tick)
+
+    assert sorted(detector._rows) == ["b", "c"]
+    assert detector.baseline("a", "load") is None
+    assert detector.active_alerts() == []
+    mean, _ = detector.baseline("c", "response_time")
+    assert 90 < mean < 110
+
+
+def test_anomaly_alerts_are_not_auto_remediated(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("anomaly alerts must not be remediated")
+
+    monkeypatch.setattr(remediation, "auto_remediate_service", refuse)
+    detector = AnomalyDetector()
+    tick = _warm(detector, ["checkout"])
+    _spike(detector, ["checkout"], tick)
+    alert = detector.active_alerts()[0]
+    alert["labels"]["severity"] = "warning"
+
+    result = remediation.auto_remediate_from_prometheus_alert(alert)
+
+    assert result["status"] == "skipped"
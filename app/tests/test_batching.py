@@ -0,0 +1,65 @@
+import json
+
+from src.ai_agent.batching import (
+    ANALYSIS_MAX_TOKENS, batch_max_tokens, batch_prompt, estimate_tokens, parse_batch_response, plan_batches,
+)
+
+
+def _reply(*entries):
+    return json.dumps({"analyses": [{"id": number, "recommendation": text} for number, text in entries]})
+
+
+def test_parse_plain_reply():
+    assert parse_batch_response(_reply((1, "Restart it."), (2, " Scale out. ")), 2) == ["Restart it.", "Scale out."]
+
+
+def test_parse_ignores_reasoning_fences_and_prose():
+    text = ("<think>{\"analyses\": []} is what I should not return</think>Here you go:\n"
+            f"```json\n{_reply((2, 'Roll back.'), (1, 'Restart.'))}\n```\nHope this helps {{:}}")
+    assert parse_batch_response(text, 2) == ["Restart.", "Roll back."]
+
+
+def test_parse_keeps_entries_with_string_ids():
+    assert parse_batch_response('{"analyses": [{"id": "2", "recommendation": "Scale out."}]}', 2) == [None, "Scale out."]
+
+
+def test_parse_drops_missing_empty_and_out_of_range_entries():
+    text = _reply((0, "zero"), (2, "  "), (3, "Restart."), (9, "nine"))
+    assert parse_batch_response(text, 3) == [None, None, "Restart."]
+
+
+def test_parse_unusable_replies():
+    for text in ("", "no json here", '{"analyses": "none"}', '{"analyses": [1, 2]}', _reply((1, "cut"))[:-10]):
+        assert parse_batch_response(text, 2) == [None, None]
+
+
+def test_prompt_numbers_incidents_from_one():
+    prompt = batch_prompt(["disk full on node-1", "OOMKilled api"])
+    assert "\nIncident 1:\ndisk full on node-1\n" in prompt
+    assert "\nIncident 2:\nOOMKilled api\n" in prompt
+    assert '"recommendation"' in prompt
+
+
+def test_batches_keep_order_and_respect_the_alert_limit():
+    batches = plan_batches([f"alert {n}" for n in range(7)], token_budget=100000, max_alerts=3)
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_batches_fit_the_token_budget():
+    contexts = ["x" * 400] * 10
+    budget = 2000
+    batches = plan_batches(contexts, token_budget=budget, max_alerts=100)
+
+    assert [position for batch in batches for position in batch] == list(range(10))
+    for batch in batches:
+        prompt = batch_prompt([contexts[position] for position in batch])
+        assert estimate_tokens(prompt) + batch_max_tokens(len(batch)) <= budget
+
+
+def test_oversized_context_gets_a_batch_of_its_own():
+    batches = plan_batches(["small", "x" * 40000, "small"], token_budget=1000)
+    assert batches == [[0], [1], [2]]
+
+
+def test_batch_completion_budget_grows_per_incident():
+    assert batch_max_tokens(2) - batch_max_tokens(1) > ANALYSIS_MAX_TOKENS
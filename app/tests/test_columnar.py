@@ -0,0 +1,64 @@
+import logging
+
+import pandas as pd
+
+from src.utils import columnar
+from src.utils.columnar import ColumnarStore
+
+
+def test_round_trip_dictionary_encodes_strings(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    store.write("health", pd.DataFrame({"service": ["a", "b", "a"], "load": [1.0, 2.0, 3.0]}))
+
+    frame = store.read("health")
+
+    assert list(frame["service"]) == ["a", "b", "a"]
+    assert isinstance(frame["service"].dtype, pd.CategoricalDtype)
+    assert store.read("health", max_age=-1) is None
+    assert store.read("missing") is None
+
+
+def test_spilled_serves_the_file_on_the_first_call_only(tmp_path):
+    store = ColumnarStore(str(tmp_path))
+    store.write("table", pd.DataFrame({"value": [1]}))
+    calls = []
+
+    @store.spilled("table")
+    def table():
+        calls.append(True)
+        return pd.DataFrame({"value": [len(calls) + 1]})
+
+    assert list(table()["value"]) == [1]
+    assert list(table()["value"]) == [2]
+    assert list(store.read("table")["value"]) == [2]
+
+
+def test_unreadable_and_unwritable_spills_are_logged(tmp_path, caplog):
+    store = ColumnarStore(str(tmp_path))
+    (tmp_path / "broken.arrow").write_bytes(b"not arrow")
+    blocked = ColumnarStore(str(tmp_path / "broken.arrow"))  # a file where the directory should be
+
+    @blocked.spilled("table")
+    def table():
+        return pd.DataFrame({"value": [1]})
+
+    with caplog.at_level(logging.WARNING, logger="src.utils.columnar"):
+        assert store.read("broken") is None
+        assert list(table()["value"]) == [1]
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("Error reading spilled table broken") for message in messages)
+    assert any(message.startswith("Error spilling table table") for message in messages)
+
+
+def test_spilled_calls_through_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "HAS_PYARROW", False)
+    store = ColumnarStore(str(tmp_path))
+
+    @store.spilled("table")
+    def table():
+        return pd.DataFrame({"value": [1]})
+
+    assert list(table()["value"]) == [1]
+    assert not (tmp_path / "table.arrow").exists()
+
@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from src.ai_agent.credentials import SecretProvider, secretsmanager_fetcher
+from tests.stubs.secrets_manager import SecretsManagerStub
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    stub = SecretsManagerStub({"openrouter": "sk-or-1", "json-secret": '{"key": "sk-or-json"}'})
+    with stub:
+        yield stub
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_concurrent_first_reads_share_one_fetch(stub):
+    provider = SecretProvider(secretsmanager_fetcher("openrouter", endpoint_url=stub.url))
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(provider.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    provider.stop()
+
+    assert values == ["sk-or-1"] * 8
+    assert stub.reads("openrouter") == 1
+    assert provider.stats()["reads"] == 8
+
+
+def test_json_secrets_are_decoded(stub):
+    assert secretsmanager_fetcher("json-secret", endpoint_url=stub.url)() == {"key": "sk-or-json"}
+
+
+def test_rotated_secret_is_picked_up_in_the_background(stub):
+    provider = SecretProvider(secretsmanager_fetcher("openrouter", endpoint_url=stub.url),
+                              rotation_interval=0.4, refresh_margin=0.1)
+    assert provider.get() == "sk-or-1"
+
+    stub.rotate("openrouter", "sk-or-2")
+    _wait_for(lambda: provider.get() == "sk-or-2")
+    provider.stop()
+    assert stub.reads("openrouter") >= 2
+
+
+def test_failed_refresh_keeps_the_last_good_value(caplog):
+    values = iter(["sk-or-1"])
+
+    def fetch():
+        try:
+            return next(values)
+        except StopIteration:
+            raise ConnectionError("Secrets Manager is unreachable") from None
+
+    provider = SecretProvider(fetch, rotation_interval=0.1, refresh_margin=0.05, retry_interval=0.05)
+    with caplog.at_level(logging.WARNING, logger="src.ai_agent.credentials"):
+        assert provider.get() == "sk-or-1"
+        _wait_for(lambda: provider.stats()["errors"] >= 2)
+    provider.stop()
+
+    assert provider.get() == "sk-or-1"
+    assert "Secrets Manager is unreachable" in caplog.text
+
+
+def test_first_fetch_failure_raises():
+    def fetch():
+        raise ConnectionError("Secrets Manager is unreachable")
+
+    with pytest.raises(ConnectionError):
+        SecretProvider(fetch).get()
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from src.utils import metrics
+from src.utils.downsample import lttb
+
+
+def test_lttb_keeps_the_endpoints_and_the_spike():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 50.0
+
+    dx, dy = lttb(x, y, 20)
+
+    assert len(dx) == 20
+    assert dx[0] == 0 and dx[-1] == 999
+    assert np.all(np.diff(dx) > 0)
+    assert 50.0 in dy
+
+
+def test_lttb_returns_short_series_and_degenerate_thresholds_unchanged():
+    x, y = np.arange(10.0), np.arange(10.0) ** 2
+    for threshold in (10, 50, 2):
+        dx, dy = lttb(x, y, threshold)
+        assert np.array_equal(dx, x) and np.array_equal(dy, y)
+
+
+def test_lttb_drops_nan_values():
+    x = np.arange(100, dtype=float)
+    y = np.sin(x)
+    y[::10] = np.nan
+
+    dx, dy = lttb(x, y, 30)
+
+    assert len(dx) == 30 and not np.isnan(dy).any()
+    assert not np.any(dx % 10 == 0)
+
+
+@pytest.mark.parametrize("span, width, expected", [
+    (3600, 800, metrics.SCRAPE_INTERVAL),         # an hour is at scrape resolution
+    (7 * 86400, 800, 7 * 86400 / 800),            # a week gives one point per pixel
+    (365 * 86400, 20000, 365 * 86400 / metrics.MAX_POINTS_PER_SERIES),  # capped below Prometheus' limit
+])
+def test_choose_step(span, width, expected):
+    assert metrics.choose_step(0, span, width) == np.ceil(expected)
+
+
+class _RangeClient:
+    def __init__(self):
+        self.calls = []
+
+    def query_range(self, query, start, end, step):
+        self.calls.append((query, start, end, step))
+        timestamps = np.arange(start, end + step, step)
+        return [{"metric": {"service": "checkout"}, "values": [[t, str(i % 7)] for i, t in enumerate(timestamps)]}]
+
+
+@pytest.fixture
+def range_client(monkeypatch):
+    client = _RangeClient()
+    monkeypatch.setattr(metrics, "_client", lambda: client)
+    metrics.METRICS_CACHE.invalidate()
+    yield client
+    metrics.METRICS_CACHE.invalidate()
+
+
+def test_range_series_is_step_aligned_cached_and_downsampled(range_client):
+    end = 1_700_000_000.0
+
+    first = metrics.get_range_series("up", start=end - 7 * 86400, end=end, width_px=800, max_points=100)
+    again = metrics.get_range_series("up", start=end - 7 * 86400 + 30, end=end + 30, width_px=800, max_points=100)
+
+    (query, start, stop, step), = range_client.calls
+    assert step == metrics.choose_step(end - 7 * 86400, end, 800)
+    assert start % step == 0 and stop % step == 0
+    assert len(first) == 1 and len(first[0]["timestamps"]) == 100
+    assert first[0]["metric"] == {"service": "checkout"}
+    assert np.array_equal(again[0]["values"], first[0]["values"])
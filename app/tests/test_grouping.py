@@ -0,0 +1,68 @@
+from src.event_ingest.grouping import group_alerts
+
+
+def _alert(alertname, deployment, severity="warning", active_at="2024-05-01T12:00:00Z", instance="pod-0"):
+    return {
+        "labels": {"alertname": alertname, "deployment": deployment, "namespace": "default",
+                   "severity": severity, "instance": instance},
+        "state": "firing",
+        "activeAt": active_at,
+    }
+
+
+def test_alerts_sharing_the_group_labels_collapse_into_one_group():
+    alerts = [_alert("HighCPU", "api", instance=f"pod-{n}") for n in range(5)] + [_alert("HighCPU", "search")]
+
+    groups = group_alerts(alerts, group_by=("alertname", "deployment"), window=0)
+
+    assert [(group["labels"], group["count"]) for group in groups] == [
+        ({"alertname": "HighCPU", "deployment": "api"}, 5),
+        ({"alertname": "HighCPU", "deployment": "search"}, 1),
+    ]
+    assert groups[0]["alerts"] == alerts[:5]
+
+
+def test_representative_is_the_earliest_of_the_most_severe():
+    alerts = [
+        _alert("PodCrashLooping", "api", "warning", "2024-05-01T12:00:00Z", "pod-0"),
+        _alert("PodCrashLooping", "api", "critical", "2024-05-01T12:02:00Z", "pod-1"),
+        _alert("PodCrashLooping", "api", "critical", "2024-05-01T12:01:00Z", "pod-2"),
+    ]
+
+    group, = group_alerts(alerts, group_by=("alertname", "deployment"), window=0)
+
+    assert group["severity"] == "critical"
+    assert group["alert"]["labels"]["instance"] == "pod-2"
+
+
+def test_recurrence_after_the_window_starts_a_new_group():
+    alerts = [
+        _alert("HighCPU", "api", active_at="2024-05-01T12:00:00Z"),
+        _alert("HighCPU", "api", active_at="2024-05-01T12:04:00Z"),
+        _alert("HighCPU", "api", active_at="2024-05-01T15:00:00Z"),
+    ]
+
+    groups = group_alerts(alerts, group_by=("alertname", "deployment"), window=300)
+
+    assert sorted(group["count"] for group in groups) == [1, 2]
+    assert len(group_alerts(alerts, group_by=("alertname", "deployment"), window=0)) == 1
+
+
+def test_groups_are_ordered_by_severity_then_size():
+    alerts = ([_alert("DiskFull", "db", "warning", instance=f"pod-{n}") for n in range(3)]
+              + [_alert("ServiceUnavailable", "api", "critical")]
+              + [_alert("HighMemory", "cache", "warning")]
+              + [_alert("Custom", "batch", "page")])
+
+    groups = group_alerts(alerts, group_by=("alertname", "deployment"), window=0)
+
+    assert [group["labels"]["alertname"] for group in groups] == ["ServiceUnavailable", "DiskFull", "HighMemory", "Custom"]
+
+
+def test_missing_labels_and_timestamps_still_group():
+    alerts = [{"labels": {"alertname": "Orphan"}}, {"labels": {"alertname": "Orphan"}, "activeAt": "garbage"}]
+
+    group, = group_alerts(alerts, group_by=("alertname", "deployment"))
+
+    assert group["labels"] == {"alertname": "Orphan", "deployment": ""}
+    assert group["count"] == 2 and group["severity"] == "unknown"
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from src.event_ingest.alert_table import AlertTable
+from src.event_ingest.history import AlertHistoryStore
+from src.event_ingest import ingest
+from src.event_ingest.ingest import get_mock_alerts
+from src.utils.columnar import ColumnarStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AlertHistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def _alert(name, instance, **extra):
+    return dict({
+        "labels": {"alertname": name, "instance": instance, "severity": "critical"},
+        "annotations": {},
+        "state": "firing",
+        "activeAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }, **extra)
+
+
+def test_mock_alerts_are_not_recorded(store):
+    table = AlertTable()
+    table.subscribe(store.record_transitions)
+    for _ in range(10):
+        table.replace(get_mock_alerts())
+    assert len(store.events_frame(0)) == 0
+    assert store.daily_severity_counts(7) == []
+
+
+def test_real_alerts_are_recorded_alongside_mock_ones(store):
+    table = AlertTable()
+    table.subscribe(store.record_transitions)
+    table.replace([_alert("RealAlert", "node-1")] + get_mock_alerts())
+    table.replace([])
+
+    frame = store.events_frame(0)
+    assert list(frame["alertname"]) == ["RealAlert", "RealAlert"]
+    assert sorted(frame["state"]) == ["firing", "resolved"]
+
+
+def test_degraded_poll_does_not_resolve_polled_alerts(store, monkeypatch):
+    table = AlertTable()
+    table.subscribe(store.record_transitions)
+    monkeypatch.setattr(ingest, "ALERT_TABLE", table)
+    monkeypatch.setattr(ingest.ANOMALY_DETECTOR, "active_alerts", lambda: [])
+    monkeypatch.setattr(ingest, "fetch_capacity_alerts", lambda: [])
+
+    monkeypatch.setattr(ingest, "fetch_alerts", lambda: ([_alert("RealAlert", "node-1")], False))
+    ingest.sync_alerts(max_age=0)
+    monkeypatch.setattr(ingest, "fetch_alerts", lambda: (get_mock_alerts(), True))
+    for _ in range(3):
+        ingest.sync_alerts(max_age=0)
+
+    assert [alert["labels"]["alertname"] for alert in table.snapshot() if "source" not in alert] == ["RealAlert"]
+    assert list(store.events_frame(0)["state"]) == ["firing"]
+
+    monkeypatch.setattr(ingest, "fetch_alerts", lambda: ([], False))
+    ingest.sync_alerts(max_age=0)
+    assert table.snapshot() == []
+    assert sorted(store.events_frame(0)["state"]) == ["firing", "resolved"]
+
+
+def test_mock_alerts_are_tagged():
+    assert all(alert["source"] == "mock" for alert in get_mock_alerts())
+
+
+class _CountingStore(ColumnarStore):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.writes = []
+
+    def write(self, name, frame):
+        self.writes.append(name)
+        return super().write(name, frame)
+
+
+def _at(days_ago, hour):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime((int(time.time() // 86400) - days_ago) * 86400 + hour * 3600))
+
+
+def test_events_frame_spills_closed_days_and_rebuilds_changed_ones(store, tmp_path):
+    spill = _CountingStore(str(tmp_path / "spill"))
+    store.record_transitions([("added", _alert("A", "node-1", activeAt=_at(2, 1))),
+                              ("added", _alert("B", "node-2", activeAt=_at(1, 1)))])
+    start = time.time() - 3 * 86400
+
+    first = store.events_frame(start, spill=spill)
+    assert list(first["alertname"]) == ["A", "B"]
+    assert len(spill.writes) == 3  # the closed days, one of them empty; today is always read live
+    spill.writes.clear()
+
+    assert store.events_frame(start, spill=spill).equals(first)
+    assert spill.writes == []
+
+    # A late transition for yesterday invalidates only yesterday's file
+    store.record_transitions([("added", _alert("C", "node-3", activeAt=_at(1, 2)))])
+    third = store.events_frame(start, spill=spill)
+    assert list(third["alertname"]) == ["A", "B", "C"]
+    assert spill.writes == [f"alert_events-{int(time.time() // 86400) - 1}"]
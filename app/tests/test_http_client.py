@@ -0,0 +1,67 @@
+import time
+
+import pytest
+import requests
+
+from src.utils.http_client import PrometheusClient
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Session:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.responses = []
+
+    def get(self, url, params=None, timeout=None):
+        self.responses.append(_Response(self.statuses.pop(0)))
+        return self.responses[-1]
+
+
+def test_retried_responses_are_closed():
+    client = PrometheusClient("http://prometheus", retries=2, backoff=0)
+    client.session = _Session([503, 502, 200])
+
+    response = client.get("/api/v1/query")
+
+    assert response.status_code == 200
+    assert [r.closed for r in client.session.responses] == [True, True, False]
+
+
+def test_last_retryable_response_is_returned_open():
+    client = PrometheusClient("http://prometheus", retries=1, backoff=0)
+    client.session = _Session([503, 503])
+
+    response = client.get("/api/v1/query")
+
+    assert response.status_code == 503 and not response.closed
+    assert client.session.responses[0].closed
+
+
+class _SlowSession:
+    def __init__(self):
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        time.sleep(timeout)
+        raise requests.Timeout("read timed out")
+
+
+def test_retries_share_the_deadline():
+    client = PrometheusClient("http://prometheus", timeout=5, retries=3, backoff=0)
+    client.session = _SlowSession()
+
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        client.get("/api/v1/query", deadline=time.monotonic() + 0.2)
+
+    assert time.monotonic() - start < 0.4
+    assert all(timeout <= 0.2 for timeout in client.session.timeouts)
@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+
+from src.actions import remediation
+from src.event_ingest import ingest
+from src.event_ingest.capacity import capacity_alerts
+from src.utils import metrics
+
+
+def test_service_metrics_errors_propagate_and_are_not_cached(monkeypatch):
+    def unavailable(services=None):
+        raise ConnectionError("Prometheus is down")
+
+    monkeypatch.setattr(metrics, "get_all_service_metrics", unavailable)
+    with pytest.raises(ConnectionError):
+        metrics.get_service_metrics("checkout-errors")
+
+    healthy = {"status": "Healthy", "response_time": 12, "load": 30.0}
+    monkeypatch.setattr(metrics, "get_all_service_metrics", lambda services=None: {services[0]: healthy})
+    assert metrics.get_service_metrics("checkout-errors") == healthy
+
+
+@pytest.fixture
+def fresh_metrics_cache():
+    metrics.METRICS_CACHE.invalidate()
+    yield
+    metrics.METRICS_CACHE.invalidate()
+
+
+def _vector(values):
+    return [{"metric": {"service": service}, "value": [0, str(value)]} for service, value in values.items()]
+
+
+def test_all_service_metrics_split_one_query_per_metric(monkeypatch, fresh_metrics_cache):
+    issued = []
+
+    def run(queries, deadline=None):
+        issued.append(queries)
+        return [
+            _vector({"checkout": 1, "search": 0}),
+            _vector({"checkout": 0.25, "search": 1.5}),
+            _vector({"checkout": 0.4}),
+        ]
+
+    monkeypatch.setattr(metrics, "run_queries", run)
+
+    result = metrics.get_all_service_metrics()
+
+    assert result == {
+        "checkout": {"status": "Healthy", "response_time": 250, "load": 40.0},
+        "search": {"status": "Degraded", "response_time": 1500, "load": 0.0},
+    }
+    assert len(issued) == 1 and len(issued[0]) == 3
+    assert all("by (service)" in query and 'service!=""' in query for query in issued[0])
+    assert metrics.get_all_service_metrics() == result
+    assert len(issued) == 1
+
+
+def test_all_service_metrics_for_named_services(monkeypatch, fresh_metrics_cache):
+    issued = []
+
+    def run(queries, deadline=None):
+        issued.extend(queries)
+        return [_vector({"checkout": 1}), ConnectionError("no latency"), _vector({"checkout": 0.1})]
+
+    monkeypatch.setattr(metrics, "run_queries", run)
+
+    result = metrics.get_all_service_metrics(["checkout", "missing"])
+
+    assert result["checkout"] == {"status": "Healthy", "response_time": 0, "load": 10.0}
+    assert result["missing"] == {"status": "Unknown", "response_time": 0, "load": 0.0}
+    assert all('service=~"checkout|missing"' in query for query in issued)
+    assert metrics.get_all_service_metrics([]) == {}
+
+
+def test_all_service_metrics_fail_when_the_up_query_fails(monkeypatch, fresh_metrics_cache):
+    monkeypatch.setattr(metrics, "run_queries", _failing_queries)
+    with pytest.raises(ConnectionError):
+        metrics.get_all_service_metrics(["checkout"])
+
+
+def _failing_queries(queries, deadline=None):
+    return [ConnectionError("Prometheus is down")] * len(queries)
+
+
+def test_capacity_forecast_failures_propagate(monkeypatch):
+    monkeypatch.setattr(metrics, "run_queries", _failing_queries)
+    with pytest.raises(ConnectionError):
+        metrics.get_capacity_forecasts(days=1, step=3600)
+
+
+def test_capacity_alerts_fall_back_to_none(monkeypatch):
+    def unavailable():
+        raise ConnectionError("Prometheus is down")
+
+    monkeypatch.setattr(ingest, "get_capacity_forecasts", unavailable)
+    assert ingest.fetch_capacity_alerts() == []
+
+    monkeypatch.setattr(metrics, "run_queries", lambda queries, deadline=None: [[]] * len(queries))
+    empty = metrics.get_capacity_forecasts(days=2, step=3600)
+    assert empty.empty
+    monkeypatch.setattr(ingest, "get_capacity_forecasts", lambda: empty)
+    assert ingest.fetch_capacity_alerts() == []
+
+
+def test_capacity_forecast_alerts_are_reported_not_restarted(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("forecast alerts must not restart or scale")
+
+    monkeypatch.setattr(remediation, "restart_service", refuse)
+    monkeypatch.setattr(remediation, "scale_deployment", refuse)
+    forecasts = pd.DataFrame([{
+        "resource": "disk", "namespace": "db", "name": "data-postgres-0", "deployment": "postgres",
+        "utilization": 0.8, "current": 80.0, "limit": 100.0, "seconds_to_threshold": 3600.0,
+    }])
+    alert = capacity_alerts(forecasts, now=0)[0]
+    assert alert["labels"]["alertname"] == "DiskPressure"
+
+    result = remediation.auto_remediate_from_prometheus_alert(alert)
+
+    assert result["status"] == "success"
+    assert [action["action"] for action in result["actions_taken"]] == ["notify"]
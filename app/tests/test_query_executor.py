@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.http_client import PrometheusClient
+from tests.stubs.prometheus import PrometheusStub
+from src.utils.query_executor import QueryExecutor
+
+
+@pytest.fixture(scope="module")
+def slow_prometheus():
+    with PrometheusStub(services=3, latency=2.0) as url:
+        yield url
+
+
+def test_run_returns_at_the_deadline(slow_prometheus):
+    executor = QueryExecutor(PrometheusClient(slow_prometheus))
+
+    start = time.monotonic()
+    results = executor.run(["up", "up"], deadline=0.3)
+
+    assert time.monotonic() - start < 0.6
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+
+
+def test_queries_within_the_deadline_succeed():
+    with PrometheusStub(services=3) as url:
+        results = QueryExecutor(PrometheusClient(url)).run(["up", 'sum(up)'], deadline=5)
+    assert [len(result) > 0 for result in results] == [True, True]
@@ -0,0 +1,123 @@
+import pytest
+
+from src.utils.query_planner import QueryPlanner, label_matcher
+
+
+class _Prometheus:
+    """Records issued queries and answers each with one series per value of ``service``."""
+
+    def __init__(self, services=("a", "b", "c")):
+        self.services = services
+        self.calls = []
+
+    def __call__(self, queries, deadline=None):
+        self.calls.append(queries)
+        results = []
+        for query in queries:
+            expression = query["query"] if isinstance(query, dict) else query
+            if "fail" in expression:
+                results.append(RuntimeError("query failed"))
+                continue
+            results.append([{"metric": {"service": service, "job": "api"}, "value": [0, str(n)]}
+                            for n, service in enumerate(self.services)])
+        return results
+
+
+def test_label_matcher():
+    assert label_matcher("service", ["a"]) == 'service="a"'
+    assert label_matcher("service", ["a.b", "c"]) == 'service=~"a\\\\.b|c"'
+
+
+def test_identical_queries_are_issued_once():
+    run = _Prometheus()
+    planner = QueryPlanner(run)
+    first = planner.register('up{service="a"}')
+    second = planner.register('up{ service = "a" }')
+
+    planner.execute()
+
+    assert run.calls == [['up{service="a"}']]
+    assert first.value is second.value
+
+
+def test_equality_matchers_are_merged_and_sliced():
+    run = _Prometheus()
+    planner = QueryPlanner(run)
+    handles = {service: planner.register(f'sum(rate(http_requests_total{{service="{service}"}}[5m]))')
+               for service in ("a", "b")}
+
+    planner.execute()
+
+    assert run.calls == [['sum by (service) (rate(http_requests_total{service=~"a|b"}[5m]))']]
+    for service, handle in handles.items():
+        series = handle.result()
+        assert len(series) == 1
+        # The label was only added to tell the services apart, so it is dropped again
+        assert series[0]["metric"] == {"job": "api"}
+
+
+def test_fleet_query_answers_per_service_queries():
+    run = _Prometheus()
+    planner = QueryPlanner(run)
+    fleet = planner.register('avg by (service) (up{service!=""})')
+    one = planner.register('avg by (service) (up{service="b"})')
+
+    planner.execute()
+
+    assert run.calls == [['avg by (service) (up{service!=""})']]
+    assert len(fleet.result()) == 3
+    assert [item["metric"]["service"] for item in one.result()] == ["b"]
+
+
+def test_range_queries_merge_only_with_the_same_range():
+    run = _Prometheus()
+    planner = QueryPlanner(run)
+    for service, end in (("a", 100), ("b", 100), ("c", 200)):
+        planner.register({"query": f'up{{service="{service}"}}', "start": 0, "end": end, "step": 10})
+
+    planner.execute()
+
+    issued = sorted((query["query"], query["end"]) for query in run.calls[0])
+    assert issued == [('up{service="c"}', 200), ('up{service=~"a|b"}', 100)]
+
+
+def test_unmergeable_queries_are_issued_as_is():
+    run = _Prometheus()
+    planner = QueryPlanner(run)
+    planner.register('histogram_quantile(0.9, rate(latency_bucket{service="a"}[5m]))')
+    planner.register('histogram_quantile(0.9, rate(latency_bucket{service="b"}[5m]))')
+
+    planner.execute()
+
+    assert len(run.calls[0]) == 2
+
+
+def test_failures_reach_every_sliced_handle():
+    planner = QueryPlanner(_Prometheus())
+    handles = [planner.register(f'fail{{service="{service}"}}') for service in "ab"]
+
+    planner.execute()
+
+    for handle in handles:
+        assert isinstance(handle.value, RuntimeError)
+        with pytest.raises(RuntimeError):
+            handle.result()
+
+
+def test_value_before_execute_raises():
+    planner = QueryPlanner(_Prometheus())
+    with pytest.raises(RuntimeError):
+        planner.register("up").value
+
+
+def test_stats_count_the_render():
+    planner = QueryPlanner(_Prometheus())
+    planner.register('up{service="a"}', widget="health")
+    planner.register('up{service="b"}', widget="health")
+    planner.register('up{service="a"}', widget="detail")
+
+    planner.execute()
+    stats = planner.stats()
+
+    assert (stats["registered"], stats["unique"], stats["issued"]) == (3, 2, 1)
+    assert stats["widgets"] == {"health": {"queries": 2, "series": 2}, "detail": {"queries": 1, "series": 1}}
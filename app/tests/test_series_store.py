@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.utils.series_store import MetricsPoller, SeriesStore
+
+
+def _fill(store, ticks, services=("a", "b")):
+    for tick in range(ticks):
+        store.record(1000.0 + 10 * tick, {service: {"status": "Healthy", "response_time": tick + k * 100, "load": 1.0}
+                                          for k, service in enumerate(services)})
+
+
+def test_ring_wraps_and_reads_oldest_first():
+    store = SeriesStore(max_services=4, capacity=5)
+    _fill(store, 13)
+
+    assert len(store) == 5
+    assert store.times().tolist() == [1080.0, 1090.0, 1100.0, 1110.0, 1120.0]
+    assert store.sparkline("a", "response_time").tolist() == [8, 9, 10, 11, 12]
+    assert store.sparkline("b", "response_time", points=2).tolist() == [111, 112]
+    assert store.latest("a", "response_time") == 12
+    assert store.sparkline("a", "up").tolist() == [1.0] * 5
+
+
+def test_reads_across_the_wrap_use_the_caller_buffer():
+    store = SeriesStore(max_services=2, capacity=4)
+    _fill(store, 6)
+    out = np.zeros(10, dtype=np.float32)
+
+    view = store.sparkline("a", "response_time", out=out)
+
+    assert np.shares_memory(view, out)
+    assert view.tolist() == [2, 3, 4, 5]
+    assert store.sparkline("missing", "load").size == 0
+
+
+def test_rate_of_change_and_percentile_span_the_wrap():
+    store = SeriesStore(max_services=2, capacity=4)
+    _fill(store, 7)
+
+    assert store.rate_of_change("a", "response_time", window=3) == pytest.approx(0.1)
+    assert store.rolling_percentile("a", "response_time", 0) == 3.0
+    assert store.rolling_percentile("a", "response_time", 100, window=2) == 6.0
+
+
+def test_missing_samples_are_nan_and_ignored_by_percentiles():
+    store = SeriesStore(max_services=2, capacity=4)
+    store.record(1.0, {"a": {"load": 10.0}})
+    store.record(2.0, {"b": {"load": 99.0}})
+    store.record(3.0, {"a": {"load": 30.0}})
+
+    assert np.isnan(store.sparkline("a", "load")).tolist() == [False, True, False]
+    assert store.rolling_percentile("a", "load", 100) == 30.0
+    assert np.isnan(store.latest("b", "load"))
+
+
+def test_window_matrix_has_one_row_per_service():
+    store = SeriesStore(max_services=3, capacity=3)
+    _fill(store, 4, services=("b", "a"))
+
+    services, matrix = store.window("response_time")
+
+    assert services == ["a", "b"]
+    assert matrix.tolist() == [[101, 102, 103], [1, 2, 3]]
+
+
+def test_full_store_drops_new_services_until_rows_are_freed():
+    store = SeriesStore(max_services=1, capacity=3)
+    store.record(1.0, {"a": {"load": 1.0}, "b": {"load": 2.0}})
+    assert store.services() == ["a"] and store.dropped == 1
+
+    store.remove(["a"])
+    store.record(2.0, {"b": {"load": 3.0}})
+
+    assert store.services() == ["b"]
+    assert np.isnan(store.sparkline("b", "load")).tolist() == [True, False]
+
+
+def test_poller_records_and_notifies():
+    store = SeriesStore(max_services=2, capacity=3)
+    seen = []
+    poller = MetricsPoller(lambda: {"a": {"load": 5.0}}, store)
+    poller.subscribe(lambda timestamp, samples: seen.append(samples))
+
+    poller.poll()
+
+    assert store.latest("a", "load") == 5.0
+    assert seen == [{"a": {"load": 5.0}}]
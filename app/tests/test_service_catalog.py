@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from src.utils.service_catalog import ServiceCatalog
+
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._payload
+
+
+class _FakePrometheus:
+    """Serves the label-values endpoint and the namespace/job query from ``targets``."""
+
+    def __init__(self, targets):
+        self.targets = targets  # [(service, namespace, job)]
+        self.down = False
+        self.label_calls = 0
+        self.index_calls = 0
+
+    def get(self, path, params=None, timeout=None):
+        self.label_calls += 1
+        if self.down:
+            raise ConnectionError("Prometheus is down")
+        return _Response({"status": "success", "data": sorted({service for service, _, _ in self.targets})})
+
+    def query(self, query):
+        self.index_calls += 1
+        return [{"metric": {"service": service, "namespace": namespace, "job": job}, "value": [0, "1"]}
+                for service, namespace, job in self.targets]
+
+
+@pytest.fixture
+def prometheus():
+    return _FakePrometheus([("checkout", "shop", "checkout"), ("search", "shop", "search"), ("search", "edge", "search")])
+
+
+@pytest.fixture
+def catalog(prometheus):
+    catalog = ServiceCatalog(lambda: prometheus, interval=3600, retry_interval=0.05)
+    yield catalog
+    catalog.stop()
+
+
+def test_index_of_namespaces_and_jobs(catalog):
+    catalog.ensure_loaded()
+
+    assert catalog.services() == ["checkout", "search"]
+    assert "search" in catalog and len(catalog) == 2
+    assert catalog.namespaces("search") == ["edge", "shop"]
+    assert catalog.jobs("checkout") == ["checkout"]
+    assert catalog.services_in_namespace("shop") == ["checkout", "search"]
+
+
+def test_refresh_publishes_membership_diffs(catalog, prometheus):
+    diffs = []
+    catalog.subscribe(lambda added, removed: diffs.append((added, removed)))
+    catalog.refresh()
+    version = catalog.version
+
+    prometheus.targets = [("checkout", "shop", "checkout"), ("payments", "shop", "payments")]
+    assert catalog.refresh() == {"added": ["payments"], "removed": ["search"]}
+    assert catalog.refresh() == {"added": [], "removed": []}
+
+    assert diffs == [(["checkout", "search"], []), (["payments"], ["search"])]
+    assert catalog.version == version + 1
+    assert catalog.services_in_namespace("edge") == []
+
+
+def test_index_is_only_requeried_when_membership_changes(prometheus):
+    catalog = ServiceCatalog(lambda: prometheus, reindex_every=100)
+    for _ in range(5):
+        catalog.refresh()
+    assert (prometheus.label_calls, prometheus.index_calls) == (5, 1)
+
+
+def test_failed_first_load_is_not_retried_on_every_call(catalog, prometheus):
+    prometheus.down = True
+    with pytest.raises(ConnectionError):
+        catalog.ensure_loaded()
+    calls = prometheus.label_calls
+    for _ in range(10):
+        catalog.ensure_loaded()
+        assert catalog.services() == []
+    assert prometheus.label_calls - calls <= 2  # at most the background retries, not one per call
+
+    prometheus.down = False
+    deadline = time.monotonic() + 5
+    while not catalog.services():
+        assert time.monotonic() < deadline, "background refresh did not recover"
+        time.sleep(0.01)
+    assert catalog.services() == ["checkout", "search"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.event_ingest.synthetic import SyntheticAlertGenerator
+
+
+def _generator(**kwargs):
+    return SyntheticAlertGenerator(seed=3, start=1_700_000_000.0, duration=3600.0, **kwargs)
+
+
+def test_same_seed_gives_the_same_stream():
+    assert _generator().alerts(500) == _generator().alerts(500)
+    assert _generator().alerts(500) != SyntheticAlertGenerator(seed=4, start=1_700_000_000.0, duration=3600.0).alerts(500)
+
+
+def test_episodes_are_sorted_and_inside_the_window():
+    columns = _generator().episodes(2000)
+    assert np.all(np.diff(columns["start"]) >= 0)
+    assert columns["start"].min() >= 1_700_000_000.0
+    assert np.all(columns["end"] >= columns["start"])
+
+
+def test_pods_stay_within_the_deployment():
+    generator = _generator(pods_per_service=4, burst_size=40, burst_fraction=1.0, flap_fraction=0.0)
+    alerts = generator.alerts(400)
+    pods = {alert["labels"]["instance"].rsplit("-", 1)[1] for alert in alerts}
+    assert pods == {"0", "1", "2", "3"}
+
+
+def test_alerts_keep_the_remediation_label_schema():
+    for alert in _generator(services=3).alerts(100):
+        assert {"alertname", "severity", "deployment", "namespace", "instance"} <= set(alert["labels"])
+        assert alert["labels"]["severity"] in {"critical", "warning", "info"}
+
+
+def test_every_episode_fires_and_resolves_once_in_webhook_batches():
+    batches = list(_generator().webhook_batches(300, batch_size=64))
+    alerts = [alert for batch in batches for alert in batch["alerts"]]
+    assert all(len(batch["alerts"]) <= 64 for batch in batches)
+    assert sum(alert["status"] == "firing" for alert in alerts) == 300
+    assert sum(alert["status"] == "resolved" for alert in alerts) == 300
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"services": 0},
+    {"pods_per_service": 0},
+    {"burst_size": 0},
+    {"flap_count": 0},
+    {"namespaces": ()},
+    {"severity_weights": (0, 0, 0)},
+    {"burst_fraction": 0.8, "flap_fraction": 0.5},
+    {"mean_resolution": -1},
+])
+def test_invalid_arguments_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        _generator(**kwargs)
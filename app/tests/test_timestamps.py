@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.utils import timestamps
+from src.utils.timestamps import NANOS_PER_SECOND, clear_cache, parse_datetime, parse_timestamp_ns
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-05-01T12:00:00Z", datetime(2024, 5, 1, 12, tzinfo=timezone.utc)),
+    ("2024-05-01T12:00:00.123456789Z", datetime(2024, 5, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)),
+    ("2024-05-01T14:00:00+02:00", datetime(2024, 5, 1, 12, tzinfo=timezone.utc)),
+    ("2024-05-01T12:00:00", datetime(2024, 5, 1, 12, tzinfo=timezone.utc)),
+    ("", None),
+    (None, None),
+    ("2024-05-01", None),
+    ("not a timestamp at all", None),
+])
+def test_parse_datetime(value, expected):
+    parsed = parse_datetime(value)
+    assert parsed == expected
+    if parsed is not None:
+        assert parsed.tzinfo is timezone.utc
+
+
+def test_parse_timestamp_ns_keeps_nanoseconds():
+    assert parse_timestamp_ns("1970-01-01T00:00:01.000000789Z") == 1_000_000_789
+
+
+def _unique(count, start=0):
+    return [f"2024-05-01T{n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d}.{n:09d}Z"
+            for n in range(start, start + count)]
+
+
+def test_naive_timestamps_are_read_as_utc():
+    # The dashboard's old parser returned naive datetimes for these; they are now UTC like everything else
+    parsed = parse_datetime("2024-05-01T12:00:00.5")
+    assert parsed == datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+    assert parse_timestamp_ns("1970-01-01T00:00:01") == NANOS_PER_SECOND
+
+
+def test_repeated_values_are_memoised():
+    values = _unique(100)
+    first = [parse_datetime(value) for value in values]
+    assert [parse_datetime(value) for value in values] == first
+    assert parse_datetime.cache_info().hits == len(values)
+
+
+def test_memo_is_bounded():
+    for value in _unique(timestamps._MEMO_SIZE + 10):
+        parse_datetime(value)
+    assert parse_datetime.cache_info().currsize == timestamps._MEMO_SIZE
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.event_ingest import ingest
+from src.event_ingest.history import AlertHistoryStore
+from src.utils.trends import SEVERITY_COLUMNS, alert_severity_trend, parse_bucket, severity_codes, severity_trend
+
+END = np.datetime64("2024-05-15T12:00:00", "ns")  # a Wednesday
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("1h", np.timedelta64(1, "h")),
+    ("1d", np.timedelta64(1, "D")),
+    ("1w", np.timedelta64(7, "D")),
+    ("90d", np.timedelta64(90, "D")),
+    (30, np.timedelta64(30, "s")),
+])
+def test_parse_bucket(spec, expected):
+    assert parse_bucket(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["1y", "d", "-1d", "1.5h"])
+def test_parse_bucket_rejects_invalid_sizes(spec):
+    with pytest.raises(ValueError):
+        parse_bucket(spec)
+
+
+def test_severity_codes_fold_unknown_labels_into_info():
+    assert severity_codes(["critical", "WARNING", "info", None, "page"]).tolist() == [0, 1, 2, 2, 2]
+
+
+def test_daily_buckets_cover_the_window_including_empty_days():
+    timestamps = ["2024-05-15T01:00:00Z", "2024-05-15T11:00:00Z", "2024-05-13T23:59:59Z", "2024-05-01T00:00:00Z"]
+    severities = ["critical", "warning", "critical", "critical"]
+
+    frame = severity_trend(timestamps, severities, bucket="1d", window="3d", end=END)
+
+    assert list(frame.columns) == ["Date"] + SEVERITY_COLUMNS
+    assert list(frame["Date"]) == list(pd.to_datetime(["2024-05-13", "2024-05-14", "2024-05-15"]))
+    assert frame[SEVERITY_COLUMNS].values.tolist() == [[1, 0, 0], [0, 0, 0], [1, 1, 0]]
+
+
+def test_weekly_buckets_start_on_mondays():
+    frame = severity_trend(["2024-05-12T10:00:00Z", "2024-05-13T10:00:00Z"], ["info", "info"],
+                           bucket="1w", window="14d", end=END)
+
+    assert list(frame["Date"]) == list(pd.to_datetime(["2024-05-06", "2024-05-13"]))
+    assert frame["Info"].tolist() == [1, 1]
+
+
+def test_epoch_seconds_with_weights_match_the_raw_events():
+    raw = np.array(["2024-05-14T06:00:00", "2024-05-14T07:00:00", "2024-05-15T06:00:00"], dtype="datetime64[s]")
+    epoch = raw.astype("int64").astype(float)
+    severities = ["warning", "warning", "critical"]
+
+    expanded = severity_trend(raw, severities, bucket="1d", window="2d", end=END)
+    weighted = severity_trend(epoch[[0, 2]], ["warning", "critical"], bucket="1d", window="2d", end=END,
+                              weights=[2, 1])
+
+    pd.testing.assert_frame_equal(expanded, weighted)
+
+
+def test_alert_trend_skips_unparseable_timestamps():
+    alerts = [
+        {"labels": {"severity": "critical"}, "activeAt": "2024-05-15T10:00:00.123456789Z"},
+        {"labels": {"severity": "warning"}, "activeAt": "2024-05-15T09:00:00+02:00"},
+        {"labels": {}, "activeAt": "not a time"},
+    ]
+
+    frame = alert_severity_trend(alerts, bucket="1h", window="6h", end=END)
+
+    assert frame[SEVERITY_COLUMNS].sum().tolist() == [1, 1, 0]
+    assert frame.loc[frame["Date"] == pd.Timestamp("2024-05-15T07:00"), "Warning"].item() == 1
+
+
+def test_incident_trend_from_daily_counts_matches_raw_events(tmp_path, monkeypatch):
+    store = AlertHistoryStore(str(tmp_path / "history.db"))
+    now = time.time()
+    store.record_transitions([
+        ("added", {
+            "labels": {"alertname": f"Alert{n}", "severity": ("critical", "warning", "info")[n % 3]},
+            "state": "firing",
+            "activeAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - n * 7 * 3600)),
+        })
+        for n in range(15)
+    ])
+    monkeypatch.setattr(ingest, "ALERT_HISTORY", store)
+    monkeypatch.setattr(ingest, "sync_alerts", lambda max_age=None: None)
+
+    daily = ingest.fetch_incident_trend("1d", "7d")
+    hourly = ingest.fetch_incident_trend("1h", "7d")
+    store.close()
+
+    assert len(daily) == 7 and len(hourly) == 168
+    assert daily[SEVERITY_COLUMNS].sum().tolist() == [5, 5, 5]
+    assert hourly[SEVERITY_COLUMNS].sum().tolist() == [5, 5, 5]
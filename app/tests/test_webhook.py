@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+import requests
+import uvicorn
+
+from src.event_ingest import ingest, webhook
+from src.event_ingest.ingest import ALERT_TABLE
+from tests.stubs import free_port
+
+
+@pytest.fixture
+def receiver_url():
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(webhook.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+def _payload(alertname, instance, status="firing"):
+    return {
+        "version": "4",
+        "status": status,
+        "alerts": [{
+            "status": status,
+            "labels": {"alertname": alertname, "instance": instance, "severity": "critical"},
+            "annotations": {"summary": f"{alertname} on {instance}"},
+            "startsAt": "2025-05-01T12:00:00Z",
+        }],
+    }
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.02)
+
+
+def test_posted_alerts_reach_the_alert_table(receiver_url):
+    cursor = ALERT_TABLE.cursor
+    response = requests.post(f"{receiver_url}/api/v1/alertmanager", json=_payload("WebhookTestAlert", "node-1"))
+    assert response.status_code == 200
+
+    _wait_for(lambda: any(alert["labels"].get("alertname") == "WebhookTestAlert"
+                          for alert in ALERT_TABLE.delta(cursor)["added"]))
+    assert requests.get(f"{receiver_url}/healthz").json()["queue_depth"] == 0
+
+
+def test_queue_keeps_accepting_once_drained(receiver_url, monkeypatch):
+    monkeypatch.setattr(webhook.alert_queue, "maxsize", 2)
+    for n in range(10):
+        response = requests.post(f"{receiver_url}/api/v1/alertmanager", json=_payload("WebhookBurst", f"node-{n}"))
+        if response.status_code == 503:
+            time.sleep(0.1)
+            response = requests.post(f"{receiver_url}/api/v1/alertmanager", json=_payload("WebhookBurst", f"node-{n}"))
+        assert response.status_code == 200
+    _wait_for(lambda: len(webhook.alert_queue) == 0)
+    firing = {alert["labels"]["instance"] for alert in ALERT_TABLE.snapshot()
+              if alert["labels"].get("alertname") == "WebhookBurst"}
+    assert firing == {f"node-{n}" for n in range(10)}
+
+
+def test_pushed_alerts_survive_the_next_poll(receiver_url, monkeypatch):
+    monkeypatch.setattr(ingest, "fetch_alerts", lambda: ([], False))
+    monkeypatch.setattr(ingest, "fetch_capacity_alerts", lambda: [])
+    response = requests.post(f"{receiver_url}/api/v1/alertmanager", json=_payload("WebhookPushed", "node-1"))
+    assert response.status_code == 200
+    _wait_for(lambda: any(alert["labels"].get("alertname") == "WebhookPushed" for alert in ALERT_TABLE.snapshot()))
+
+    ingest.sync_alerts(max_age=0)
+
+    assert [alert["state"] for alert in ALERT_TABLE.snapshot()
+            if alert["labels"].get("alertname") == "WebhookPushed"] == ["firing"]